@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Event, Recipe, Ingredient, RecipeIngredient
+from .models import Event, Recipe, Ingredient, RecipeIngredient, RecipeImportJob
 
 @admin.register(Event)
 class EventAdmin(admin.ModelAdmin):
@@ -36,3 +36,9 @@ class IngredientAdmin(admin.ModelAdmin):
     list_filter = ('category',)
     search_fields = ('name', 'description')
     ordering = ('name',)
+
+@admin.register(RecipeImportJob)
+class RecipeImportJobAdmin(admin.ModelAdmin):
+    list_display = ('url', 'status', 'attempts', 'user', 'created_at')
+    list_filter = ('status', 'host')
+    search_fields = ('url', 'user__username')
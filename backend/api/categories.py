@@ -0,0 +1,117 @@
+from typing import Dict, Iterable, List
+from .models import Ingredient
+
+DEFAULT_CATEGORY = 'other'
+
+# Whole words or phrases per category. Plurals ending in "s" or "es" match
+# automatically. When several keywords appear in a name the rightmost one
+# wins, since the head noun comes last ("chicken broth" is pantry).
+CATEGORY_KEYWORDS = {
+    'produce': (
+        'apple', 'apricot', 'arugula', 'asparagus', 'avocado', 'banana', 'basil', 'bean sprout',
+        'beet', 'bell pepper', 'berries', 'blackberries', 'blueberries', 'bok choy', 'broccoli',
+        'brussels sprout', 'cabbage', 'cantaloupe', 'carrot', 'cauliflower', 'celery', 'chard',
+        'cherries', 'chive', 'cilantro', 'corn', 'cranberries', 'cucumber', 'dill', 'eggplant',
+        'fennel', 'garlic', 'garlic clove', 'ginger', 'grape', 'grapefruit', 'green bean',
+        'green onion', 'jalapeno', 'kale', 'leek', 'lemon', 'lettuce', 'lime', 'mango', 'melon',
+        'mint', 'mushroom', 'nectarine', 'onion', 'orange', 'parsley', 'parsnip', 'pea', 'peach',
+        'pear', 'pineapple', 'plum', 'potato', 'pumpkin', 'radish', 'raspberries', 'romaine',
+        'scallion', 'shallot', 'spinach', 'squash', 'strawberries', 'sweet potato', 'tomato',
+        'turnip', 'watermelon', 'zucchini',
+    ),
+    'meat': (
+        'anchovy', 'anchovies', 'bacon', 'beef', 'bratwurst', 'brisket', 'chicken', 'chorizo',
+        'clam', 'cod', 'crab', 'duck', 'fish', 'ground beef', 'ground pork', 'ground turkey',
+        'halibut', 'ham', 'lamb', 'lobster', 'meatball', 'mussel', 'pancetta', 'pepperoni',
+        'pork', 'prosciutto', 'salami', 'salmon', 'sausage', 'scallop', 'shrimp', 'steak',
+        'tilapia', 'tuna', 'turkey', 'veal', 'venison',
+    ),
+    'dairy': (
+        'butter', 'buttermilk', 'cheddar', 'cheese', 'cottage cheese', 'cream', 'cream cheese',
+        'creme fraiche', 'egg', 'egg white', 'egg yolk', 'feta', 'ghee', 'gouda', 'gruyere',
+        'half and half', 'heavy cream', 'kefir', 'milk', 'mozzarella', 'parmesan', 'ricotta',
+        'sour cream', 'whipping cream', 'yogurt',
+    ),
+    'pantry': (
+        'almond', 'almond milk', 'baking powder', 'baking soda', 'barley', 'bean', 'black bean', 'bread',
+        'breadcrumb', 'broth', 'brown sugar', 'chickpea', 'chocolate', 'chocolate chip',
+        'cocoa', 'coconut milk', 'cornmeal', 'cornstarch', 'couscous', 'cracker', 'extract',
+        'flour', 'honey', 'jam', 'kidney bean', 'ketchup', 'lentil', 'maple syrup', 'mayonnaise',
+        'molasses', 'mustard', 'noodle', 'nut', 'oat', 'oil', 'olive', 'olive oil', 'pasta',
+        'peanut', 'peanut butter', 'pecan', 'quinoa', 'raisin', 'rice', 'sauce', 'soy sauce',
+        'spaghetti', 'stock', 'sugar', 'syrup', 'tahini', 'tomato paste', 'tomato sauce',
+        'tortilla', 'vinegar', 'walnut', 'wine', 'yeast',
+    ),
+    'spices': (
+        'allspice', 'bay leaf', 'bay leaves', 'black pepper', 'cardamom', 'cayenne', 'chili flake',
+        'chili powder', 'cinnamon', 'clove', 'coriander', 'cumin', 'curry powder', 'dried basil',
+        'dried oregano', 'dried thyme', 'garam masala', 'garlic powder', 'herb', 'italian seasoning',
+        'nutmeg', 'onion powder', 'oregano', 'paprika', 'pepper', 'peppercorn', 'red pepper flake',
+        'rosemary', 'saffron', 'sage', 'salt', 'seasoning', 'smoked paprika', 'spice', 'thyme',
+        'turmeric', 'vanilla',
+    ),
+}
+
+
+# Punctuation stripped from the ends of each word
+PUNCTUATION = ',.;:!?()[]"\'*'
+
+
+def _plurals(word: str):
+    yield word
+    if not word.endswith('s'):
+        yield word + 's'
+        yield word + 'es'
+
+
+class CategoryClassifier:
+    """Guesses an ingredient category from the keywords in its name.
+
+    Keyword phrases are stored in a token trie built from their last word
+    backwards. A name is scanned from its last word, so the first keyword
+    found is the rightmost one, and the trie walk picks the longest phrase
+    ending there ("bell pepper" over "pepper").
+    """
+
+    def __init__(self, keywords: Dict[str, Iterable[str]], default: str = DEFAULT_CATEGORY):
+        choices = dict(Ingredient.CATEGORY_CHOICES)
+        self.default = default
+        self.trie = {}
+        for category, phrases in keywords.items():
+            if category not in choices:
+                raise ValueError(f'Unknown ingredient category: {category}')
+            for phrase in phrases:
+                *leading, last = phrase.lower().split()
+                for word in _plurals(last):
+                    node = self.trie.setdefault(word, {})
+                    for token in reversed(leading):
+                        node = node.setdefault(token, {})
+                    node[None] = category
+
+    def classify(self, names: Iterable[str]) -> List[str]:
+        """Categories for names, in order"""
+        trie, default, punctuation = self.trie, self.default, PUNCTUATION
+        results = []
+        for name in names:
+            words = name.lower().replace('-', ' ').split()
+            category = None
+            end = len(words)
+            while category is None and end:
+                end -= 1
+                node = trie.get(words[end].strip(punctuation))
+                start = end
+                while node is not None:
+                    category = node.get(None, category)
+                    if not start:
+                        break
+                    start -= 1
+                    node = node.get(words[start].strip(punctuation))
+            results.append(category or default)
+        return results
+
+    def classify_one(self, name: str) -> str:
+        return self.classify([name])[0]
+
+
+category_classifier = CategoryClassifier(CATEGORY_KEYWORDS)
+classify = category_classifier.classify
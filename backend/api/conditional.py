@@ -0,0 +1,136 @@
+"""Conditional GET (ETag / Last-Modified) for viewsets of models with an
+updated_at field.
+
+The object, or the page of a list, is read as values() rows and the
+validators are taken from their ids and updated_at: a strong ETag hashing
+them and, for a single object, its updated_at as Last-Modified. Lists
+only get the ETag, since deleting a row or shifting the page changes
+them without moving the newest updated_at. A matching If-None-Match or
+If-Modified-Since gets a 304 before anything else is queried or
+serialized; otherwise the rows already read are serialized.
+
+That only holds if updated_at moves whenever anything in the payload
+changes, including nested rows. The touch_* helpers bump it with one
+UPDATE and are called by the signals in api.signals.
+
+A list requested with ?stream=true is not paginated: the whole result is
+streamed as one JSON array, read, serialized and encoded a chunk of rows
+at a time so memory stays flat however many rows there are.
+"""
+import hashlib
+from itertools import islice
+from typing import Iterable
+
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+from rest_framework.generics import get_object_or_404
+from rest_framework.response import Response
+
+from .models import MealPlan, Recipe
+from .renderers import ORJSONRenderer
+from .values_serializers import values_serializer
+
+# Rows read from the database cursor and serialized together when streaming
+STREAM_CHUNK_SIZE = 500
+
+
+def _touch(model, ids: Iterable[int]):
+    ids = {pk for pk in ids if pk is not None}
+    if ids:
+        model.objects.filter(pk__in=ids).update(updated_at=timezone.now())
+
+
+def touch_recipes(recipe_ids: Iterable[int]):
+    _touch(Recipe, recipe_ids)
+
+
+def touch_meal_plans(meal_plan_ids: Iterable[int]):
+    _touch(MealPlan, meal_plan_ids)
+
+
+class ConditionalGetMixin:
+    """Answer retrieve and list with 304 when the client's copy is current.
+
+    Rows are read as values() dicts with the columns the view's serializer
+    needs (see api.values_serializers), so neither a 304 nor a 200 builds
+    model instances or serializer fields per object. Object permissions are
+    checked against that dict.
+
+    The ETag also covers the user, the full path with its query string, the
+    negotiated media type and the page links, so each distinct
+    representation gets its own. Responses are marked private and no-cache
+    so browsers keep them but revalidate on every use.
+    """
+
+    def get_rows(self, queryset):
+        """queryset as values() rows for the serializer, plus updated_at and
+        the ordering columns pagination reads"""
+        ordering = [
+            field.lstrip('-') for field in (*queryset.query.order_by, *queryset.model._meta.ordering)
+            if isinstance(field, str)
+        ]
+        return values_serializer(self.get_serializer_class()).rows(queryset, 'updated_at', *ordering)
+
+    def serialize_rows(self, rows):
+        return values_serializer(self.get_serializer_class()).serialize(rows)
+
+    def _conditional(self, request, rows, respond, *parts, detail=False):
+        versions = [f"{row['pk']}@{row['updated_at'].isoformat()}" for row in rows]
+        key = '\n'.join(map(str, (request.user.pk, request.get_full_path(), request.accepted_media_type,
+                                  *parts, *versions)))
+        etag = quote_etag(hashlib.md5(key.encode(), usedforsecurity=False).hexdigest())
+        # HTTP dates have whole seconds; If-None-Match still sees every change
+        timestamp = int(rows[0]['updated_at'].timestamp()) if detail else None
+
+        response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+        if response is None:
+            response = respond()
+        if response.status_code in (200, 304):
+            response['ETag'] = etag
+            if timestamp is not None:
+                response['Last-Modified'] = http_date(timestamp)
+            patch_cache_control(response, private=True, no_cache=True)
+        return response
+
+    def retrieve(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        row = get_object_or_404(self.get_rows(queryset), **{self.lookup_field: self.kwargs[lookup_url_kwarg]})
+        self.check_object_permissions(request, row)
+        return self._conditional(request, [row], lambda: Response(self.serialize_rows([row])[0]), detail=True)
+
+    def stream_rows(self, rows):
+        """rows as a streamed JSON array, one chunk of STREAM_CHUNK_SIZE rows
+        per piece. The nested lists of a chunk take one query per level."""
+        renderer = ORJSONRenderer()
+
+        def pieces():
+            yield b'['
+            iterator = rows.iterator(chunk_size=STREAM_CHUNK_SIZE)
+            separator = b''
+            while chunk := list(islice(iterator, STREAM_CHUNK_SIZE)):
+                yield separator + b','.join(renderer.render(data) for data in self.serialize_rows(chunk))
+                separator = b','
+            yield b']'
+
+        return StreamingHttpResponse(pieces(), content_type='application/json')
+
+    def list(self, request, *args, **kwargs):
+        rows = self.get_rows(self.filter_queryset(self.get_queryset()))
+        if request.query_params.get('stream') == 'true':
+            return self.stream_rows(rows)
+        page = self.paginate_queryset(rows)
+        if page is None:
+            rows, links = list(rows), ()
+        else:
+            rows, links = page, (self.paginator.get_next_link(), self.paginator.get_previous_link())
+
+        def respond():
+            data = self.serialize_rows(rows)
+            if page is None:
+                return Response(data)
+            return self.get_paginated_response(data)
+
+        return self._conditional(request, rows, respond, *links)
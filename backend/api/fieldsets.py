@@ -0,0 +1,77 @@
+"""Sparse fieldsets for read endpoints.
+
+?fields=name,prep_time limits each object to the named fields (id is
+always included) and ?expand=ingredients adds nested lists. Without
+?fields= a list returns the view's summary_fields, which leave out the
+nested lists and long text, and a single object returns every field.
+
+The selection is a subclass of the view's serializer with fewer
+Meta.fields. Rows are read through api.values_serializers, so unrequested
+columns are never selected and unrequested nested lists are never
+queried, the values() equivalent of only()/defer() and a dropped
+prefetch.
+"""
+from functools import lru_cache
+from typing import Sequence, Tuple
+
+from rest_framework import serializers
+from rest_framework.exceptions import ValidationError
+
+# Read actions that honour ?fields= and ?expand=
+READ_ACTIONS = ('list', 'retrieve')
+
+
+@lru_cache(maxsize=64)
+def readable_fields(serializer_class) -> Tuple[Tuple[str, ...], Tuple[str, ...]]:
+    """(readable field names, names of those that are nested lists)"""
+    fields = {name: field for name, field in serializer_class().fields.items() if not field.write_only}
+    nested = tuple(name for name, field in fields.items() if isinstance(field, serializers.ListSerializer))
+    return tuple(fields), nested
+
+
+@lru_cache(maxsize=256)
+def sparse_serializer(serializer_class, fields: Tuple[str, ...]):
+    """serializer_class narrowed to fields, or serializer_class itself when
+    fields are all of its readable fields"""
+    if fields == readable_fields(serializer_class)[0]:
+        return serializer_class
+    meta = type('Meta', (serializer_class.Meta,), {'fields': list(fields)})
+    return type(serializer_class.__name__, (serializer_class,), {'Meta': meta, '__module__': __name__})
+
+
+def _names(value) -> Sequence[str]:
+    return [name.strip() for name in (value or '').split(',') if name.strip()]
+
+
+class SparseFieldsetMixin:
+    """Serve list and retrieve with the fields requested in ?fields= and
+    ?expand=. Other actions use the full serializer."""
+
+    # Fields of each list item when ?fields= is not given
+    summary_fields: Sequence[str] = ()
+
+    def get_serializer_class(self):
+        serializer_class = super().get_serializer_class()
+        if self.action not in READ_ACTIONS:
+            return serializer_class
+        return sparse_serializer(serializer_class, self.selected_fields(serializer_class))
+
+    def selected_fields(self, serializer_class) -> Tuple[str, ...]:
+        readable, nested = readable_fields(serializer_class)
+        params = self.request.query_params
+        fields, expand = _names(params.get('fields')), _names(params.get('expand'))
+        unknown = [name for name in fields if name not in readable]
+        if unknown:
+            raise ValidationError({'fields': f'Unknown fields: {", ".join(unknown)}'})
+        unknown = [name for name in expand if name not in nested]
+        if unknown:
+            raise ValidationError({'expand': f'Cannot expand: {", ".join(unknown)}. Choose from {", ".join(nested)}'})
+
+        if fields:
+            selected = {'id', *fields}
+        elif self.action == 'list' and self.summary_fields:
+            selected = set(self.summary_fields)
+        else:
+            selected = set(readable)
+        selected.update(expand)
+        return tuple(name for name in readable if name in selected)
@@ -0,0 +1,268 @@
+"""Database-backed queue for importing recipes from URLs.
+
+RecipeViewSet.import_from_url only records a RecipeImportJob and returns.
+The run_import_worker management command claims due jobs and does the
+fetch/parse/save in a thread pool, off the request path. Settings live in
+settings.RECIPE_IMPORT; see DEFAULTS for the keys.
+"""
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import timedelta
+from urllib.parse import urlsplit
+
+import requests
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.validators import URLValidator
+from django.db import DatabaseError, close_old_connections, connection, transaction
+from django.db.models import Count
+from django.utils import timezone
+
+from .models import Recipe, RecipeImportJob
+from .serializers import RecipeSerializer
+from .services import (
+    fetch_recipe_page, get_cached_scrapes, get_http_session, is_scrape_fresh, record_scrape,
+    scrape_cache_key, scrape_recipe, sync_recipe_ingredients,
+)
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'WORKERS': 4,               # threads in the worker pool
+    'PER_HOST_LIMIT': 2,        # running jobs allowed per host at once
+    'TIMEOUT': 10,              # seconds for each HTTP fetch
+    'JOB_TIMEOUT': 120,         # seconds before a running job counts as abandoned
+    'MAX_ATTEMPTS': 3,
+    'BACKOFF_SECONDS': 30,      # doubled after every failed attempt
+    'CONNECTIONS_PER_HOST': 4,  # pooled keep-alive sockets per host
+    'BATCH_WORKERS': 8,         # concurrent fetches for a batch import
+    'MAX_BATCH_SIZE': 500,      # URLs accepted by one batch import request
+    'POLL_INTERVAL': 1.0,       # seconds an idle worker sleeps between claims
+}
+
+def get_setting(name):
+    return getattr(settings, 'RECIPE_IMPORT', {}).get(name, DEFAULTS[name])
+
+_validate_url = URLValidator(schemes=['http', 'https'])
+
+def is_importable_url(url) -> bool:
+    """Whether url is an http(s) URL with a host the worker could fetch"""
+    try:
+        _validate_url(url)
+    except ValidationError:
+        return False
+    return bool(urlsplit(url).hostname)
+
+def enqueue_import(user, url: str) -> RecipeImportJob:
+    """Record a pending import of url for user; ValueError if it is not an http(s) URL"""
+    if not is_importable_url(url):
+        raise ValueError(f'Not an http(s) URL: {url!r}')
+    return RecipeImportJob.objects.create(user=user, url=url, host=urlsplit(url).hostname)
+
+def save_scraped_recipe(recipe_data: dict, user) -> Recipe:
+    """Validate and save a dict from scrape_recipe along with its ingredients.
+    Near-duplicate ingredient names map onto existing ingredients."""
+    recipe_data = dict(recipe_data)
+    ingredients_data = recipe_data.pop('ingredients', [])
+    serializer = RecipeSerializer(data=recipe_data)
+    serializer.is_valid(raise_exception=True)
+    with transaction.atomic():
+        recipe = serializer.save(user=user)
+        sync_recipe_ingredients(recipe, ingredients_data, match_similar=True)
+    return recipe
+
+def fetch_recipes(urls, workers=None, session=None):
+    """Scrape urls concurrently, yielding (url, recipe_data, error) tuples in
+    completion order.
+
+    Fresh scrape cache hits are yielded first without a request; the rest
+    are revalidated or fetched over one pooled session. The fetching threads
+    never touch the database, cache reads and writes happen in the caller.
+    """
+    workers = workers or get_setting('BATCH_WORKERS')
+    session = session or get_http_session()
+    timeout = get_setting('TIMEOUT')
+    entries = get_cached_scrapes(urls)
+
+    pending = {}
+    for url in urls:
+        entry = entries.get(scrape_cache_key(url))
+        if entry is not None and is_scrape_fresh(entry):
+            yield url, entry.recipe_data, None
+        else:
+            pending[url] = entry
+
+    if not pending:
+        return
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='recipe-fetch') as pool:
+        futures = {
+            pool.submit(
+                fetch_recipe_page, url, timeout=timeout, session=session,
+                etag=entry.etag if entry else '',
+                last_modified=entry.last_modified if entry else ''
+            ): url
+            for url, entry in pending.items()
+        }
+        for future in as_completed(futures):
+            url = futures[future]
+            try:
+                recipe_data, etag, last_modified = future.result()
+                yield url, record_scrape(url, pending[url], recipe_data, etag, last_modified), None
+            except Exception as e:
+                logger.error('Error scraping recipe from %s: %s', url, e)
+                yield url, None, e
+
+def import_batch(urls, user, workers=None, session=None):
+    """Fetch urls concurrently and save each recipe as its page arrives,
+    yielding one result dict per URL."""
+    for url, recipe_data, error in fetch_recipes(urls, workers=workers, session=session):
+        if error is None:
+            try:
+                recipe = save_scraped_recipe(recipe_data, user)
+            except Exception as e:
+                error = e
+            else:
+                yield {'url': url, 'status': 'created', 'recipe': recipe.id, 'name': recipe.name}
+                continue
+        yield {'url': url, 'status': 'failed', 'error': str(error)}
+
+def requeue_stale_jobs() -> int:
+    """Return running jobs whose worker went silent to the queue, or fail them
+    when they have used up their attempts."""
+    cutoff = timezone.now() - timedelta(seconds=get_setting('JOB_TIMEOUT'))
+    stale = RecipeImportJob.objects.filter(status='running', started_at__lt=cutoff)
+    failed = stale.filter(attempts__gte=get_setting('MAX_ATTEMPTS')).update(
+        status='failed', error='Import timed out', updated_at=timezone.now()
+    )
+    requeued = stale.update(status='pending', next_attempt_at=timezone.now(), updated_at=timezone.now())
+    return failed + requeued
+
+# First key of the PostgreSQL advisory locks taken per host by claim_job
+HOST_LOCK_NAMESPACE = 7431
+
+def _lock_host(host: str) -> bool:
+    """Hold the claim lock for host until the transaction ends, or return
+    False when another worker is claiming a job for it right now.
+
+    On PostgreSQL this is a transaction-level advisory lock. It is taken
+    without waiting, so two workers that each hold one host never wait on
+    each other. Other databases serialize the transactions that write, so
+    there is nothing to take.
+    """
+    if connection.vendor != 'postgresql':
+        return True
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT pg_try_advisory_xact_lock(%s, hashtext(%s))', [HOST_LOCK_NAMESPACE, host])
+        return cursor.fetchone()[0]
+
+def claim_job():
+    """Mark the next due job as running and return it, or None if there is none.
+
+    Hosts that already have PER_HOST_LIMIT running jobs are skipped so one
+    slow site cannot occupy the whole pool. The running jobs of the chosen
+    job's host are counted again under that host's lock, so workers claiming
+    at the same time cannot both take the last slot.
+    """
+    now = timezone.now()
+    limit = get_setting('PER_HOST_LIMIT')
+    with transaction.atomic():
+        busy_hosts = set(
+            RecipeImportJob.objects.filter(status='running')
+            .values('host')
+            .annotate(running=Count('id'))
+            .filter(running__gte=limit)
+            .values_list('host', flat=True)
+        )
+        while True:
+            job = (
+                RecipeImportJob.objects.select_for_update(skip_locked=True)
+                .filter(status='pending', next_attempt_at__lte=now)
+                .exclude(host__in=busy_hosts)
+                .order_by('next_attempt_at', 'id')
+                .first()
+            )
+            if job is None:
+                return None
+            if (_lock_host(job.host)
+                    and RecipeImportJob.objects.filter(status='running', host=job.host).count() < limit):
+                break
+            busy_hosts.add(job.host)
+        job.status = 'running'
+        job.attempts += 1
+        job.started_at = now
+        job.save(update_fields=['status', 'attempts', 'started_at', 'updated_at'])
+    return job
+
+def run_job(job: RecipeImportJob):
+    """Fetch, parse and save the recipe for a claimed job.
+
+    Network errors are retried with exponential backoff until MAX_ATTEMPTS;
+    anything else (an unparseable page, invalid data) fails the job at once.
+    """
+    try:
+        recipe_data = scrape_recipe(job.url, timeout=get_setting('TIMEOUT'), session=get_http_session())
+        with transaction.atomic():
+            recipe = save_scraped_recipe(recipe_data, job.user)
+            job.status = 'succeeded'
+            job.recipe = recipe
+            job.error = ''
+            job.save(update_fields=['status', 'recipe', 'error', 'updated_at'])
+    except requests.RequestException as e:
+        job.error = str(e)
+        if job.attempts < get_setting('MAX_ATTEMPTS'):
+            delay = get_setting('BACKOFF_SECONDS') * 2 ** (job.attempts - 1)
+            job.status = 'pending'
+            job.next_attempt_at = timezone.now() + timedelta(seconds=delay)
+            logger.info("Import job %s failed (%s), retrying in %ss", job.id, e, delay)
+        else:
+            job.status = 'failed'
+            logger.warning("Import job %s failed after %s attempts: %s", job.id, job.attempts, e)
+        job.save(update_fields=['status', 'error', 'next_attempt_at', 'updated_at'])
+    except Exception as e:
+        logger.warning("Import job %s failed: %s", job.id, e)
+        job.status = 'failed'
+        job.error = str(e)
+        job.save(update_fields=['status', 'error', 'updated_at'])
+    return job
+
+def _work(stop_event: threading.Event, stop_when_idle: bool):
+    try:
+        while not stop_event.is_set():
+            close_old_connections()
+            try:
+                job = claim_job()
+                if job is not None:
+                    run_job(job)
+                    continue
+            except DatabaseError as e:
+                # Lost a race for the queue or the connection dropped; a job
+                # left running is picked up again by requeue_stale_jobs
+                logger.warning("Recipe import worker database error: %s", e)
+                stop_event.wait(get_setting('POLL_INTERVAL'))
+                continue
+            if stop_when_idle:
+                return
+            else:
+                requeue_stale_jobs()
+                stop_event.wait(get_setting('POLL_INTERVAL'))
+    finally:
+        connection.close()
+
+def run_workers(workers=None, stop_when_idle=False, stop_event=None):
+    """Process jobs with a pool of worker threads until stop_event is set, or
+    until the queue has no due jobs when stop_when_idle is true."""
+    workers = workers or get_setting('WORKERS')
+    stop_event = stop_event or threading.Event()
+    requeue_stale_jobs()
+    pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='recipe-import')
+    futures = [pool.submit(_work, stop_event, stop_when_idle) for _ in range(workers)]
+    try:
+        for future in futures:
+            future.result()
+    except KeyboardInterrupt:
+        # Let each worker finish its current job before exiting
+        stop_event.set()
+        raise
+    finally:
+        pool.shutdown(wait=True)
@@ -0,0 +1,159 @@
+"""Fuzzy ingredient name matching with trigrams.
+
+On PostgreSQL api_ingredient.normalized_name has a pg_trgm GIN index (added
+by migration 0013). Autocomplete keeps names that contain the query as a
+word or prefix (word similarity, the <% operator) or that are similar as a
+whole (the % operator), both answered from the index.
+
+On SQLite the names are indexed in the api_ingredient_trgm FTS5 table with
+the trigram tokenizer, keyed by ingredient id. It narrows the names to
+those sharing a trigram with the query. Those are scored in Python the way
+pg_trgm scores them, with its default thresholds.
+
+Bulk imports use the same index to map near-duplicate names ("onions") to
+an existing ingredient ("onion") instead of creating another one.
+"""
+import re
+from typing import Iterable, List, Optional, Set
+
+from django.db import connection
+from django.db.models import BooleanField, FloatField
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import Length
+
+from .models import Ingredient, normalize_ingredient_name
+
+TRIGRAM_TABLE = 'api_ingredient_trgm'
+
+# pg_trgm's defaults for pg_trgm.similarity_threshold and
+# pg_trgm.word_similarity_threshold
+SIMILARITY_THRESHOLD = 0.3
+WORD_SIMILARITY_THRESHOLD = 0.6
+
+# Imported names at least this similar to an existing one are the same ingredient
+DUPLICATE_THRESHOLD = 0.6
+
+# Names fetched from the SQLite trigram table to be scored in Python
+SQLITE_CANDIDATES = 200
+
+WORD_PATTERN = re.compile(r'[^\W_]+')
+
+
+def _vendor():
+    return connection.vendor
+
+
+def trigrams(text: str) -> Set[str]:
+    """pg_trgm's trigrams of text: each word is lowercased and padded with
+    two spaces in front and one behind."""
+    found = set()
+    for word in WORD_PATTERN.findall(text.lower()):
+        padded = f'  {word} '
+        found.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return found
+
+
+def similarity(a: str, b: str) -> float:
+    """Shared trigrams over all trigrams, like pg_trgm's similarity()"""
+    first, second = trigrams(a), trigrams(b)
+    if not first or not second:
+        return 0.0
+    return len(first & second) / len(first | second)
+
+
+def word_similarity(query: str, name: str) -> float:
+    """Share of the query's trigrams found in name, which is pg_trgm's
+    word_similarity() whenever the query matches one stretch of name."""
+    wanted = trigrams(query)
+    if not wanted:
+        return 0.0
+    return len(wanted & trigrams(name)) / len(wanted)
+
+
+def index_ingredients(ingredient_ids: Iterable[int]):
+    """Refresh the SQLite trigram entries of ingredient_ids; Postgres keeps
+    its index by itself."""
+    ingredient_ids = sorted(set(ingredient_ids))
+    if not ingredient_ids or _vendor() != 'sqlite':
+        return
+    placeholders = ', '.join(['%s'] * len(ingredient_ids))
+    table = Ingredient._meta.db_table
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {TRIGRAM_TABLE} WHERE rowid IN ({placeholders})', ingredient_ids)
+        cursor.execute(
+            f'INSERT INTO {TRIGRAM_TABLE} (rowid, normalized_name) '
+            f'SELECT id, normalized_name FROM {table} WHERE id IN ({placeholders})',
+            ingredient_ids
+        )
+
+
+def unindex_ingredients(ingredient_ids: Iterable[int]):
+    ingredient_ids = list(ingredient_ids)
+    if ingredient_ids and _vendor() == 'sqlite':
+        placeholders = ', '.join(['%s'] * len(ingredient_ids))
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {TRIGRAM_TABLE} WHERE rowid IN ({placeholders})', ingredient_ids)
+
+
+def _sqlite_candidates(query: str) -> List[Ingredient]:
+    """Ingredients sharing a raw trigram with query, most shared first"""
+    # FTS5 trigrams are plain 3 character substrings, unpadded
+    grams = {query[i:i + 3] for i in range(len(query) - 2)}
+    if not grams:
+        return list(Ingredient.objects.filter(normalized_name__startswith=query)[:SQLITE_CANDIDATES])
+    match = ' OR '.join('"%s"' % gram.replace('"', '""') for gram in sorted(grams))
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'SELECT rowid FROM {TRIGRAM_TABLE} WHERE {TRIGRAM_TABLE} MATCH %s '
+            f'ORDER BY bm25({TRIGRAM_TABLE}) LIMIT %s',
+            [match, SQLITE_CANDIDATES]
+        )
+        ids = [row[0] for row in cursor.fetchall()]
+    return list(Ingredient.objects.filter(id__in=ids))
+
+
+def _ranked(ingredients: Iterable[Ingredient], query: str, limit: int) -> List[Ingredient]:
+    matches = []
+    for ingredient in ingredients:
+        ingredient.rank = word_similarity(query, ingredient.normalized_name)
+        ingredient.similarity = similarity(query, ingredient.normalized_name)
+        if ingredient.rank >= WORD_SIMILARITY_THRESHOLD or ingredient.similarity >= SIMILARITY_THRESHOLD:
+            matches.append(ingredient)
+    matches.sort(key=lambda ingredient: (
+        -ingredient.rank, -ingredient.similarity, len(ingredient.normalized_name), ingredient.normalized_name
+    ))
+    return matches[:limit]
+
+
+def match_ingredients(query: str, limit: int = 10) -> List[Ingredient]:
+    """Up to limit ingredients whose names match query, best first.
+
+    Each is annotated with rank (word similarity of the query to the name)
+    and similarity (of the whole names).
+    """
+    query = normalize_ingredient_name(query)
+    if not query or limit < 1:
+        return []
+    if _vendor() == 'postgresql':
+        table = Ingredient._meta.db_table
+        column = f'{table}.normalized_name'
+        return list(Ingredient.objects.filter(
+            # %% is a literal %: the pg_trgm operators, both served by the GIN index
+            RawSQL(f'(%s <%% {column} OR {column} %% %s)', (query, query), output_field=BooleanField())
+        ).annotate(
+            rank=RawSQL(f'word_similarity(%s, {column})', (query,), output_field=FloatField()),
+            similarity=RawSQL(f'similarity(%s, {column})', (query,), output_field=FloatField()),
+        ).order_by('-rank', '-similarity', Length('normalized_name'), 'normalized_name')[:limit])
+    if _vendor() == 'sqlite':
+        return _ranked(_sqlite_candidates(query), query, limit)
+    return _ranked(Ingredient.objects.filter(normalized_name__contains=query[:3])[:SQLITE_CANDIDATES], query, limit)
+
+
+def find_duplicate(name: str) -> Optional[Ingredient]:
+    """The existing ingredient most similar to name, if it is similar enough
+    to be the same thing (DUPLICATE_THRESHOLD)."""
+    matches = [
+        ingredient for ingredient in match_ingredients(name, limit=10)
+        if ingredient.similarity >= DUPLICATE_THRESHOLD
+    ]
+    return max(matches, key=lambda ingredient: ingredient.similarity, default=None)
@@ -0,0 +1,164 @@
+import re
+import time
+from itertools import cycle, islice
+from pathlib import Path
+from typing import Tuple
+from django.core.management.base import BaseCommand, CommandError
+from api.categories import classify
+from api.services import parse_ingredient_line
+
+DEFAULT_CORPUS = Path(__file__).resolve().parents[2] / 'tests' / 'ingredient_lines.txt'
+
+def reference_parse_ingredient_line(line: str) -> Tuple[str, float, str, str]:
+    """The word-loop parser that api.services.parse_ingredient_line replaced,
+    kept as the baseline for result and speed comparisons"""
+    # Extract notes in parentheses
+    notes = []
+    for note in re.finditer(r'\(([^)]+)\)', line):
+        notes.append(note.group(1))
+    if notes:
+        notes = ', '.join(notes)
+        line = re.sub(r'\([^)]*\)', '', line).strip()
+    else:
+        notes = ''
+
+    # Common units to look for
+    units = {
+        'cups': 'cup', 'cup': 'cup',
+        'tablespoons': 'tbsp', 'tablespoon': 'tbsp', 'tbsp': 'tbsp', 'tbsps': 'tbsp',
+        'teaspoons': 'tsp', 'teaspoon': 'tsp', 'tsp': 'tsp', 'tsps': 'tsp',
+        'ounces': 'oz', 'ounce': 'oz', 'oz': 'oz',
+        'pounds': 'lb', 'pound': 'lb', 'lb': 'lb',
+        'grams': 'g', 'gram': 'g', 'g': 'g',
+        'kilograms': 'kg', 'kilogram': 'kg', 'kg': 'kg',
+        'milliliters': 'ml', 'milliliter': 'ml', 'ml': 'ml',
+        'liters': 'l', 'liter': 'l', 'l': 'l',
+        'pieces': 'piece', 'piece': 'piece',
+        'pinch': 'pinch', 'pinches': 'pinch',
+        'package': 'pkg', 'packages': 'pkg', 'pkg': 'pkg',
+        'whole': 'whole',
+        'large': 'whole',
+        'medium': 'whole',
+        'small': 'whole'
+    }
+    
+    # Try to find quantity and unit
+    words = line.lower().split()
+    if not words:
+        return '', 1.0, 'whole', notes
+        
+    quantity = 1.0
+    unit = 'whole'
+    ingredient_start = 0
+    
+    # Handle ranges like "1/2 - 1 Tbsp"
+    range_match = re.match(r'([\d\s/]+)\s*-\s*([\d\s/]+)\s*(\w+)(.*)', line.lower())
+    if range_match:
+        try:
+            # Take the first number from the range
+            first_num = range_match.group(1).strip()
+            if '/' in first_num:
+                if ' ' in first_num:
+                    whole, frac = first_num.split()
+                    num, denom = map(int, frac.split('/'))
+                    quantity = float(whole) + num/denom
+                else:
+                    num, denom = map(int, first_num.split('/'))
+                    quantity = num/denom
+            else:
+                quantity = float(first_num)
+            unit_word = range_match.group(3).strip()
+            if unit_word in units:
+                unit = units[unit_word]
+            ingredient_name = range_match.group(4).strip()
+            return ingredient_name, quantity, unit, notes
+        except ValueError:
+            pass
+    
+    # Look for numeric values at the start
+    for i, word in enumerate(words):
+        try:
+            if i + 2 < len(words) and '/' in words[i + 1]:
+                # Handle mixed numbers like "1 1/2"
+                whole = float(word)
+                num, denom = map(int, words[i + 1].split('/'))
+                quantity = whole + num/denom
+                ingredient_start = i + 2
+                break
+            elif '/' in word:
+                # Handle fractions like "1/2"
+                num, denom = map(int, word.split('/'))
+                quantity = num/denom
+                ingredient_start = i + 1
+                break
+            elif word.replace('.', '').isdigit():
+                # Handle simple numbers
+                quantity = float(word)
+                ingredient_start = i + 1
+                break
+        except ValueError:
+            break
+            
+    # Look for unit after the number
+    if ingredient_start < len(words):
+        next_word = words[ingredient_start]
+        if next_word in units:
+            unit = units[next_word]
+            ingredient_start += 1
+            
+    # The rest is the ingredient name
+    ingredient_name = ' '.join(words[ingredient_start:]).strip()
+    return ingredient_name, quantity, unit, notes
+
+def time_parser(parse, lines) -> float:
+    start = time.perf_counter()
+    for line in lines:
+        parse(line)
+    return time.perf_counter() - start
+
+class Command(BaseCommand):
+    help = ('Compares parse_ingredient_line with the previous parser for results and throughput, '
+            'and reports category classifier throughput')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--corpus', default=str(DEFAULT_CORPUS), help='File with one ingredient line per line')
+        parser.add_argument('--lines', type=int, default=1_000_000, help='Number of lines to parse')
+        parser.add_argument('--min-speedup', type=float, default=1.5,
+                            help='Fail when the uncached parser is less than this many times faster')
+
+    def handle(self, *args, **options):
+        corpus = Path(options['corpus'])
+        if not corpus.exists():
+            raise CommandError(f'Corpus {corpus} does not exist')
+        distinct = [line for line in corpus.read_text(encoding='utf-8').splitlines() if line.strip()]
+        if not distinct:
+            raise CommandError(f'Corpus {corpus} is empty')
+
+        for line in distinct:
+            expected = reference_parse_ingredient_line(line)
+            parsed = tuple(parse_ingredient_line(line))
+            if parsed != expected:
+                raise CommandError(f'Result mismatch for {line!r}: {parsed} != {expected}')
+
+        lines = list(islice(cycle(distinct), options['lines']))
+        reference_seconds = time_parser(reference_parse_ingredient_line, lines)
+        # The parser itself, every line a line cache miss
+        seconds = time_parser(parse_ingredient_line.__wrapped__, lines)
+        speedup = reference_seconds / seconds
+        parse_ingredient_line.cache_clear()
+        cached = reference_seconds / time_parser(parse_ingredient_line, lines)
+
+        self.stdout.write(f'{len(lines)} lines ({len(distinct)} distinct) from {corpus.name}')
+        self.stdout.write(f'  previous parser: {len(lines) / reference_seconds:>12,.0f} lines/s')
+        self.stdout.write(f'  current parser:  {len(lines) / seconds:>12,.0f} lines/s')
+        self.stdout.write(f'  speedup: {speedup:.1f}x ({cached:.1f}x with the line cache)')
+
+        names = [parse_ingredient_line(line).name for line in lines]
+        start = time.perf_counter()
+        classify(names)
+        self.stdout.write(
+            f'  category classifier: {len(names) / (time.perf_counter() - start) / 1000:,.0f} names/ms'
+        )
+        if speedup < options['min_speedup']:
+            raise CommandError(f"Speedup {speedup:.1f}x is below {options['min_speedup']}x")
+        self.stdout.write(self.style.SUCCESS('Results identical'))
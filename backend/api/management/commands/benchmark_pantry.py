@@ -0,0 +1,51 @@
+import random
+import statistics
+import time
+from django.core.management.base import BaseCommand, CommandError
+from api.pantry import PantryIndex
+
+class Command(BaseCommand):
+    help = ('Times "what can I cook" queries on a pantry index loaded with generated recipes; '
+            'nothing is written to the database')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--recipes', type=int, default=500_000, help='Number of recipes to generate')
+        parser.add_argument('--ingredients', type=int, default=2000, help='Distinct ingredients to draw from')
+        parser.add_argument('--pantry', type=int, default=15, help='Ingredients per pantry')
+        parser.add_argument('--queries', type=int, default=200, help='Pantries to query')
+        parser.add_argument('--limit', type=int, default=40, help='Recipes asked of each query')
+        parser.add_argument('--max-ms', type=float, default=10.0,
+                            help='Fail if the median query takes longer (0 disables the check)')
+        parser.add_argument('--seed', type=int, default=1)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        ingredients = options['ingredients']
+
+        def ingredient():
+            # Few staples are in most recipes, most ingredients in few
+            return min(int(rng.paretovariate(1.1)), ingredients)
+
+        index = PantryIndex()
+        start = time.perf_counter()
+        index.load(
+            (recipe_id, ingredient(), rng.random() < 0.15)
+            for recipe_id in range(1, options['recipes'] + 1) for _ in range(rng.randint(4, 14))
+        )
+        self.stdout.write(f'{options["recipes"]:,} recipes indexed in {time.perf_counter() - start:.1f} s')
+
+        timings = []
+        for _ in range(options['queries']):
+            pantry = {ingredient() for _ in range(options['pantry'])}
+            start = time.perf_counter()
+            index.query(pantry, options['limit'])
+            timings.append((time.perf_counter() - start) * 1000)
+        timings.sort()
+        median = statistics.median(timings)
+        self.stdout.write(f'{options["queries"]} queries of {options["pantry"]} ingredients, limit {options["limit"]}')
+        self.stdout.write(f'  median: {median:>8.2f} ms')
+        self.stdout.write(f'  p95:    {timings[int(len(timings) * 0.95) - 1]:>8.2f} ms')
+        self.stdout.write(f'  max:    {timings[-1]:>8.2f} ms')
+        if options['max_ms'] and median > options['max_ms']:
+            raise CommandError(f'Median query took {median:.2f} ms, over {options["max_ms"]} ms')
+        self.stdout.write(self.style.SUCCESS('Within budget'))
@@ -0,0 +1,52 @@
+import time
+import tracemalloc
+from pathlib import Path
+from django.core.management.base import BaseCommand, CommandError
+from api.services import (
+    extract_html_recipe, extract_html_recipe_fast, extract_json_ld_recipe, parse_recipe_html
+)
+
+DEFAULT_CORPUS = Path(__file__).resolve().parents[2] / 'tests' / 'pages'
+
+STRATEGIES = (
+    ('json-ld', extract_json_ld_recipe),
+    ('lxml', extract_html_recipe_fast),
+    ('generic', extract_html_recipe),
+    ('pipeline', parse_recipe_html),
+)
+
+class Command(BaseCommand):
+    help = 'Reports per-page parse time and peak memory for each recipe extraction strategy'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--corpus', default=str(DEFAULT_CORPUS), help='Directory of saved .html pages')
+        parser.add_argument('--repeat', type=int, default=20, help='Parses per page when timing')
+
+    def handle(self, *args, **options):
+        pages = sorted(Path(options['corpus']).glob('*.html'))
+        if not pages:
+            raise CommandError(f"No .html pages found in {options['corpus']}")
+        repeat = max(options['repeat'], 1)
+
+        self.stdout.write(f"{'page':<32}{'strategy':<10}{'ms/page':>10}{'peak KiB':>10}  result")
+        for page in pages:
+            html = page.read_text(encoding='utf-8', errors='replace')
+            for label, extract in STRATEGIES:
+                start = time.perf_counter()
+                for _ in range(repeat):
+                    result = extract(html)
+                elapsed_ms = (time.perf_counter() - start) * 1000 / repeat
+
+                # tracemalloc only sees Python allocations, lxml's C tree is not counted
+                tracemalloc.start()
+                extract(html)
+                peak = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+
+                if result is None:
+                    outcome = 'n/a'
+                else:
+                    outcome = f"{len(result['ingredients'])} ingredients"
+                self.stdout.write(
+                    f'{page.name:<32}{label:<10}{elapsed_ms:>10.2f}{peak / 1024:>10.0f}  {outcome}'
+                )
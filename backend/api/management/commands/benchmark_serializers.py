@@ -0,0 +1,77 @@
+import time
+from decimal import Decimal
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+from api.models import Ingredient, Recipe, RecipeIngredient
+from api.serializers import RecipeSerializer, optimize_queryset
+from api.values_serializers import values_serializer
+
+class Rollback(Exception):
+    pass
+
+class Command(BaseCommand):
+    help = ('Compares RecipeSerializer with its values() counterpart on generated recipes '
+            'for identical JSON and serialization time; the recipes are rolled back')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--recipes', type=int, default=10_000, help='Number of recipes to generate')
+        parser.add_argument('--lines', type=int, default=8, help='Ingredient lines per recipe')
+        parser.add_argument('--repeat', type=int, default=3, help='Runs of each serializer; the best is kept')
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self.generate(options['recipes'], options['lines'])
+                self.compare(options['repeat'])
+                raise Rollback
+        except Rollback:
+            pass
+
+    def generate(self, count, lines):
+        user = User.objects.create_user(username='benchmark-serializers')
+        ingredients = Ingredient.objects.bulk_create(
+            Ingredient(name=f'Ingredient {i}', normalized_name=f'ingredient {i}', category='other')
+            for i in range(200)
+        )
+        recipes = Recipe.objects.bulk_create(
+            Recipe(name=f'Recipe {i}', description='Generated', instructions='Mix well', servings=4,
+                   prep_time=10, difficulty='easy', user=user)
+            for i in range(count)
+        )
+        RecipeIngredient.objects.bulk_create(
+            (RecipeIngredient(recipe=recipe, ingredient=ingredients[(i * 7 + line) % len(ingredients)],
+                              quantity=Decimal(line + 1) / 4, unit='cup', order=line)
+             for i, recipe in enumerate(recipes) for line in range(lines)),
+            batch_size=5000
+        )
+
+    def compare(self, repeat):
+        queryset = Recipe.objects.all()
+        fast = values_serializer(RecipeSerializer)
+
+        def drf():
+            return RecipeSerializer(optimize_queryset(queryset, RecipeSerializer), many=True).data
+
+        def values():
+            return fast.serialize(fast.rows(queryset))
+
+        results = {}
+        for name, serialize in (('ModelSerializer', drf), ('values()', values)):
+            best = None
+            for _ in range(repeat):
+                start = time.perf_counter()
+                data = serialize()
+                elapsed = time.perf_counter() - start
+                best = elapsed if best is None else min(best, elapsed)
+            results[name] = (best, JSONRenderer().render(data))
+
+        (drf_seconds, drf_json), (values_seconds, values_json) = results.values()
+        if drf_json != values_json:
+            raise CommandError('The values() serializer rendered different JSON')
+        self.stdout.write(f'{queryset.count()} recipes, best of {repeat}, queries included')
+        self.stdout.write(f'  ModelSerializer: {drf_seconds * 1000:>10,.0f} ms')
+        self.stdout.write(f'  values():        {values_seconds * 1000:>10,.0f} ms')
+        self.stdout.write(f'  speedup: {drf_seconds / values_seconds:.1f}x')
+        self.stdout.write(self.style.SUCCESS('Output identical'))
@@ -1,6 +1,7 @@
 from django.core.management.base import BaseCommand
 from django.contrib.auth.models import User
-from api.models import Recipe, Ingredient, RecipeIngredient
+from api.models import Recipe, RecipeIngredient
+from api.services import get_or_create_ingredient
 from decimal import Decimal
 
 class Command(BaseCommand):
@@ -65,10 +66,7 @@ class Command(BaseCommand):
             recipe = Recipe.objects.create(user=user, **recipe_data)
             
             for ing_name, quantity, unit in ingredients:
-                ingredient, _ = Ingredient.objects.get_or_create(
-                    name=ing_name.lower(),
-                    defaults={'category': 'other'}
-                )
+                ingredient = get_or_create_ingredient(ing_name)
                 RecipeIngredient.objects.create(
                     recipe=recipe,
                     ingredient=ingredient,
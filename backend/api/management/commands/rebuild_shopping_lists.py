@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand, CommandError
+from api.shopping_list import (
+    compare_shopping_lists, compute_shopping_lists, rebuild_shopping_lists, stored_shopping_lists
+)
+
+class Command(BaseCommand):
+    help = (
+        'Recomputes meal plan shopping lists from scratch, reports where the '
+        'incrementally maintained totals differ and replaces them'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('meal_plans', nargs='*', type=int, help='Meal plan ids (default: all)')
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help='Only compare; exit with an error if any total differs'
+        )
+
+    def handle(self, *args, **options):
+        meal_plan_ids = options['meal_plans'] or None
+        if options['check']:
+            differences = compare_shopping_lists(
+                compute_shopping_lists(meal_plan_ids), stored_shopping_lists(meal_plan_ids)
+            )
+        else:
+            differences = rebuild_shopping_lists(meal_plan_ids)
+
+        for (meal_plan_id, ingredient_id, unit), expected, stored in differences:
+            self.stdout.write(
+                f'plan {meal_plan_id} ingredient {ingredient_id} ({unit}): '
+                f'expected {expected}, stored {stored}'
+            )
+        if not differences:
+            self.stdout.write(self.style.SUCCESS('Shopping lists are up to date'))
+        elif options['check']:
+            raise CommandError(f'{len(differences)} shopping list totals are out of date')
+        else:
+            self.stdout.write(self.style.SUCCESS(f'Rebuilt {len(differences)} shopping list totals'))
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+from api.import_queue import run_workers
+
+class Command(BaseCommand):
+    help = 'Processes queued recipe imports with a pool of worker threads'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, help='Number of worker threads')
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Exit once there are no due jobs instead of polling for new ones'
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write('Starting recipe import workers')
+        try:
+            run_workers(workers=options['workers'], stop_when_idle=options['once'])
+        except KeyboardInterrupt:
+            self.stdout.write('Stopping recipe import workers')
+            return
+        self.stdout.write(self.style.SUCCESS('Recipe import queue drained'))
@@ -0,0 +1,43 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:53
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0006_mealplan_mealslot"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name="event",
+            options={"ordering": ["date", "time"]},
+        ),
+        migrations.AddIndex(
+            model_name="event",
+            index=models.Index(
+                fields=["user", "date", "time", "id"], name="event_user_date_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="mealplan",
+            index=models.Index(
+                fields=["user", "-start_date", "-id"], name="mealplan_user_start_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="mealslot",
+            index=models.Index(
+                fields=["date", "meal_type", "id"], name="mealslot_date_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="recipe",
+            index=models.Index(
+                fields=["-created_at", "-id"], name="recipe_created_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:58
+
+from django.db import migrations
+
+
+def normalize(name):
+    return " ".join(name.lower().split())
+
+
+def merge_duplicate_ingredients(apps, schema_editor):
+    """Fill normalized_name and fold ingredients that normalize to the same
+    name into the oldest one, repointing their recipe lines first."""
+    Ingredient = apps.get_model("api", "Ingredient")
+    RecipeIngredient = apps.get_model("api", "RecipeIngredient")
+
+    survivors = {}
+    duplicates = {}
+    for ingredient in Ingredient.objects.order_by("id").only("id", "name").iterator():
+        key = normalize(ingredient.name)
+        if key in survivors:
+            duplicates.setdefault(survivors[key].id, []).append(ingredient.id)
+        else:
+            ingredient.normalized_name = key
+            survivors[key] = ingredient
+
+    for keep_id, duplicate_ids in duplicates.items():
+        RecipeIngredient.objects.filter(ingredient_id__in=duplicate_ids).update(
+            ingredient_id=keep_id
+        )
+        Ingredient.objects.filter(id__in=duplicate_ids).delete()
+
+    Ingredient.objects.bulk_update(
+        survivors.values(), ["normalized_name"], batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+    """Runs on its own so the repointed recipe lines are committed before
+    0010 alters the table; PostgreSQL refuses to ALTER a table with pending
+    foreign key trigger events in the same transaction."""
+
+    dependencies = [
+        ("api", "0008_ingredient_normalized_name"),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_ingredients, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0009_merge_duplicate_ingredients"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="ingredient",
+            name="normalized_name",
+            field=models.CharField(editable=False, max_length=200, unique=True),
+        ),
+    ]
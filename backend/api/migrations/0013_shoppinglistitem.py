@@ -0,0 +1,116 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:44
+
+from collections import defaultdict
+from decimal import Decimal
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# api.units.UNIT_BASES as of this migration, frozen so later changes to it
+# do not change what this migration computes
+UNIT_BASES = {
+    "g": ("g", Decimal("1")),
+    "kg": ("g", Decimal("1000")),
+    "oz": ("g", Decimal("28.349523125")),
+    "lb": ("g", Decimal("453.59237")),
+    "ml": ("ml", Decimal("1")),
+    "l": ("ml", Decimal("1000")),
+    "tsp": ("ml", Decimal("4.92892159375")),
+    "tbsp": ("ml", Decimal("14.78676478125")),
+    "cup": ("ml", Decimal("236.5882365")),
+}
+
+
+def fill_shopping_lists(apps, schema_editor):
+    """Compute the shopping list of every existing meal plan, rounding each
+    slot's share the way api.shopping_list does."""
+    RecipeIngredient = apps.get_model("api", "RecipeIngredient")
+    ShoppingListItem = apps.get_model("api", "ShoppingListItem")
+
+    totals = defaultdict(Decimal)
+    rows = RecipeIngredient.objects.filter(recipe__mealslot__isnull=False).values_list(
+        "recipe__mealslot__meal_plan_id",
+        "recipe__mealslot__servings",
+        "recipe__servings",
+        "ingredient_id",
+        "unit",
+        "quantity",
+    )
+    for (
+        meal_plan_id,
+        slot_servings,
+        recipe_servings,
+        ingredient_id,
+        unit,
+        quantity,
+    ) in rows.iterator():
+        base, factor = UNIT_BASES.get(unit, (unit, Decimal("1")))
+        amount = quantity * factor
+        if recipe_servings:
+            amount = amount * slot_servings / recipe_servings
+        totals[meal_plan_id, ingredient_id, base] += amount.quantize(
+            Decimal("0.000001")
+        )
+
+    ShoppingListItem.objects.bulk_create(
+        (
+            ShoppingListItem(
+                meal_plan_id=meal_plan_id,
+                ingredient_id=ingredient_id,
+                unit=unit,
+                quantity=amount,
+            )
+            for (meal_plan_id, ingredient_id, unit), amount in totals.items()
+            if amount > 0
+        ),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0012_scrapecacheentry"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ShoppingListItem",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("unit", models.CharField(max_length=50)),
+                ("quantity", models.DecimalField(decimal_places=6, max_digits=20)),
+                (
+                    "ingredient",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE, to="api.ingredient"
+                    ),
+                ),
+                (
+                    "meal_plan",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="shopping_list_items",
+                        to="api.mealplan",
+                    ),
+                ),
+            ],
+            options={
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("meal_plan", "ingredient", "unit"),
+                        name="shoppinglist_plan_item_uniq",
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(fill_shopping_lists, migrations.RunPython.noop),
+    ]
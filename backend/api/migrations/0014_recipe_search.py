@@ -0,0 +1,66 @@
+from django.db import migrations
+
+DOCUMENT_SQL = """
+    SELECT r.id, r.name, COALESCE({names}, '') AS ingredients, r.description, r.instructions
+    FROM api_recipe r
+    LEFT JOIN api_recipeingredient ri ON ri.recipe_id = r.id
+    LEFT JOIN api_ingredient i ON i.id = ri.ingredient_id
+    GROUP BY r.id, r.name, r.description, r.instructions
+"""
+
+
+def create_search_index(apps, schema_editor):
+    """Add the full-text index for the database in use and fill it.
+
+    PostgreSQL gets a tsvector column on api_recipe with a GIN index,
+    SQLite an FTS5 table keyed by recipe id. See api.search.
+    """
+    vendor = schema_editor.connection.vendor
+    if vendor == "postgresql":
+        document = DOCUMENT_SQL.format(names="string_agg(i.name, ' ')")
+        schema_editor.execute(
+            "ALTER TABLE api_recipe ADD COLUMN search_vector tsvector"
+        )
+        schema_editor.execute(
+            "UPDATE api_recipe AS recipe SET search_vector = "
+            "setweight(to_tsvector('english', doc.name), 'A') || "
+            "setweight(to_tsvector('english', doc.ingredients), 'B') || "
+            "setweight(to_tsvector('english', doc.description), 'C') || "
+            "setweight(to_tsvector('english', doc.instructions), 'D') "
+            f"FROM ({document}) AS doc "
+            "WHERE recipe.id = doc.id"
+        )
+        schema_editor.execute(
+            "CREATE INDEX recipe_search_vector_idx ON api_recipe USING gin (search_vector)"
+        )
+    elif vendor == "sqlite":
+        schema_editor.execute(
+            "CREATE VIRTUAL TABLE api_recipe_fts USING fts5("
+            "name, ingredients, description, instructions, tokenize='porter unicode61')"
+        )
+        schema_editor.execute(
+            "INSERT INTO api_recipe_fts (rowid, name, ingredients, description, instructions) "
+            + DOCUMENT_SQL.format(names="group_concat(i.name, ' ')")
+        )
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "postgresql":
+        schema_editor.execute("DROP INDEX IF EXISTS recipe_search_vector_idx")
+        schema_editor.execute(
+            "ALTER TABLE api_recipe DROP COLUMN IF EXISTS search_vector"
+        )
+    elif vendor == "sqlite":
+        schema_editor.execute("DROP TABLE IF EXISTS api_recipe_fts")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0013_shoppinglistitem"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,45 @@
+from django.db import migrations
+
+
+def create_trigram_index(apps, schema_editor):
+    """Add the trigram index on ingredient names for the database in use.
+
+    PostgreSQL gets a pg_trgm GIN index on api_ingredient.normalized_name,
+    SQLite an FTS5 trigram table keyed by ingredient id. See
+    api.ingredient_search.
+    """
+    vendor = schema_editor.connection.vendor
+    if vendor == "postgresql":
+        schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        schema_editor.execute(
+            "CREATE INDEX ingredient_name_trgm_idx ON api_ingredient "
+            "USING gin (normalized_name gin_trgm_ops)"
+        )
+    elif vendor == "sqlite":
+        schema_editor.execute(
+            "CREATE VIRTUAL TABLE api_ingredient_trgm USING fts5("
+            "normalized_name, tokenize='trigram')"
+        )
+        schema_editor.execute(
+            "INSERT INTO api_ingredient_trgm (rowid, normalized_name) "
+            "SELECT id, normalized_name FROM api_ingredient"
+        )
+
+
+def drop_trigram_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "postgresql":
+        schema_editor.execute("DROP INDEX IF EXISTS ingredient_name_trgm_idx")
+    elif vendor == "sqlite":
+        schema_editor.execute("DROP TABLE IF EXISTS api_ingredient_trgm")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0014_recipe_search"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_trigram_index, drop_trigram_index),
+    ]
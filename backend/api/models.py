@@ -1,3 +1,5 @@
+from decimal import ROUND_HALF_UP, Decimal
+
 from django.db import models
 from django.contrib.auth.models import User
 from django.core.validators import MinValueValidator
@@ -16,6 +18,17 @@ class Event(models.Model):
     def __str__(self):
         return f"{self.title} on {self.date} at {self.time}"
 
+    class Meta:
+        ordering = ['date', 'time']
+        indexes = [
+            models.Index(fields=['user', 'date', 'time', 'id'], name='event_user_date_idx'),
+        ]
+
+def normalize_ingredient_name(name):
+    """Canonical form used to match ingredient names: lowercased with
+    surrounding and repeated whitespace collapsed."""
+    return ' '.join(name.lower().split())
+
 class Ingredient(models.Model):
     CATEGORY_CHOICES = [
         ('produce', 'Produce'),
@@ -27,6 +40,7 @@ class Ingredient(models.Model):
     ]
 
     name = models.CharField(max_length=200)
+    normalized_name = models.CharField(max_length=200, unique=True, editable=False)
     description = models.TextField(blank=True)
     category = models.CharField(max_length=50, choices=CATEGORY_CHOICES)
     created_at = models.DateTimeField(auto_now_add=True)
@@ -38,6 +52,7 @@ class Ingredient(models.Model):
 
     def save(self, *args, **kwargs):
         self.clean()
+        self.normalized_name = normalize_ingredient_name(self.name)
         super().save(*args, **kwargs)
 
     def __str__(self):
@@ -78,6 +93,9 @@ class Recipe(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['-created_at', '-id'], name='recipe_created_idx'),
+        ]
 
 class RecipeIngredient(models.Model):
     UNIT_CHOICES = [
@@ -108,9 +126,20 @@ class RecipeIngredient(models.Model):
     class Meta:
         ordering = ['order', 'id']
 
+    @classmethod
+    def stored_quantity(cls, value):
+        """value as the Decimal the quantity column keeps, rounded to its
+        decimal places, so totals built from it match the saved row"""
+        field = cls._meta.get_field('quantity')
+        value = field.to_python(value)
+        if value is None:
+            return None
+        return value.quantize(Decimal(1).scaleb(-field.decimal_places), rounding=ROUND_HALF_UP)
+
     def clean(self):
         if self.unit not in dict(self.UNIT_CHOICES):
             raise ValidationError({'unit': 'Invalid unit choice'})
+        self.quantity = self.stored_quantity(self.quantity)
 
     def save(self, *args, **kwargs):
         self.clean()
@@ -132,6 +161,9 @@ class MealPlan(models.Model):
 
     class Meta:
         ordering = ['-start_date']
+        indexes = [
+            models.Index(fields=['user', '-start_date', '-id'], name='mealplan_user_start_idx'),
+        ]
 
 class MealSlot(models.Model):
     MEAL_TYPE_CHOICES = [
@@ -157,3 +189,68 @@ class MealSlot(models.Model):
     class Meta:
         ordering = ['date', 'meal_type']
         unique_together = ['meal_plan', 'date', 'meal_type']
+        indexes = [
+            models.Index(fields=['date', 'meal_type', 'id'], name='mealslot_date_idx'),
+        ]
+
+class ShoppingListItem(models.Model):
+    """Materialized shopping list total for one ingredient and canonical
+    unit in a meal plan, kept up to date by the signals in api.signals."""
+    meal_plan = models.ForeignKey(MealPlan, on_delete=models.CASCADE, related_name='shopping_list_items')
+    ingredient = models.ForeignKey(Ingredient, on_delete=models.CASCADE)
+    unit = models.CharField(max_length=50)
+    quantity = models.DecimalField(max_digits=20, decimal_places=6)
+
+    def __str__(self):
+        return f"{self.quantity} {self.unit} {self.ingredient_id} for plan {self.meal_plan_id}"
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['meal_plan', 'ingredient', 'unit'], name='shoppinglist_plan_item_uniq'
+            ),
+        ]
+
+class RecipeImportJob(models.Model):
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('succeeded', 'Succeeded'),
+        ('failed', 'Failed'),
+    ]
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='recipe_imports')
+    url = models.URLField(max_length=2000)
+    host = models.CharField(max_length=255)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    started_at = models.DateTimeField(null=True, blank=True)
+    error = models.TextField(blank=True)
+    recipe = models.ForeignKey(Recipe, on_delete=models.SET_NULL, null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Import of {self.url} ({self.status})"
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at'], name='importjob_queue_idx'),
+            models.Index(fields=['status', 'host'], name='importjob_host_idx'),
+            models.Index(fields=['user', '-created_at', '-id'], name='importjob_user_created_idx'),
+        ]
+
+class ScrapeCacheEntry(models.Model):
+    url_hash = models.CharField(max_length=64, unique=True)
+    url = models.TextField()
+    etag = models.CharField(max_length=255, blank=True)
+    last_modified = models.CharField(max_length=255, blank=True)
+    recipe_data = models.JSONField()
+    size = models.PositiveIntegerField(default=0)
+    fetched_at = models.DateTimeField(default=timezone.now, db_index=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return self.url
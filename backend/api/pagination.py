@@ -0,0 +1,77 @@
+from rest_framework.pagination import BasePagination, CursorPagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class ModelOrderingCursorPagination(CursorPagination):
+    """Keyset pagination that follows the model's Meta.ordering.
+
+    The primary key is appended as a tie-breaker in the direction of the
+    leading field so that every row has a stable position. Each model's
+    ordering is backed by a composite index, so fetching a page stays
+    O(page size) however deep the cursor is.
+    """
+    page_size_query_param = 'page_size'
+    max_page_size = 200
+
+    def get_ordering(self, request, queryset, view):
+        ordering = list(queryset.model._meta.ordering) or ['-pk']
+        if not any(field.lstrip('-') in ('pk', 'id') for field in ordering):
+            ordering.append('-id' if ordering[0].startswith('-') else 'id')
+        return tuple(ordering)
+
+
+class RankedPagePagination(BasePagination):
+    """Page number pagination for ranked results, such as search.
+
+    Rank order has no stable key to build a cursor from, so pages are
+    offsets. One extra row is fetched to know whether there is a next page
+    instead of counting every match. The response has the same next,
+    previous and results keys as the cursor pagination.
+    """
+    page_query_param = 'page'
+    page_size_query_param = 'page_size'
+    max_page_size = 200
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self._positive_int(
+            request.query_params.get(self.page_size_query_param), api_settings.PAGE_SIZE, self.max_page_size
+        )
+        self.page = self._positive_int(request.query_params.get(self.page_query_param), 1)
+        offset = (self.page - 1) * self.page_size
+        rows = list(queryset[offset:offset + self.page_size + 1])
+        self.has_next = len(rows) > self.page_size
+        return rows[:self.page_size]
+
+    @staticmethod
+    def _positive_int(value, default, maximum=None):
+        try:
+            value = int(value)
+        except (TypeError, ValueError):
+            return default
+        if value < 1:
+            return default
+        return min(value, maximum) if maximum else value
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.page_query_param, self.page + 1)
+
+    def get_previous_link(self):
+        if self.page == 1:
+            return None
+        url = self.request.build_absolute_uri()
+        if self.page == 2:
+            return remove_query_param(url, self.page_query_param)
+        return replace_query_param(url, self.page_query_param, self.page - 1)
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
@@ -0,0 +1,373 @@
+""""What can I cook" search over an in-memory inverted index.
+
+For every ingredient the index keeps the recipes that need it (required
+lines) and, separately, those that list it as optional. Each recipe gets a
+dense position; a posting list is a sorted array('I') of positions while it
+is sparse and a Python int bitmap once that is smaller (more than one in 32
+recipes use it), the way compressed bitmap indexes choose containers.
+
+A query turns the pantry's postings into bitmaps and adds them with a
+bit-sliced counter, one big-int operation per bit of the count, so the
+work grows with the number of pantry ingredients rather than the number of
+matching recipes. Subtracting from the bit-sliced required counts gives
+the number of missing ingredients of every recipe at once; recipes are
+then taken from the fewest-missing bucket upwards. Optional ingredients
+never count as missing.
+
+The index is per process, built on first use and updated by the signals
+in api.signals after each transaction commits. Once it is MAX_AGE seconds
+old a thread rebuilds it, so changes made by other processes show up;
+queries keep using the old index until the new one is swapped in.
+"""
+import logging
+import threading
+import time
+from array import array
+from bisect import bisect_left, insort
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from django.db import connection, transaction
+
+from .models import RecipeIngredient
+
+logger = logging.getLogger(__name__)
+
+MAX_AGE = 300
+
+# A posting switches from a sorted array (4 bytes per recipe) to a bitmap
+# (1 bit per recipe position) once it holds more than 1/DENSE_RATIO of them
+DENSE_RATIO = 32
+
+
+def positions_to_bitmap(positions: Iterable[int]) -> int:
+    positions = list(positions)
+    if not positions:
+        return 0
+    buffer = bytearray((max(positions) >> 3) + 1)
+    for position in positions:
+        buffer[position >> 3] |= 1 << (position & 7)
+    return int.from_bytes(buffer, 'little')
+
+
+def _bit_positions(bitmap: int, limit: int) -> List[int]:
+    """Up to limit set positions of bitmap, highest (newest recipe) first"""
+    found = []
+    while bitmap and len(found) < limit:
+        position = bitmap.bit_length() - 1
+        found.append(position)
+        bitmap ^= 1 << position
+    return found
+
+
+# What a rebuild replaces
+_STATE = ('_positions', '_recipe_ids', '_lines', '_required', '_optional', '_count_slices', '_live')
+
+
+class PantryIndex:
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._build_lock = threading.Lock()  # held by the one load or rebuild in progress
+        self._changed = None       # updates made during that build, replayed on the new index
+        self.loaded_at = None
+        self._clear()
+
+    def _clear(self):
+        self._positions = {}       # recipe id -> position
+        self._recipe_ids = []      # position -> recipe id, None once deleted
+        self._lines = []           # position -> array of ingredient ids, optional ones negated
+        self._required = {}        # ingredient id -> posting
+        self._optional = {}
+        self._count_slices = []    # bit j of every recipe's required ingredient count
+        self._live = 0
+
+    def clear(self):
+        """Forget everything; the next query rebuilds the index"""
+        with self._lock:
+            self._clear()
+            self.loaded_at = None
+
+    # Building and maintenance
+
+    def load(self, rows: Iterable[Tuple[int, int, bool]]):
+        """Replace the index with (recipe id, ingredient id, optional) rows"""
+        with self._build_lock:
+            self._swap_in(rows)
+
+    def rebuild(self):
+        self.load(self._rows())
+
+    def rebuild_in_background(self):
+        """Rebuild from the database in a thread, unless a build is already
+        running; queries use the current index until it finishes"""
+        if not self._build_lock.acquire(blocking=False):
+            return
+        self._rebuild_thread = threading.Thread(target=self._rebuild_and_release, name='pantry-index', daemon=True)
+        self._rebuild_thread.start()
+
+    def _rebuild_and_release(self):
+        try:
+            self._swap_in(self._rows())
+        except Exception:
+            logger.exception('Rebuilding the pantry index failed')
+        finally:
+            self._build_lock.release()
+            connection.close()
+
+    def _rows(self):
+        return RecipeIngredient.objects.values_list('recipe_id', 'ingredient_id', 'optional').iterator()
+
+    def _swap_in(self, rows: Iterable[Tuple[int, int, bool]]):
+        """Build a new index from rows without the lock, then take the lock
+        only to replay the updates made meanwhile and swap it in"""
+        with self._lock:
+            self._changed = {}
+        try:
+            fresh = PantryIndex()
+            fresh._build(rows)
+            with self._lock:
+                fresh._apply(self._changed)
+                for name in _STATE:
+                    setattr(self, name, getattr(fresh, name))
+                self.loaded_at = time.monotonic()
+        finally:
+            self._changed = None
+
+    def _build(self, rows: Iterable[Tuple[int, int, bool]]):
+        """Fill an empty index from rows"""
+        lines = {}
+        for recipe_id, ingredient_id, optional in rows:
+            lines.setdefault(recipe_id, []).append((ingredient_id, optional))
+        required, optional = {}, {}
+        for recipe_id in sorted(lines):
+            position = self._add_position(recipe_id, lines[recipe_id])
+            for ingredient_id in self._lines[position]:
+                target = required if ingredient_id > 0 else optional
+                target.setdefault(abs(ingredient_id), []).append(position)
+        size = len(self._recipe_ids)
+        for source, target in ((required, self._required), (optional, self._optional)):
+            for ingredient_id, positions in source.items():
+                if len(positions) * DENSE_RATIO > size:
+                    target[ingredient_id] = positions_to_bitmap(positions)
+                else:
+                    target[ingredient_id] = array('I', positions)
+        self._live = (1 << size) - 1
+        counts = [sum(1 for ingredient_id in entry if ingredient_id > 0) for entry in self._lines]
+        self._count_slices = [
+            positions_to_bitmap(position for position, count in enumerate(counts) if count >> bit & 1)
+            for bit in range(max(counts, default=0).bit_length())
+        ]
+
+    def _add_position(self, recipe_id: int, lines: Iterable[Tuple[int, bool]]) -> int:
+        required = {ingredient_id for ingredient_id, optional in lines if not optional}
+        optional = {ingredient_id for ingredient_id, optional in lines if optional} - required
+        position = len(self._recipe_ids)
+        self._positions[recipe_id] = position
+        self._recipe_ids.append(recipe_id)
+        self._lines.append(array('i', sorted(required) + sorted(-ingredient_id for ingredient_id in optional)))
+        return position
+
+    def _toggle_count(self, position: int, old: int, new: int):
+        changed = old ^ new
+        bit = 0
+        while changed:
+            if changed & 1:
+                while len(self._count_slices) <= bit:
+                    self._count_slices.append(0)
+                self._count_slices[bit] ^= 1 << position
+            changed >>= 1
+            bit += 1
+
+    @staticmethod
+    def _posting_add(postings: Dict, ingredient_id: int, position: int):
+        posting = postings.get(ingredient_id)
+        if posting is None:
+            postings[ingredient_id] = array('I', [position])
+        elif isinstance(posting, int):
+            postings[ingredient_id] = posting | 1 << position
+        else:
+            insort(posting, position)
+
+    @staticmethod
+    def _posting_remove(postings: Dict, ingredient_id: int, position: int):
+        posting = postings.get(ingredient_id)
+        if isinstance(posting, int):
+            postings[ingredient_id] = posting & ~(1 << position)
+        elif posting is not None:
+            index = bisect_left(posting, position)
+            if index < len(posting) and posting[index] == position:
+                del posting[index]
+
+    def _drop(self, recipe_id: int):
+        position = self._positions.pop(recipe_id, None)
+        if position is None:
+            return
+        entry = self._lines[position]
+        for ingredient_id in entry:
+            postings = self._required if ingredient_id > 0 else self._optional
+            self._posting_remove(postings, abs(ingredient_id), position)
+        self._toggle_count(position, sum(1 for ingredient_id in entry if ingredient_id > 0), 0)
+        self._recipe_ids[position] = None
+        self._lines[position] = array('i')
+        self._live &= ~(1 << position)
+
+    def update(self, recipe_lines: Dict[int, List[Tuple[int, bool]]]):
+        """Replace the lines of the given recipes; an empty list removes one.
+
+        Changed recipes move to a new position at the end, as if they were
+        the newest.
+        """
+        with self._lock:
+            if self._changed is not None:
+                self._changed.update(recipe_lines)
+            self._apply(recipe_lines)
+
+    def _apply(self, recipe_lines: Dict[int, List[Tuple[int, bool]]]):
+        for recipe_id, lines in recipe_lines.items():
+            self._drop(recipe_id)
+            if not lines:
+                continue
+            position = self._add_position(recipe_id, lines)
+            entry = self._lines[position]
+            for ingredient_id in entry:
+                postings = self._required if ingredient_id > 0 else self._optional
+                self._posting_add(postings, abs(ingredient_id), position)
+            self._toggle_count(position, 0, sum(1 for ingredient_id in entry if ingredient_id > 0))
+            self._live |= 1 << position
+
+    def refresh_recipes(self, recipe_ids: Iterable[int]):
+        """Reload the lines of recipe_ids from the database once the current
+        transaction commits. Nothing to do until the index is first used."""
+        recipe_ids = set(recipe_ids)
+        if self.loaded_at is None or not recipe_ids:
+            return
+
+        def refresh():
+            lines = {recipe_id: [] for recipe_id in recipe_ids}
+            for recipe_id, ingredient_id, optional in RecipeIngredient.objects.filter(
+                recipe_id__in=recipe_ids
+            ).values_list('recipe_id', 'ingredient_id', 'optional'):
+                lines[recipe_id].append((ingredient_id, optional))
+            self.update(lines)
+
+        transaction.on_commit(refresh)
+
+    # Queries
+
+    def _bitmap(self, postings: Dict, ingredient_id: int) -> int:
+        posting = postings.get(ingredient_id, 0)
+        return posting if isinstance(posting, int) else positions_to_bitmap(posting)
+
+    def query(self, pantry: Iterable[int], limit: int = 20,
+              max_missing: Optional[int] = None) -> List[Tuple[int, int, int]]:
+        """(recipe id, missing, matched) for recipes using any pantry
+        ingredient, fewest missing required ingredients first and most
+        recently indexed first within the same count. matched counts the
+        required and optional ingredients found in the pantry."""
+        if self.loaded_at is None:
+            self.rebuild()
+        elif time.monotonic() - self.loaded_at > MAX_AGE:
+            self.rebuild_in_background()
+        with self._lock:
+            pantry = set(pantry)
+            all_bits = self._live
+            candidates = 0
+            hits = []  # bit-sliced count of required pantry ingredients per recipe
+            for ingredient_id in pantry:
+                carry = self._bitmap(self._required, ingredient_id)
+                candidates |= carry | self._bitmap(self._optional, ingredient_id)
+                for bit in range(len(hits)):
+                    if not carry:
+                        break
+                    hits[bit], carry = hits[bit] ^ carry, hits[bit] & carry
+                if carry:
+                    hits.append(carry)
+            candidates &= all_bits
+            if not candidates:
+                return []
+
+            # missing = required count - hits, with a ripple borrow
+            counts = self._count_slices
+            width = max(len(counts), len(hits))
+            missing, borrow = [], 0
+            for bit in range(width):
+                count = counts[bit] if bit < len(counts) else 0
+                hit = hits[bit] if bit < len(hits) else 0
+                missing.append(count ^ hit ^ borrow)
+                borrow = (~count & (hit | borrow) | hit & borrow) & all_bits
+
+            results = []
+            highest = (1 << width) - 1 if max_missing is None else min(max_missing, (1 << width) - 1)
+            for missing_count in range(highest + 1):
+                bucket = candidates
+                for bit, plane in enumerate(missing):
+                    bucket &= plane if missing_count >> bit & 1 else ~plane
+                    if not bucket:
+                        break
+                for position in _bit_positions(bucket, limit - len(results)):
+                    entry = self._lines[position]
+                    matched = sum(1 for ingredient_id in entry if abs(ingredient_id) in pantry)
+                    results.append((self._recipe_ids[position], missing_count, matched))
+                candidates &= ~bucket
+                if len(results) >= limit or not candidates:
+                    break
+            return results
+
+
+pantry_index = PantryIndex()
+
+
+def cookable_recipes(pantry: Iterable[int], limit: int = 20, max_missing: Optional[int] = None) -> List[Dict]:
+    """Recipes that can be made from the pantry ingredient ids, fewest
+    missing ingredients first.
+
+    The index picks the recipes; their current lines are then read in one
+    query so the counts and missing ingredient names shown are exact even
+    if this process's index lags behind another's writes. Recipes whose
+    exact count exceeds max_missing are dropped, so the index is asked for
+    twice as many as needed, and for twice as many again while the page is
+    still short and the index has more.
+    """
+    pantry = set(pantry)
+    results, seen = [], set()
+    wanted = limit * 2
+    while True:
+        ranked = [recipe_id for recipe_id, _, _ in pantry_index.query(pantry, wanted, max_missing)]
+        results.extend(_current_counts(pantry, [recipe_id for recipe_id in ranked if recipe_id not in seen],
+                                       max_missing))
+        seen.update(ranked)
+        if len(results) >= limit or len(ranked) < wanted:
+            break
+        wanted *= 2
+    results.sort(key=lambda result: result['missing'])
+    return results[:limit]
+
+
+def _current_counts(pantry: set, ranked: List[int], max_missing: Optional[int]) -> List[Dict]:
+    """Results for the ranked recipe ids from their lines in the database"""
+    recipes = {recipe_id: {'recipe': recipe_id, 'name': None, 'required': {}, 'used': set()} for recipe_id in ranked}
+    for recipe_id, recipe_name, ingredient_id, ingredient_name, optional in RecipeIngredient.objects.filter(
+        recipe_id__in=ranked
+    ).values_list('recipe_id', 'recipe__name', 'ingredient_id', 'ingredient__name', 'optional'):
+        recipe = recipes[recipe_id]
+        recipe['name'] = recipe_name
+        if ingredient_id in pantry:
+            recipe['used'].add(ingredient_id)
+        elif not optional:
+            recipe['required'][ingredient_id] = ingredient_name
+
+    results = []
+    for recipe_id in ranked:
+        recipe = recipes[recipe_id]
+        if recipe['name'] is None:
+            continue  # deleted since the index was updated
+        missing = [{'id': ingredient_id, 'name': name} for ingredient_id, name in recipe['required'].items()]
+        if max_missing is not None and len(missing) > max_missing:
+            continue
+        results.append({
+            'recipe': recipe_id,
+            'name': recipe['name'],
+            'missing': len(missing),
+            'matched': len(recipe['used']),
+            'missing_ingredients': missing,
+        })
+    return results
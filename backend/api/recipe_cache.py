@@ -0,0 +1,74 @@
+"""Cache of serialized recipe representations.
+
+Each entry holds one recipe's serializer output together with the recipe's
+updated_at and is only used while the row still has that updated_at, so
+an entry written from a read that raced with an edit is never served.
+Lists are assembled from these per-recipe fragments: an edit costs one
+recipe's entry, not every cached list page.
+
+The signals in api.signals also drop the entries of recipes whose row,
+lines or ingredients changed, so stale entries do not linger until they
+expire.
+"""
+from typing import Callable, Dict, Iterable, List, Sequence
+
+from django.conf import settings
+from django.core.cache import caches
+
+DEFAULTS = {
+    'ALIAS': 'default',     # entry of CACHES to use
+    'TIMEOUT': 60 * 60,     # seconds an entry is kept
+}
+
+# Serializer variants seen by this process, so invalidation can find their keys
+_variants = {'RecipeSerializer'}
+
+
+def get_setting(name):
+    return getattr(settings, 'RECIPE_CACHE', {}).get(name, DEFAULTS[name])
+
+
+def _cache():
+    return caches[get_setting('ALIAS')]
+
+
+def cache_key(variant: str, recipe_id: int) -> str:
+    return f'recipe:{variant}:{recipe_id}'
+
+
+def serialize_recipes(recipes: Sequence[Dict], serialize: Callable[[List[Dict]], List],
+                      variant: str = 'RecipeSerializer') -> List:
+    """Serialized recipes, in order, from the cache where possible.
+
+    recipes are values() rows with pk and updated_at. serialize is called
+    once with the rows that missed, and must return their representations
+    in the same order. variant names the serializer so different
+    representations of a recipe are cached apart.
+    """
+    _variants.add(variant)
+    cache = _cache()
+    keys = {recipe['pk']: cache_key(variant, recipe['pk']) for recipe in recipes}
+    cached = cache.get_many(keys.values())
+
+    found, misses = {}, []
+    for recipe in recipes:
+        entry = cached.get(keys[recipe['pk']])
+        if entry is not None and entry[0] == recipe['updated_at']:
+            found[recipe['pk']] = entry[1]
+        else:
+            misses.append(recipe)
+    if misses:
+        fresh = serialize(misses)
+        entries = {}
+        for recipe, data in zip(misses, fresh):
+            found[recipe['pk']] = data
+            entries[keys[recipe['pk']]] = (recipe['updated_at'], data)
+        cache.set_many(entries, get_setting('TIMEOUT'))
+    return [found[recipe['pk']] for recipe in recipes]
+
+
+def invalidate(recipe_ids: Iterable[int]):
+    """Drop every cached representation of recipe_ids"""
+    keys = [cache_key(variant, recipe_id) for recipe_id in set(recipe_ids) for variant in _variants]
+    if keys:
+        _cache().delete_many(keys)
@@ -0,0 +1,38 @@
+"""Keeps what is derived from a recipe's ingredient lines in step with them.
+
+The plans' shopping lists, the search index, the pantry index, the cached
+recipe representation and the recipe's updated_at all follow its lines.
+The RecipeIngredient signals in api.signals and the bulk writes of
+services.sync_recipe_ingredients both report their changes through
+lines_changed, so that list is kept in one place.
+"""
+from typing import Iterable, Optional, Tuple
+
+from . import recipe_cache, search, shopping_list
+from .conditional import touch_recipes
+from .pantry import pantry_index
+
+# (ingredient id, unit, quantity) as stored on RecipeIngredient
+Line = Tuple[int, str, object]
+
+
+def lines_changed(recipe_id: int, removed: Iterable[Line] = (), added: Iterable[Line] = (),
+                  moved_from: Optional[int] = None, raw: bool = False):
+    """Update everything derived from recipe_id's lines after some changed.
+
+    removed holds the changed lines as they were and added as they are now;
+    a line moved from another recipe lists that recipe as moved_from, and
+    its removed lines are taken from that recipe's plans. With raw (fixture
+    loading) shopping lists and updated_at are left alone, as
+    rebuild_shopping_lists is run afterwards.
+    """
+    recipe_ids = [recipe_id] + ([moved_from] if moved_from is not None else [])
+    if not raw:
+        if moved_from is not None:
+            shopping_list.recipe_changed(moved_from, removed=removed)
+            removed = ()
+        shopping_list.recipe_changed(recipe_id, removed=removed, added=added)
+        touch_recipes(recipe_ids)
+    search.index_recipes(recipe_ids)
+    pantry_index.refresh_recipes(recipe_ids)
+    recipe_cache.invalidate(recipe_ids)
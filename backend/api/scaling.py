@@ -0,0 +1,109 @@
+"""Scaling recipes to a number of servings.
+
+Quantities are scaled exactly (as Fractions of the stored Decimals) and then
+rounded to amounts a cook can measure: cups to the usual measuring cup
+sizes, spoons to the usual spoon sizes, counted items to halves. Metric
+units keep two decimal places like RecipeIngredient.quantity.
+"""
+from decimal import ROUND_HALF_UP, Decimal
+from fractions import Fraction
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .models import Recipe, RecipeIngredient
+from .units import to_decimal
+
+MAX_SERVINGS = 1000
+MAX_BATCH_SIZE = 200
+
+# Fractional parts each unit is rounded to; units not listed keep 2 decimals
+KITCHEN_FRACTIONS = {
+    'cup': (Fraction(1, 4), Fraction(1, 3), Fraction(1, 2), Fraction(2, 3), Fraction(3, 4)),
+    'tbsp': (Fraction(1, 2),),
+    'tsp': (Fraction(1, 8), Fraction(1, 4), Fraction(1, 2), Fraction(3, 4)),
+    'oz': (Fraction(1, 4), Fraction(1, 2), Fraction(3, 4)),
+    'lb': (Fraction(1, 4), Fraction(1, 2), Fraction(3, 4)),
+    'whole': (Fraction(1, 2),),
+    'piece': (Fraction(1, 2),),
+    'slice': (Fraction(1, 2),),
+    'pkg': (Fraction(1, 2),),
+    'pinch': (),
+}
+
+TWO_PLACES = Decimal('0.01')
+
+
+def round_to_kitchen_fraction(amount: Fraction, unit: str) -> Fraction:
+    """Nearest amount of unit that can be measured, never rounding a
+    positive amount down to nothing."""
+    fractions = KITCHEN_FRACTIONS.get(unit)
+    if fractions is None:
+        rounded = Fraction(to_decimal(amount).quantize(TWO_PLACES, rounding=ROUND_HALF_UP))
+        return rounded or (Fraction(1, 100) if amount > 0 else rounded)
+    whole = amount.numerator // amount.denominator
+    candidates = (0, *fractions, 1)
+    part = min(candidates, key=lambda candidate: (abs(amount - whole - candidate), -candidate))
+    rounded = whole + part
+    if not rounded and amount > 0:
+        rounded = fractions[0] if fractions else Fraction(1)
+    return Fraction(rounded)
+
+
+def format_kitchen_amount(amount: Fraction) -> str:
+    """"1 1/3", "3/4" or "2"; amounts that are no simple fraction are
+    written as decimals."""
+    if amount.denominator == 1:
+        return str(amount.numerator)
+    if amount.denominator > 8:
+        return str(to_decimal(amount).quantize(TWO_PLACES).normalize())
+    whole, part = divmod(amount, 1)
+    if not whole:
+        return f'{part.numerator}/{part.denominator}'
+    return f'{whole} {part.numerator}/{part.denominator}'
+
+
+def scale_lines(lines: Iterable[RecipeIngredient], base_servings: Optional[int], servings: int) -> List[Dict]:
+    """Scale a recipe's lines from base_servings to servings. Recipes without
+    servings are returned as written."""
+    factor = Fraction(servings, base_servings) if base_servings else Fraction(1)
+    scaled = []
+    for line in lines:
+        amount = round_to_kitchen_fraction(Fraction(to_decimal(line.quantity)) * factor, line.unit)
+        scaled.append({
+            'id': line.id,
+            'ingredient': line.ingredient,
+            'quantity': to_decimal(amount).quantize(TWO_PLACES, rounding=ROUND_HALF_UP),
+            'display': format_kitchen_amount(amount),
+            'unit': line.unit,
+            'optional': line.optional,
+            'notes': line.notes,
+        })
+    return scaled
+
+
+def scale_recipes(requests: List[Tuple[int, int]]) -> List[Dict]:
+    """Scaled ingredient lists for (recipe id, servings) pairs, in order.
+
+    The recipes and all of their lines are loaded with one query each no
+    matter how many pairs are given. Raises Recipe.DoesNotExist naming the
+    ids that were not found.
+    """
+    recipe_ids = {recipe_id for recipe_id, _ in requests}
+    recipes = {recipe.id: recipe for recipe in Recipe.objects.filter(id__in=recipe_ids).only('id', 'name', 'servings')}
+    missing = sorted(recipe_ids - recipes.keys())
+    if missing:
+        raise Recipe.DoesNotExist(f'Recipe not found: {", ".join(map(str, missing))}')
+
+    lines = {recipe_id: [] for recipe_id in recipes}
+    for line in RecipeIngredient.objects.filter(recipe_id__in=recipes).select_related('ingredient'):
+        lines[line.recipe_id].append(line)
+
+    return [
+        {
+            'recipe': recipe_id,
+            'name': recipes[recipe_id].name,
+            'base_servings': recipes[recipe_id].servings,
+            'servings': servings,
+            'ingredients': scale_lines(lines[recipe_id], recipes[recipe_id].servings, servings),
+        }
+        for recipe_id, servings in requests
+    ]
@@ -0,0 +1,116 @@
+"""Full-text recipe search.
+
+On PostgreSQL each recipe has a search_vector tsvector column with a GIN
+index (added by migration 0012, not declared on the model so other
+databases can load Recipe rows). The recipe name weighs most, then its
+ingredient names, description and instructions. Results are ranked with
+ts_rank.
+
+On SQLite the same columns are indexed in the api_recipe_fts FTS5 table,
+keyed by recipe id and ranked with bm25, so the tests can run without
+Postgres. Other databases fall back to substring matching.
+
+The index is kept current by the signals in api.signals and by
+sync_recipe_ingredients, which calls index_recipes after its bulk writes.
+"""
+import re
+from typing import Iterable
+
+from django.db import connection
+from django.db.models import BooleanField, FloatField, Q, Value
+from django.db.models.expressions import RawSQL
+
+from .models import Recipe
+
+FTS_TABLE = 'api_recipe_fts'
+SEARCH_CONFIG = 'english'
+TOKEN_PATTERN = re.compile(r'\w+')
+
+# Recipe ids with their weighted text; shared by both backends
+_DOCUMENT_SQL = '''
+    SELECT r.id, r.name, COALESCE({names}, '') AS ingredients, r.description, r.instructions
+    FROM api_recipe r
+    LEFT JOIN api_recipeingredient ri ON ri.recipe_id = r.id
+    LEFT JOIN api_ingredient i ON i.id = ri.ingredient_id
+    WHERE r.id IN ({ids})
+    GROUP BY r.id, r.name, r.description, r.instructions
+'''
+
+_POSTGRES_UPDATE_SQL = '''
+    UPDATE api_recipe AS recipe SET search_vector =
+        setweight(to_tsvector(%s, doc.name), 'A') ||
+        setweight(to_tsvector(%s, doc.ingredients), 'B') ||
+        setweight(to_tsvector(%s, doc.description), 'C') ||
+        setweight(to_tsvector(%s, doc.instructions), 'D')
+    FROM ({document}) AS doc
+    WHERE recipe.id = doc.id
+'''
+
+
+def _vendor():
+    return connection.vendor
+
+
+def index_recipes(recipe_ids: Iterable[int]):
+    """Recompute the search document of each recipe in recipe_ids"""
+    recipe_ids = sorted(set(recipe_ids))
+    if not recipe_ids:
+        return
+    placeholders = ', '.join(['%s'] * len(recipe_ids))
+    with connection.cursor() as cursor:
+        if _vendor() == 'postgresql':
+            document = _DOCUMENT_SQL.format(names="string_agg(i.name, ' ')", ids=placeholders)
+            cursor.execute(_POSTGRES_UPDATE_SQL.format(document=document), [SEARCH_CONFIG] * 4 + recipe_ids)
+        elif _vendor() == 'sqlite':
+            cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid IN ({placeholders})', recipe_ids)
+            document = _DOCUMENT_SQL.format(names="group_concat(i.name, ' ')", ids=placeholders)
+            cursor.execute(
+                f'INSERT INTO {FTS_TABLE} (rowid, name, ingredients, description, instructions) {document}',
+                recipe_ids
+            )
+
+
+def unindex_recipes(recipe_ids: Iterable[int]):
+    """Drop deleted recipes from the SQLite index; Postgres rows take their
+    vector with them."""
+    recipe_ids = list(recipe_ids)
+    if recipe_ids and _vendor() == 'sqlite':
+        placeholders = ', '.join(['%s'] * len(recipe_ids))
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid IN ({placeholders})', recipe_ids)
+
+
+def search_recipes(queryset, query: str):
+    """queryset narrowed to recipes matching query and annotated with a
+    search_rank, higher is better. Words must all match (after stemming)."""
+    tokens = TOKEN_PATTERN.findall(query)
+    if not tokens:
+        return queryset.none()
+    table = Recipe._meta.db_table
+    if _vendor() == 'postgresql':
+        tsquery = f"plainto_tsquery('{SEARCH_CONFIG}', %s)"
+        text = ' '.join(tokens)
+        return queryset.filter(
+            RawSQL(f'{table}.search_vector @@ {tsquery}', (text,), output_field=BooleanField())
+        ).annotate(
+            search_rank=RawSQL(f'ts_rank({table}.search_vector, {tsquery})', (text,), output_field=FloatField())
+        )
+    if _vendor() == 'sqlite':
+        # Quoted tokens so user input is never read as FTS5 query syntax
+        match = ' '.join('"%s"' % token for token in tokens)
+        return queryset.filter(
+            id__in=RawSQL(f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s', (match,))
+        ).annotate(search_rank=RawSQL(
+            f'SELECT -bm25({FTS_TABLE}, 10.0, 5.0, 2.0, 1.0) FROM {FTS_TABLE} '
+            f'WHERE {FTS_TABLE} MATCH %s AND rowid = {table}.id',
+            (match,), output_field=FloatField()
+        ))
+    condition = Q()
+    for token in tokens:
+        condition &= (
+            Q(name__icontains=token) | Q(description__icontains=token) | Q(instructions__icontains=token)
+            | Q(ingredients__name__icontains=token)
+        )
+    return queryset.filter(id__in=Recipe.objects.filter(condition).values('id')).annotate(
+        search_rank=Value(0.0, output_field=FloatField())
+    )
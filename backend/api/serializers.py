@@ -1,7 +1,47 @@
 from rest_framework import serializers
 from django.contrib.auth.models import User
-from .models import Event, Recipe, Ingredient, RecipeIngredient, MealPlan, MealSlot
+from django.db.models import Prefetch
+from .models import Event, Recipe, Ingredient, RecipeIngredient, MealPlan, MealSlot, RecipeImportJob
 from django.contrib.auth.password_validation import validate_password
+from .scaling import MAX_BATCH_SIZE, MAX_SERVINGS
+
+def optimize_queryset(queryset, serializer_class):
+    """Add select_related/prefetch_related for the nested serializers declared
+    on serializer_class so that serializing the queryset costs a constant
+    number of queries."""
+    select, prefetch = _related_lookups(serializer_class())
+    if select:
+        queryset = queryset.select_related(*dict.fromkeys(select))
+    if prefetch:
+        queryset = queryset.prefetch_related(*prefetch)
+    return queryset
+
+def _related_lookups(serializer, prefix=''):
+    """Walk the readable nested serializers and collect the lookups needed to
+    load them: forward relations are joined, to-many relations are prefetched
+    with their own nested relations applied to the inner queryset. Fields
+    with a dotted source, like recipe.name, join the relation they read."""
+    select, prefetch = [], []
+    for field in serializer.fields.values():
+        if field.write_only or field.source == '*':
+            continue
+        if isinstance(field, serializers.ListSerializer) and isinstance(field.child, serializers.ModelSerializer):
+            inner = field.child.Meta.model._default_manager.all()
+            inner_select, inner_prefetch = _related_lookups(field.child)
+            if inner_select:
+                inner = inner.select_related(*dict.fromkeys(inner_select))
+            if inner_prefetch:
+                inner = inner.prefetch_related(*inner_prefetch)
+            prefetch.append(Prefetch(prefix + field.source.replace('.', '__'), queryset=inner))
+        elif isinstance(field, serializers.ModelSerializer):
+            lookup = prefix + field.source.replace('.', '__')
+            select.append(lookup)
+            nested_select, nested_prefetch = _related_lookups(field, prefix=lookup + '__')
+            select.extend(nested_select)
+            prefetch.extend(nested_prefetch)
+        elif '.' in field.source:
+            select.append(prefix + field.source.rsplit('.', 1)[0].replace('.', '__'))
+    return select, prefetch
 
 class EventSerializer(serializers.ModelSerializer):
     class Meta:
@@ -36,6 +76,17 @@ class IngredientSerializer(serializers.ModelSerializer):
         model = Ingredient
         fields = ['id', 'name', 'description', 'category']
 
+class IngredientAutocompleteRequestSerializer(serializers.Serializer):
+    q = serializers.CharField(max_length=200, trim_whitespace=True)
+    limit = serializers.IntegerField(min_value=1, max_value=50, default=10)
+
+class IngredientMatchSerializer(serializers.ModelSerializer):
+    score = serializers.FloatField(source='rank', read_only=True)
+
+    class Meta:
+        model = Ingredient
+        fields = ['id', 'name', 'category', 'score']
+
 class RecipeIngredientSerializer(serializers.ModelSerializer):
     ingredient = IngredientSerializer(read_only=True)
     ingredient_id = serializers.PrimaryKeyRelatedField(
@@ -70,10 +121,97 @@ class MealSlotSerializer(serializers.ModelSerializer):
         fields = ['id', 'meal_plan', 'recipe', 'date', 'meal_type', 'notes', 'servings', 'created_at', 'updated_at']
         read_only_fields = ['created_at', 'updated_at']
 
+class CalendarMealSlotSerializer(MealSlotSerializer):
+    recipe_name = serializers.CharField(source='recipe.name', default=None, read_only=True)
+
+    class Meta(MealSlotSerializer.Meta):
+        fields = MealSlotSerializer.Meta.fields + ['recipe_name']
+
+class MealPlanSlotSerializer(CalendarMealSlotSerializer):
+    """A slot with its recipe's name and times inline, so a plan renders
+    without fetching each recipe"""
+    recipe_prep_time = serializers.IntegerField(source='recipe.prep_time', default=None, read_only=True)
+    recipe_cook_time = serializers.IntegerField(source='recipe.cook_time', default=None, read_only=True)
+
+    class Meta(CalendarMealSlotSerializer.Meta):
+        fields = CalendarMealSlotSerializer.Meta.fields + ['recipe_prep_time', 'recipe_cook_time']
+
 class MealPlanSerializer(serializers.ModelSerializer):
-    meal_slots = MealSlotSerializer(many=True, read_only=True)
+    meal_slots = MealPlanSlotSerializer(many=True, read_only=True)
 
     class Meta:
         model = MealPlan
         fields = ['id', 'user', 'start_date', 'name', 'notes', 'meal_slots', 'created_at', 'updated_at']
         read_only_fields = ['created_at', 'updated_at', 'user']
+
+class ShoppingListItemSerializer(serializers.Serializer):
+    ingredient = serializers.IntegerField()
+    name = serializers.CharField()
+    quantity = serializers.DecimalField(max_digits=14, decimal_places=2)
+    unit = serializers.CharField()
+
+class ShoppingListCategorySerializer(serializers.Serializer):
+    category = serializers.CharField()
+    label = serializers.CharField()
+    items = ShoppingListItemSerializer(many=True)
+
+class ScaledIngredientSerializer(serializers.Serializer):
+    id = serializers.IntegerField()
+    ingredient = IngredientSerializer()
+    quantity = serializers.DecimalField(max_digits=14, decimal_places=2)
+    display = serializers.CharField()
+    unit = serializers.CharField()
+    optional = serializers.BooleanField()
+    notes = serializers.CharField()
+
+class ScaledRecipeSerializer(serializers.Serializer):
+    recipe = serializers.IntegerField()
+    name = serializers.CharField()
+    base_servings = serializers.IntegerField(allow_null=True)
+    servings = serializers.IntegerField()
+    ingredients = ScaledIngredientSerializer(many=True)
+
+class ScaleRequestSerializer(serializers.Serializer):
+    recipe = serializers.IntegerField(required=False)
+    servings = serializers.IntegerField(min_value=1, max_value=MAX_SERVINGS)
+
+class ScaleBatchRequestSerializer(serializers.Serializer):
+    items = serializers.ListField(
+        child=ScaleRequestSerializer(), allow_empty=False, max_length=MAX_BATCH_SIZE
+    )
+
+    def validate_items(self, items):
+        if any('recipe' not in item for item in items):
+            raise serializers.ValidationError('Every item needs a recipe id')
+        return items
+
+class CookableRequestSerializer(serializers.Serializer):
+    ingredients = serializers.CharField(help_text='Comma separated ingredient ids in the pantry')
+    limit = serializers.IntegerField(min_value=1, max_value=100, default=20)
+    max_missing = serializers.IntegerField(min_value=0, required=False)
+
+    def validate_ingredients(self, value):
+        try:
+            ids = {int(part) for part in value.split(',') if part.strip()}
+        except ValueError:
+            raise serializers.ValidationError('Expected comma separated ingredient ids')
+        if not ids:
+            raise serializers.ValidationError('At least one ingredient id is required')
+        return ids
+
+class CookableIngredientSerializer(serializers.Serializer):
+    id = serializers.IntegerField()
+    name = serializers.CharField()
+
+class CookableRecipeSerializer(serializers.Serializer):
+    recipe = serializers.IntegerField()
+    name = serializers.CharField()
+    missing = serializers.IntegerField()
+    matched = serializers.IntegerField()
+    missing_ingredients = CookableIngredientSerializer(many=True)
+
+class RecipeImportJobSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = RecipeImportJob
+        fields = ['id', 'url', 'status', 'attempts', 'next_attempt_at', 'error', 'recipe', 'created_at', 'updated_at']
+        read_only_fields = fields
@@ -1,14 +1,34 @@
-from recipe_scrapers import scrape_html
 import requests
 from fractions import Fraction
 import re
-import logging
+import threading
+import time
+import copy
+import hashlib
+import json
+from collections import OrderedDict
+from datetime import timedelta
 from decimal import Decimal
-from typing import Dict, List, Tuple
-from .models import Recipe, Ingredient, RecipeIngredient
+from functools import lru_cache
+from typing import Dict, List, NamedTuple, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Sum
+from django.utils import timezone
+from .models import Recipe, Ingredient, RecipeIngredient, ScrapeCacheEntry, normalize_ingredient_name
+from .categories import category_classifier
+from .ingredient_search import find_duplicate, index_ingredients
+from .recipe_changes import lines_changed
 from bs4 import BeautifulSoup
+import html as html_lib
 import logging
 
+try:
+    from lxml import etree as lxml_etree, html as lxml_html
+except ImportError:  # lxml is optional, extraction falls back to BeautifulSoup
+    lxml_etree = lxml_html = None
+
 logger = logging.getLogger(__name__)
 
 UNIT_MAPPING = {
@@ -47,37 +67,49 @@ UNIT_MAPPING = {
     'package': 'pkg', 'packages': 'pkg', 'pkg': 'pkg',
 }
 
+INGREDIENT_UNITS = {
+    'cups': 'cup', 'cup': 'cup',
+    'tablespoons': 'tbsp', 'tablespoon': 'tbsp', 'tbsp': 'tbsp', 'tbsps': 'tbsp',
+    'teaspoons': 'tsp', 'teaspoon': 'tsp', 'tsp': 'tsp', 'tsps': 'tsp',
+    'ounces': 'oz', 'ounce': 'oz', 'oz': 'oz',
+    'pounds': 'lb', 'pound': 'lb', 'lb': 'lb',
+    'grams': 'g', 'gram': 'g', 'g': 'g',
+    'kilograms': 'kg', 'kilogram': 'kg', 'kg': 'kg',
+    'milliliters': 'ml', 'milliliter': 'ml', 'ml': 'ml',
+    'liters': 'l', 'liter': 'l', 'l': 'l',
+    'pieces': 'piece', 'piece': 'piece',
+    'pinch': 'pinch', 'pinches': 'pinch',
+    'package': 'pkg', 'packages': 'pkg', 'pkg': 'pkg',
+    'whole': 'whole',
+    'large': 'whole',
+    'medium': 'whole',
+    'small': 'whole'
+}
+
+VULGAR_FRACTIONS = {
+    '½': 1 / 2, '⅓': 1 / 3, '⅔': 2 / 3, '¼': 1 / 4, '¾': 3 / 4,
+    '⅕': 1 / 5, '⅖': 2 / 5, '⅗': 3 / 5, '⅘': 4 / 5, '⅙': 1 / 6, '⅚': 5 / 6,
+    '⅐': 1 / 7, '⅛': 1 / 8, '⅜': 3 / 8, '⅝': 5 / 8, '⅞': 7 / 8, '⅑': 1 / 9, '⅒': 1 / 10,
+}
+
+QUANTITY_AND_UNIT_PATTERN = re.compile(
+    rf"^((\d+(?:/\d+)?|\d+\s+\d+/\d+))\s*({'|'.join(UNIT_MAPPING)})?\s+(.+)$", re.IGNORECASE
+)
+LEADING_NUMBER_PATTERN = re.compile(r'^(\d+)\s+(.+)$')
+
 def extract_quantity_and_unit(text):
     """Extract quantity and unit from ingredient text."""
-    # Common fraction patterns
-    fraction_pattern = r'(\d+(?:/\d+)?|\d+\s+\d+/\d+)'
-    # Unit pattern based on UNIT_MAPPING
-    unit_pattern = '|'.join(UNIT_MAPPING.keys())
-    
-    # Match patterns like "2", "1/2", "2 1/2" followed by optional unit
-    pattern = rf'^({fraction_pattern})\s*({unit_pattern})?\s+(.+)$'
-    match = re.match(pattern, text, re.IGNORECASE)
+    match = QUANTITY_AND_UNIT_PATTERN.match(text)
     
     if not match:
         # If no match, try to find just a number at the start
-        number_match = re.match(r'^(\d+)\s+(.+)$', text)
+        number_match = LEADING_NUMBER_PATTERN.match(text)
         if number_match:
             return float(number_match.group(1)), 'piece', number_match.group(2)
         return 1, 'whole', text
 
-    quantity_str, unit, ingredient = match.groups()
-    
-    # Convert fraction to decimal
-    if '/' in quantity_str:
-        if ' ' in quantity_str:
-            whole, frac = quantity_str.split()
-            num, denom = map(int, frac.split('/'))
-            quantity = float(whole) + num/denom
-        else:
-            num, denom = map(int, quantity_str.split('/'))
-            quantity = num/denom
-    else:
-        quantity = float(quantity_str)
+    quantity_str, _, unit, ingredient = match.groups()
+    quantity = parse_quantity(quantity_str)
 
     # Map unit to standard form
     if unit:
@@ -87,165 +119,682 @@ def extract_quantity_and_unit(text):
 
     return quantity, unit, ingredient.strip()
 
-def parse_ingredient_line(line: str) -> Tuple[str, float, str, str]:
-    """Parse an ingredient line into (ingredient_name, quantity, unit, notes)"""
-    # Extract notes in parentheses
-    notes = []
-    for note in re.finditer(r'\(([^)]+)\)', line):
-        notes.append(note.group(1))
-    if notes:
-        notes = ', '.join(notes)
-        line = re.sub(r'\([^)]*\)', '', line).strip()
+class ParsedIngredient(NamedTuple):
+    """Result of parse_ingredient_line, unpacks as (name, quantity, unit, notes)"""
+    name: str
+    quantity: float
+    unit: str
+    notes: str
+
+def _ingredient_grammar():
+    """INGREDIENT_PATTERN, built from the named pieces below.
+
+    Only plain greedy quantifiers are used so the pattern compiles on every
+    Python Django supports. None of them can give characters back to a
+    following piece that would then match, so the grammar never backtracks
+    into a different parse.
+    """
+    vulgar = ''.join(VULGAR_FRACTIONS)
+    # 2, 1.5, .5
+    number = r'(?:\d+(?:\.\d*)?|\.\d+)'
+    # ½, 1½, 1 ½, 1/2 or a number
+    simple = rf'(?:\d*\s*[{vulgar}]|\d+/\d+|{number})'
+    # The end of a whitespace separated word
+    word_end = r'(?=\s|$)'
+    # A "1/2" style word followed by at least one more word, after which the
+    # amount can only be a mixed number as in "1 1/2 cups"
+    fraction_word_follows = r'\s+[^\s/]*/\S*\s+\S'
+
+    # "1/2 - 1 tbsp flour", "1.5-2 lb beef": the lower bound, the word after
+    # the upper bound and the rest of the line
+    amount_range = (
+        rf'(?=[^-]*-)(?P<range>\d+\s+\d+/\d+|{simple})\s*-(?:\s*[\d\s/]+|\s*{simple})\s*'
+        rf'(?P<range_unit>[^\W{vulgar}]\w*)(?P<range_name>.*)'
+    )
+    # "1 1/2" when another word follows, otherwise a simple amount that is
+    # not the whole part of a mixed number
+    quantity = (
+        rf'{number}\s+\d+/\d+{word_end}(?=\s+\S)'
+        rf'|(?!\S+{fraction_word_follows}){simple}{word_end}'
+    )
+    # Words before the amount that are dropped, as in "about 2 cups". The
+    # lookahead keeps the whitespace from being split, so an amount like
+    # " ½" cannot start inside it.
+    skipped = rf'(?!\.*\d[\d.]*{word_end})[^\s/]+(?!{fraction_word_follows})\s+(?=\S)'
+    # The amount, if any, then the word that may be its unit
+    amount = rf'(?:(?:{skipped})*?(?P<quantity>{quantity})(?:\s+|$))?(?P<unit>[a-z]+{word_end})?'
+
+    return re.compile(rf'\s*(?:{amount_range}|{amount})')
+
+INGREDIENT_PATTERN = _ingredient_grammar()
+NOTES_PATTERN = re.compile(r'\(([^)]+)\)')
+PARENTHESES_PATTERN = re.compile(r'\([^)]*\)')
+
+def parse_quantity(text: str) -> float:
+    """Convert "2", "1.5", "1/2", "2 1/2", "½" or "1½" to a float"""
+    text = text.strip()
+    fraction = VULGAR_FRACTIONS.get(text[-1:])
+    if fraction is not None:
+        whole = text[:-1].strip()
+        return float(whole) + fraction if whole else fraction
+    if '/' in text:
+        parts = text.split()
+        num, denom = map(int, parts[-1].split('/'))
+        if len(parts) == 2:
+            return float(parts[0]) + num/denom
+        return num/denom
+    return float(text)
+
+@lru_cache(maxsize=1024)
+def parse_ingredient_line(line: str) -> ParsedIngredient:
+    """Parse an ingredient line into (name, quantity, unit, notes).
+
+    Notes in parentheses are pulled out, then the rest is matched against
+    INGREDIENT_PATTERN in one pass. Results are immutable tuples of str and
+    float, so the lines that repeat most across recipes ("1 tsp salt") are
+    kept in a small LRU cache.
+    """
+    notes = ''
+    if '(' in line:
+        found = NOTES_PATTERN.findall(line)
+        if found:
+            notes = ', '.join(found)
+            line = PARENTHESES_PATTERN.sub('', line).strip()
+
+    text = line.lower()
+    match = INGREDIENT_PATTERN.match(text)
+    # The only capturing groups: range, range_unit, range_name, quantity, unit
+    lower_bound, range_unit, range_name, amount, word = match.groups()
+    if lower_bound is not None:
+        # Ranges like "1/2 - 1 tbsp" use the lower bound
+        parsed = ParsedIngredient(
+            range_name.strip(),
+            parse_quantity(lower_bound),
+            INGREDIENT_UNITS.get(range_unit, 'whole'),
+            notes
+        )
     else:
-        notes = ''
-
-    # Common units to look for
-    units = {
-        'cups': 'cup', 'cup': 'cup',
-        'tablespoons': 'tbsp', 'tablespoon': 'tbsp', 'tbsp': 'tbsp', 'tbsps': 'tbsp',
-        'teaspoons': 'tsp', 'teaspoon': 'tsp', 'tsp': 'tsp', 'tsps': 'tsp',
-        'ounces': 'oz', 'ounce': 'oz', 'oz': 'oz',
-        'pounds': 'lb', 'pound': 'lb', 'lb': 'lb',
-        'grams': 'g', 'gram': 'g', 'g': 'g',
-        'kilograms': 'kg', 'kilogram': 'kg', 'kg': 'kg',
-        'milliliters': 'ml', 'milliliter': 'ml', 'ml': 'ml',
-        'liters': 'l', 'liter': 'l', 'l': 'l',
-        'pieces': 'piece', 'piece': 'piece',
-        'pinch': 'pinch', 'pinches': 'pinch',
-        'package': 'pkg', 'packages': 'pkg', 'pkg': 'pkg',
-        'whole': 'whole',
-        'large': 'whole',
-        'medium': 'whole',
-        'small': 'whole'
+        unit = INGREDIENT_UNITS.get(word)
+        # A word in the unit position that is not a unit starts the name
+        name_start = match.start('unit') if word and not unit else match.end()
+        parsed = ParsedIngredient(
+            ' '.join(text[name_start:].split()),
+            parse_quantity(amount) if amount is not None else 1.0,
+            unit or 'whole',
+            notes
+        )
+
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(
+            "Parsed ingredient: name='%s', quantity=%s, unit='%s', notes='%s'", *parsed
+        )
+    return parsed
+
+class IngredientIdCache:
+    """Bounded, thread-safe LRU map of normalized ingredient name to id.
+
+    Entries are per process. They are added only after the transaction that
+    read or created the row commits, and dropped by the Ingredient post_save
+    and post_delete signals (see api.signals). Those signals only fire in the
+    process making the change, so an entry may name an ingredient another
+    process has deleted; sync_recipe_ingredients checks the ids it is about
+    to insert and looks stale names up again.
+    """
+
+    def __init__(self, maxsize: int = 4096):
+        self.maxsize = maxsize
+        self._ids = OrderedDict()
+        self._names = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._ids)
+
+    def get_many(self, names) -> Dict[str, int]:
+        found = {}
+        with self._lock:
+            for name in names:
+                ingredient_id = self._ids.get(name)
+                if ingredient_id is not None:
+                    self._ids.move_to_end(name)
+                    found[name] = ingredient_id
+        return found
+
+    def set_many(self, mapping: Dict[str, int]):
+        with self._lock:
+            for name, ingredient_id in mapping.items():
+                self._ids[name] = ingredient_id
+                self._ids.move_to_end(name)
+                self._names[ingredient_id] = name
+            while len(self._ids) > self.maxsize:
+                _, ingredient_id = self._ids.popitem(last=False)
+                self._names.pop(ingredient_id, None)
+
+    def invalidate(self, ingredient_id: int):
+        with self._lock:
+            name = self._names.pop(ingredient_id, None)
+            if name is not None:
+                self._ids.pop(name, None)
+
+    def clear(self):
+        with self._lock:
+            self._ids.clear()
+            self._names.clear()
+
+ingredient_id_cache = IngredientIdCache()
+
+def get_or_create_ingredient(name: str, category: str = 'other') -> Ingredient:
+    """Get an existing ingredient or create a new one"""
+    name = normalize_ingredient_name(name)
+    ingredient, created = Ingredient.objects.get_or_create(
+        normalized_name=name,
+        defaults={'name': name, 'category': category}
+    )
+    if created:
+        logger.debug("Created new ingredient: %s", name)
+    return ingredient
+
+def get_or_create_ingredient_ids(names: List[str], categories: Optional[Dict[str, str]] = None,
+                                 match_similar: bool = False) -> Dict[str, int]:
+    """Resolve many ingredient names to ids at once, creating the missing ones.
+
+    Returns a dict keyed by normalized name. Names already in the in-process
+    cache cost nothing; the rest cost one lookup query, plus one bulk insert
+    and one re-read when some of them are new. With match_similar, a new
+    name that is a near duplicate of an existing ingredient ("onions" for
+    "onion") resolves to it instead, at one trigram lookup per new name.
+    New ingredients take their category from categories, keyed by name,
+    or 'other'.
+    """
+    wanted = {normalize_ingredient_name(name) for name in names}
+    found = ingredient_id_cache.get_many(wanted)
+    missing = wanted - found.keys()
+    if not missing:
+        return found
+
+    fetched = dict(
+        Ingredient.objects.filter(normalized_name__in=missing).values_list('normalized_name', 'id')
+    )
+    new_names = missing - fetched.keys()
+    similar = {}
+    if match_similar:
+        for name in new_names:
+            duplicate = find_duplicate(name)
+            if duplicate is not None:
+                logger.debug("Matched ingredient %s to %s", name, duplicate.normalized_name)
+                similar[name] = duplicate.id
+        new_names -= similar.keys()
+    if new_names:
+        logger.debug("Creating new ingredients: %s", new_names)
+        categories = {normalize_ingredient_name(name): category for name, category in (categories or {}).items()}
+        new_ingredients = [
+            Ingredient(name=name, normalized_name=name, category=categories.get(name, 'other'))
+            for name in new_names
+        ]
+        for ingredient in new_ingredients:
+            ingredient.clean()
+        # ignore_conflicts leaves primary keys unset, so read the rows back
+        Ingredient.objects.bulk_create(new_ingredients, ignore_conflicts=True)
+        created = dict(
+            Ingredient.objects.filter(normalized_name__in=new_names).values_list('normalized_name', 'id')
+        )
+        index_ingredients(created.values())
+        fetched.update(created)
+
+    # Near-duplicate matches are not cached: the cache maps each id to one name
+    transaction.on_commit(lambda: ingredient_id_cache.set_many(fetched))
+    found.update(fetched)
+    found.update(similar)
+    return found
+
+def sync_recipe_ingredients(recipe: Recipe, ingredients_data: List[Dict], match_similar: bool = False):
+    """Sync the recipe's ingredient lines with ingredients_data.
+
+    Must run inside a transaction. Ingredients are resolved in bulk, then
+    existing lines are matched to incoming ones by ingredient so that only
+    the lines that changed are inserted, updated or deleted. Shopping lists
+    of plans using the recipe, its search index entry, the pantry index, its
+    cached representation and its updated_at are updated to match. match_similar is passed on to
+    get_or_create_ingredient_ids, as is the category of each ingredient, used
+    when it has to be created.
+    """
+    logger.debug("Handling ingredients for recipe %s: %s", recipe.id, ingredients_data)
+    ingredients_data = [
+        ing_data for ing_data in ingredients_data
+        if normalize_ingredient_name(ing_data.get('ingredient', {}).get('name', ''))
+    ]
+    # Unknown categories are left out so those ingredients fall back to 'other'
+    valid_categories = dict(Ingredient.CATEGORY_CHOICES)
+    categories = {
+        ing_data['ingredient']['name']: ing_data['ingredient']['category']
+        for ing_data in ingredients_data if ing_data['ingredient'].get('category') in valid_categories
     }
-    
-    # Try to find quantity and unit
-    words = line.lower().split()
-    if not words:
-        return '', 1.0, 'whole', notes
-        
-    quantity = 1.0
-    unit = 'whole'
-    ingredient_start = 0
-    
-    # Handle ranges like "1/2 - 1 Tbsp"
-    range_match = re.match(r'([\d\s/]+)\s*-\s*([\d\s/]+)\s*(\w+)(.*)', line.lower())
-    if range_match:
+    ingredient_ids = get_or_create_ingredient_ids(
+        [ing_data['ingredient']['name'] for ing_data in ingredients_data],
+        categories=categories, match_similar=match_similar
+    )
+
+    # Existing lines per ingredient, in order, so repeated ingredients pair up
+    existing = {}
+    for line in RecipeIngredient.objects.filter(recipe=recipe).order_by('order', 'id'):
+        existing.setdefault(line.ingredient_id, []).append(line)
+
+    # Cached ids may belong to ingredients another process deleted, which
+    # would only fail as a foreign key error at commit. Ids the recipe does
+    # not use yet are checked, and the names of missing ones looked up again.
+    new_ids = set(ingredient_ids.values()) - existing.keys()
+    if new_ids:
+        deleted = new_ids - set(Ingredient.objects.filter(id__in=new_ids).values_list('id', flat=True))
+        if deleted:
+            for ingredient_id in deleted:
+                ingredient_id_cache.invalidate(ingredient_id)
+            stale = [name for name, ingredient_id in ingredient_ids.items() if ingredient_id in deleted]
+            logger.debug("Cached ingredient ids were deleted, looking up again: %s", stale)
+            ingredient_ids.update(get_or_create_ingredient_ids(
+                stale, categories=categories, match_similar=match_similar
+            ))
+
+    to_create, to_update = [], []
+    removed, added = [], []
+    for index, ing_data in enumerate(ingredients_data):
+        ingredient_id = ingredient_ids[normalize_ingredient_name(ing_data['ingredient']['name'])]
+        values = {
+            # Rounded as stored, so the shopping list deltas match the rows
+            'quantity': RecipeIngredient.stored_quantity(ing_data.get('quantity', 0)),
+            'unit': ing_data.get('unit', ''),
+            'notes': ing_data.get('notes', ''),
+            'optional': ing_data.get('optional', False),
+            'order': ing_data.get('order', index),
+        }
+        matches = existing.get(ingredient_id)
+        if matches:
+            line = matches.pop(0)
+            if any(getattr(line, field) != value for field, value in values.items()):
+                if (line.quantity, line.unit) != (values['quantity'], values['unit']):
+                    removed.append((line.ingredient_id, line.unit, line.quantity))
+                    added.append((line.ingredient_id, values['unit'], values['quantity']))
+                for field, value in values.items():
+                    setattr(line, field, value)
+                line.clean()
+                to_update.append(line)
+        else:
+            line = RecipeIngredient(recipe=recipe, ingredient_id=ingredient_id, **values)
+            line.clean()
+            to_create.append(line)
+            added.append((ingredient_id, values['unit'], values['quantity']))
+
+    to_delete = [line.id for lines in existing.values() for line in lines]
+    if to_delete:
+        RecipeIngredient.objects.filter(id__in=to_delete).delete()
+    if to_update:
+        RecipeIngredient.objects.bulk_update(
+            to_update, ['quantity', 'unit', 'notes', 'optional', 'order']
+        )
+    if to_create:
+        RecipeIngredient.objects.bulk_create(to_create)
+    # bulk_update and bulk_create send no signals, deleted lines were handled by post_delete
+    if to_update or to_create:
+        lines_changed(recipe.id, removed=removed, added=added)
+
+_http_session = None
+_http_session_lock = threading.Lock()
+
+def build_http_session(connections_per_host: int = 4, hosts: int = 32) -> requests.Session:
+    """A requests session whose connections are kept alive and pooled.
+
+    Each host gets at most connections_per_host sockets; threads that want
+    more wait for one to be returned (pool_block) instead of opening extra
+    connections. Pools for up to `hosts` hosts are kept open.
+    """
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(
+        pool_connections=hosts,
+        pool_maxsize=connections_per_host,
+        pool_block=True
+    )
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+def get_http_session() -> requests.Session:
+    """The process-wide pooled session used for recipe fetches"""
+    global _http_session
+    if _http_session is None:
+        with _http_session_lock:
+            if _http_session is None:
+                config = getattr(settings, 'RECIPE_IMPORT', {})
+                _http_session = build_http_session(
+                    connections_per_host=config.get('CONNECTIONS_PER_HOST', 4)
+                )
+    return _http_session
+
+SCRAPE_CACHE_DEFAULTS = {
+    'TTL': 24 * 60 * 60,            # seconds a cached page is used without revalidating
+    'MAX_BYTES': 50 * 1024 * 1024,  # total size of cached recipe data
+    'RECOUNT_INTERVAL': 5 * 60,     # seconds between exact counts of that size while under budget
+}
+
+def get_scrape_cache_setting(name):
+    return getattr(settings, 'SCRAPE_CACHE', {}).get(name, SCRAPE_CACHE_DEFAULTS[name])
+
+def normalize_url(url: str) -> str:
+    """Canonical form of url used as the scrape cache key: lowercased scheme
+    and host, default port and fragment dropped, utm_* parameters removed and
+    the remaining query parameters sorted."""
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    netloc = (parts.hostname or '').lower()
+    if parts.port and (scheme, parts.port) not in (('http', 80), ('https', 443)):
+        netloc = f'{netloc}:{parts.port}'
+    query = urlencode(sorted(
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not key.lower().startswith('utm_')
+    ))
+    return urlunsplit((scheme, netloc, parts.path or '/', query, ''))
+
+def scrape_cache_key(url: str) -> str:
+    return hashlib.sha256(normalize_url(url).encode()).hexdigest()
+
+def is_scrape_fresh(entry: ScrapeCacheEntry) -> bool:
+    return entry.fetched_at >= timezone.now() - timedelta(seconds=get_scrape_cache_setting('TTL'))
+
+def get_cached_scrapes(urls) -> Dict[str, ScrapeCacheEntry]:
+    """Cache entries for urls, keyed by scrape_cache_key"""
+    keys = {scrape_cache_key(url) for url in urls}
+    return {entry.url_hash: entry for entry in ScrapeCacheEntry.objects.filter(url_hash__in=keys)}
+
+def record_scrape(url: str, entry, recipe_data, etag: str, last_modified: str) -> Dict:
+    """Store the outcome of fetch_recipe_page and return the recipe data.
+
+    recipe_data is None when the server answered 304 Not Modified, in which
+    case entry is marked fresh again and its stored data is returned.
+    """
+    now = timezone.now()
+    if recipe_data is None:
+        # An update rather than save(), which fails if the entry was evicted meanwhile
+        ScrapeCacheEntry.objects.filter(pk=entry.pk).update(fetched_at=now)
+        entry.fetched_at = now
+        return entry.recipe_data
+
+    size = len(json.dumps(recipe_data))
+    ScrapeCacheEntry.objects.update_or_create(
+        url_hash=scrape_cache_key(url),
+        defaults={
+            'url': normalize_url(url),
+            'etag': etag[:255],
+            'last_modified': last_modified[:255],
+            'recipe_data': recipe_data,
+            'size': size,
+            'fetched_at': now,
+        }
+    )
+    if scrape_cache_size.add(size):
+        evict_scrape_cache()
+    return recipe_data
+
+class ScrapeCacheSize:
+    """This process's estimate of the scrape cache's total size: the last
+    exact count plus every size written since.
+
+    Replaced entries are counted twice, so the estimate errs high and only
+    costs an early recount. Writes by other processes are not seen until the
+    next count, so one is also due every RECOUNT_INTERVAL seconds.
+    """
+
+    def __init__(self):
+        self._total = None
+        self._counted_at = 0.0
+        self._lock = threading.Lock()
+
+    def add(self, size: int) -> bool:
+        """Count a write; True when the cache may be over MAX_BYTES or a
+        recount is due, which evict_scrape_cache then does"""
+        with self._lock:
+            if self._total is None:
+                return True
+            self._total += size
+            return (self._total > get_scrape_cache_setting('MAX_BYTES')
+                    or time.monotonic() - self._counted_at > get_scrape_cache_setting('RECOUNT_INTERVAL'))
+
+    def set(self, total: int):
+        with self._lock:
+            self._total = total
+            self._counted_at = time.monotonic()
+
+    def clear(self):
+        with self._lock:
+            self._total = None
+
+scrape_cache_size = ScrapeCacheSize()
+
+def evict_scrape_cache() -> int:
+    """Delete the least recently fetched entries until the cache fits in MAX_BYTES.
+
+    Takes the exact total with one SUM over the table; record_scrape only
+    calls it when scrape_cache_size says it may be needed.
+    """
+    max_bytes = get_scrape_cache_setting('MAX_BYTES')
+    total = ScrapeCacheEntry.objects.aggregate(total=Sum('size'))['total'] or 0
+    if total <= max_bytes:
+        scrape_cache_size.set(total)
+        return 0
+    excess, freed, doomed = total - max_bytes, 0, []
+    for entry_id, size in ScrapeCacheEntry.objects.order_by('fetched_at', 'id').values_list('id', 'size').iterator():
+        doomed.append(entry_id)
+        freed += size
+        if freed >= excess:
+            break
+    ScrapeCacheEntry.objects.filter(id__in=doomed).delete()
+    scrape_cache_size.set(total - freed)
+    return len(doomed)
+
+def fetch_recipe_page(url: str, timeout: float = 10, session: requests.Session = None,
+                      etag: str = '', last_modified: str = '') -> Tuple[Dict, str, str]:
+    """Conditionally GET url and parse it. Does not touch the database.
+
+    Returns (recipe_data, etag, last_modified). recipe_data is None when the
+    validators passed in still match (304), and the page is not parsed.
+    """
+    headers = {}
+    if etag:
+        headers['If-None-Match'] = etag
+    if last_modified:
+        headers['If-Modified-Since'] = last_modified
+    http = session or requests
+    response = http.get(url, timeout=timeout, headers=headers)
+    if response.status_code == 304 and (etag or last_modified):
+        return None, etag, last_modified
+    response.raise_for_status()
+    etag, last_modified = (response.headers.get(name) for name in ('ETag', 'Last-Modified'))
+    return (
+        parse_recipe_html(response.text),
+        etag if isinstance(etag, str) else '',
+        last_modified if isinstance(last_modified, str) else '',
+    )
+
+JSON_LD_PATTERN = re.compile(
+    r'<script[^>]+type\s*=\s*["\']application/ld\+json["\'][^>]*>(.*?)</script>',
+    re.IGNORECASE | re.DOTALL
+)
+ISO_DURATION_PATTERN = re.compile(r'^P(?:(\d+)D)?(?:T(?:(\d+)H)?(?:(\d+)M)?(?:[\d.]+S)?)?$', re.IGNORECASE)
+
+def _find_json_ld_recipe(node):
+    """Depth-first search of a JSON-LD document for a schema.org Recipe"""
+    if isinstance(node, list):
+        for item in node:
+            found = _find_json_ld_recipe(item)
+            if found is not None:
+                return found
+    elif isinstance(node, dict):
+        types = node.get('@type')
+        if types == 'Recipe' or (isinstance(types, list) and 'Recipe' in types):
+            return node
+        return _find_json_ld_recipe(node.get('@graph'))
+    return None
+
+def _json_ld_steps(node) -> List[str]:
+    """Flatten recipeInstructions (text, HowToStep or HowToSection) into steps"""
+    if isinstance(node, str):
+        return [line.strip() for line in html_lib.unescape(node).splitlines() if line.strip()]
+    if isinstance(node, list):
+        return [step for item in node for step in _json_ld_steps(item)]
+    if isinstance(node, dict):
+        if 'itemListElement' in node:
+            return _json_ld_steps(node['itemListElement'])
+        return _json_ld_steps(node.get('text') or node.get('name') or '')
+    return []
+
+def _iso_duration_minutes(value):
+    match = ISO_DURATION_PATTERN.match(value.strip()) if isinstance(value, str) else None
+    if not match or not any(match.groups()):
+        return None
+    days, hours, minutes = (int(group or 0) for group in match.groups())
+    return days * 24 * 60 + hours * 60 + minutes
+
+def _format_steps(steps) -> str:
+    return '\n'.join(f'{i+1}. {step}' for i, step in enumerate(steps))
+
+def _process_ingredient_lines(lines) -> List[Dict]:
+    """process_ingredient_line for many lines, classifying them in one batch"""
+    parsed_lines = []
+    for line in lines:
         try:
-            # Take the first number from the range
-            first_num = range_match.group(1).strip()
-            if '/' in first_num:
-                if ' ' in first_num:
-                    whole, frac = first_num.split()
-                    num, denom = map(int, frac.split('/'))
-                    quantity = float(whole) + num/denom
-                else:
-                    num, denom = map(int, first_num.split('/'))
-                    quantity = num/denom
-            else:
-                quantity = float(first_num)
-            unit_word = range_match.group(3).strip()
-            if unit_word in units:
-                unit = units[unit_word]
-            ingredient_name = range_match.group(4).strip()
-            return ingredient_name, quantity, unit, notes
-        except ValueError:
-            pass
-    
-    # Look for numeric values at the start
-    for i, word in enumerate(words):
+            parsed_lines.append(parse_ingredient_line(line))
+        except Exception as e:
+            logger.error('Error processing ingredient line %r: %s', line, e)
+    categories = category_classifier.classify([parsed.name for parsed in parsed_lines])
+    return [_ingredient_data(parsed, category) for parsed, category in zip(parsed_lines, categories)]
+
+def extract_json_ld_recipe(html: str):
+    """Build recipe data from schema.org Recipe JSON-LD, without a DOM.
+
+    Returns None when the page has no usable Recipe block.
+    """
+    for match in JSON_LD_PATTERN.finditer(html):
         try:
-            if i + 2 < len(words) and '/' in words[i + 1]:
-                # Handle mixed numbers like "1 1/2"
-                whole = float(word)
-                num, denom = map(int, words[i + 1].split('/'))
-                quantity = whole + num/denom
-                ingredient_start = i + 2
-                break
-            elif '/' in word:
-                # Handle fractions like "1/2"
-                num, denom = map(int, word.split('/'))
-                quantity = num/denom
-                ingredient_start = i + 1
-                break
-            elif word.replace('.', '').isdigit():
-                # Handle simple numbers
-                quantity = float(word)
-                ingredient_start = i + 1
-                break
+            document = json.loads(match.group(1), strict=False)
         except ValueError:
-            break
-            
-    # Look for unit after the number
-    if ingredient_start < len(words):
-        next_word = words[ingredient_start]
-        if next_word in units:
-            unit = units[next_word]
-            ingredient_start += 1
-            
-    # The rest is the ingredient name
-    ingredient_name = ' '.join(words[ingredient_start:]).strip()
-    
-    logger.debug(f"Parsed ingredient: name='{ingredient_name}', quantity={quantity}, unit='{unit}', notes='{notes}'")
-    return ingredient_name, quantity, unit, notes
+            continue
+        node = _find_json_ld_recipe(document)
+        if node is None:
+            continue
+        lines = node.get('recipeIngredient') or node.get('ingredients') or []
+        if isinstance(lines, str):
+            lines = [lines]
+        ingredients = _process_ingredient_lines(
+            html_lib.unescape(line).strip() for line in lines if isinstance(line, str) and line.strip()
+        )
+        steps = _json_ld_steps(node.get('recipeInstructions'))
+        if not ingredients and not steps:
+            continue
 
-def get_or_create_ingredient(name: str, category: str = 'other') -> Ingredient:
-    """Get an existing ingredient or create a new one"""
-    name = name.lower().strip()
+        recipe_data = {
+            'name': html_lib.unescape(str(node.get('name') or '')).strip() or 'Untitled Recipe',
+            'instructions': _format_steps(steps),
+            'ingredients': ingredients
+        }
+        description = node.get('description')
+        if isinstance(description, str) and description.strip():
+            recipe_data['description'] = html_lib.unescape(description).strip()
+        servings = node.get('recipeYield')
+        if isinstance(servings, list):
+            servings = servings[0] if servings else None
+        if servings:
+            recipe_data['servings'] = parse_servings(str(servings))
+        for key, field in (('prepTime', 'prep_time'), ('cookTime', 'cook_time')):
+            minutes = _iso_duration_minutes(node.get(key))
+            if minutes is not None:
+                recipe_data[field] = minutes
+        return recipe_data
+    return None
+
+def _recipe_from_parts(title, ingredient_lines, steps) -> Dict:
+    name = title.strip() if title is not None else 'Untitled Recipe'
+    if '|' in name:
+        name = name.split('|')[0].strip()
+    return {
+        'name': name,
+        'instructions': _format_steps(steps),
+        'ingredients': _process_ingredient_lines(ingredient_lines)
+    }
+
+def extract_html_recipe_fast(html: str):
+    """Targeted extraction with lxml: only the title and the recipe-ingredients
+    and recipe-instructions lists are read. Returns None if lxml is missing or
+    the page cannot be parsed."""
+    if lxml_html is None:
+        return None
     try:
-        return Ingredient.objects.get(name=name)
-    except Ingredient.DoesNotExist:
-        logger.debug(f"Creating new ingredient: {name}")
-        return Ingredient.objects.create(
-            name=name,
-            category=category
+        tree = lxml_html.document_fromstring(html)
+    except (ValueError, lxml_etree.ParserError):
+        return None
+
+    def items(css_class):
+        matches = tree.xpath(
+            '//*[contains(concat(" ", normalize-space(@class), " "), $cls)]', cls=f' {css_class} '
         )
+        return [li.text_content().strip() for li in matches[0].iter('li')] if matches else []
 
-def scrape_recipe(url: str, user=None) -> Dict:
-    """Scrape recipe data from a URL."""
+    titles = tree.xpath('//title')
+    return _recipe_from_parts(
+        titles[0].text_content() if titles else None,
+        items('recipe-ingredients'),
+        items('recipe-instructions')
+    )
+
+def extract_html_recipe(html: str) -> Dict:
+    """Generic extraction from a full BeautifulSoup tree"""
+    soup = BeautifulSoup(html, 'html.parser')
+    title = soup.find('title')
+    ingredients_div = soup.find(class_='recipe-ingredients')
+    instructions_div = soup.find(class_='recipe-instructions')
+    return _recipe_from_parts(
+        title.text if title else None,
+        [item.text.strip() for item in ingredients_div.find_all('li')] if ingredients_div else [],
+        [step.text.strip() for step in instructions_div.find_all('li')] if instructions_div else []
+    )
+
+def parse_recipe_html(html: str) -> Dict:
+    """Extract the recipe name, ingredients and instructions from a page.
+
+    Tries schema.org JSON-LD first, then the targeted lxml pass, and only
+    builds a full BeautifulSoup tree when neither applies.
+    """
+    recipe_data = extract_json_ld_recipe(html)
+    if recipe_data is None:
+        recipe_data = extract_html_recipe_fast(html)
+    if recipe_data is None:
+        recipe_data = extract_html_recipe(html)
+    return recipe_data
+
+def scrape_recipe(url: str, user=None, timeout: float = 10, session: requests.Session = None) -> Dict:
+    """Scrape recipe data from a URL.
+
+    Pages are cached by normalized URL. A fresh cache hit makes no request;
+    a stale one is revalidated with If-None-Match/If-Modified-Since and only
+    re-parsed if the page changed. Pass a session (see get_http_session) to
+    reuse pooled keep-alive connections.
+    """
     try:
-        response = requests.get(url)
-        soup = BeautifulSoup(response.text, 'html.parser')
-        
-        # Extract recipe name from title
-        title = soup.find('title')
-        name = title.text.strip() if title else 'Untitled Recipe'
-        if '|' in name:
-            name = name.split('|')[0].strip()
-        
-        # Find ingredient list (this is a simplified example)
-        ingredient_list = []
-        ingredients_div = soup.find(class_='recipe-ingredients')
-        if ingredients_div:
-            for item in ingredients_div.find_all('li'):
-                try:
-                    ingredient_data = process_ingredient_line(item.text.strip())
-                    ingredient_list.append(ingredient_data)
-                except Exception as e:
-                    logger.error(f'Error processing ingredient: {e}')
-                    continue
-        
-        # Find instructions
-        instructions = ''
-        instructions_div = soup.find(class_='recipe-instructions')
-        if instructions_div:
-            instructions = '\n'.join(
-                f'{i+1}. {step.text.strip()}'
-                for i, step in enumerate(instructions_div.find_all('li'))
+        entry = get_cached_scrapes([url]).get(scrape_cache_key(url))
+        if entry is not None and is_scrape_fresh(entry):
+            recipe_data = entry.recipe_data
+        else:
+            recipe_data, etag, last_modified = fetch_recipe_page(
+                url, timeout=timeout, session=session,
+                etag=entry.etag if entry else '',
+                last_modified=entry.last_modified if entry else ''
             )
-        
-        recipe_data = {
-            'name': name,
-            'instructions': instructions,
-            'ingredients': ingredient_list
-        }
+            recipe_data = record_scrape(url, entry, recipe_data, etag, last_modified)
+
+        recipe_data = copy.deepcopy(recipe_data)
         if user:
             recipe_data['user'] = user.id
-            
+
         return recipe_data
-        
+
     except Exception as e:
-        logger.error(f'Error scraping recipe from {url}: {e}')
+        logger.error('Error scraping recipe from %s: %s', url, e)
         raise
 
 def parse_servings(servings_str: str) -> int:
@@ -259,34 +808,22 @@ def parse_servings(servings_str: str) -> int:
         return int(match.group())
     return 4
 
+def _ingredient_data(parsed: ParsedIngredient, category: str) -> Dict:
+    return {
+        'ingredient': {
+            'name': parsed.name,
+            'category': category
+        },
+        'quantity': parsed.quantity,
+        'unit': parsed.unit,
+        'notes': parsed.notes
+    }
+
 def process_ingredient_line(line):
     """Process a single ingredient line into structured data."""
     try:
-        # Parse the ingredient line
-        ingredient_name, quantity, unit, notes = parse_ingredient_line(line)
-        
-        # Guess ingredient category
-        category = 'other'
-        if any(word in ingredient_name.lower() for word in ['flour', 'sugar', 'oil', 'vinegar', 'sauce']):
-            category = 'pantry'
-        elif any(word in ingredient_name.lower() for word in ['salt', 'pepper', 'spice', 'herb']):
-            category = 'spices'
-        elif any(word in ingredient_name.lower() for word in ['milk', 'cream', 'cheese', 'butter', 'egg']):
-            category = 'dairy'
-        elif any(word in ingredient_name.lower() for word in ['beef', 'chicken', 'pork', 'fish']):
-            category = 'meat'
-        elif any(word in ingredient_name.lower() for word in ['apple', 'banana', 'carrot', 'onion', 'garlic']):
-            category = 'produce'
-
-        return {
-            'ingredient': {
-                'name': ingredient_name,
-                'category': category
-            },
-            'quantity': quantity,
-            'unit': unit,
-            'notes': notes
-        }
+        parsed = parse_ingredient_line(line)
+        return _ingredient_data(parsed, category_classifier.classify_one(parsed.name))
     except Exception as e:
-        logger.error(f'Error processing ingredient line {line!r}: {e}')
+        logger.error('Error processing ingredient line %r: %s', line, e)
         raise
@@ -0,0 +1,234 @@
+"""Materialized shopping lists for meal plans.
+
+Each meal plan keeps one ShoppingListItem per (ingredient, canonical unit)
+holding the total needed by all of its slots. The rows are maintained
+incrementally: the signals in api.signals (and sync_recipe_ingredients for
+its bulk writes) compute the change one slot or recipe line makes and add
+it to the stored totals, so reading a list is a single SELECT.
+
+Every slot's share of a line is rounded to QUANTUM before it is added or
+subtracted, so removing a slot takes back exactly what adding it put in and
+rebuild_shopping_lists can compare the stored totals exactly.
+"""
+from collections import defaultdict
+from decimal import Decimal
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from django.db import transaction
+from django.db.models import F
+
+from .models import Ingredient, MealPlan, MealSlot, Recipe, RecipeIngredient, ShoppingListItem
+from .units import canonical_unit, convert_one
+
+QUANTUM = Decimal('0.000001')
+
+# (meal plan id, ingredient id, canonical unit) -> quantity
+Totals = Dict[Tuple[int, int, str], Decimal]
+# (ingredient id, unit, quantity) as stored on RecipeIngredient
+Line = Tuple[int, str, Decimal]
+
+
+def slot_share(quantity, unit: str, slot_servings: int, recipe_servings: Optional[int]) -> Tuple[str, Decimal]:
+    """Canonical unit and amount of one recipe line needed by a slot.
+
+    The line is converted to its unit's base with api.units.convert, then
+    scaled from the recipe's servings to the slot's; recipes without
+    servings are used as written. Mass and volume stay separate rows: a
+    density depends on the ingredient's name, which can change after the
+    totals are stored.
+    """
+    base = canonical_unit(unit)[0]
+    amount = convert_one(quantity, unit, base)
+    if recipe_servings:
+        amount = amount * slot_servings / recipe_servings
+    return base, amount.quantize(QUANTUM)
+
+
+def _add_slot(totals: Totals, meal_plan_id: int, slot_servings: int, recipe_servings: Optional[int],
+              lines: Iterable[Line], sign: int = 1):
+    for ingredient_id, unit, quantity in lines:
+        base, amount = slot_share(quantity, unit, slot_servings, recipe_servings)
+        totals[meal_plan_id, ingredient_id, base] += sign * amount
+
+
+def recipe_lines(recipe_id: int) -> List[Line]:
+    return list(
+        RecipeIngredient.objects.filter(recipe_id=recipe_id).values_list('ingredient_id', 'unit', 'quantity')
+    )
+
+
+def apply_changes(changes: Totals):
+    """Add changes to the stored totals, creating and deleting rows as needed.
+
+    The affected meal plans are locked first so concurrent changes to the
+    same plan are applied one after the other.
+    """
+    changes = {key: amount for key, amount in changes.items() if amount}
+    if not changes:
+        return
+    meal_plan_ids = {meal_plan_id for meal_plan_id, _, _ in changes}
+    with transaction.atomic():
+        list(MealPlan.objects.select_for_update().filter(id__in=meal_plan_ids).values_list('id'))
+        to_create = []
+        for (meal_plan_id, ingredient_id, unit), amount in changes.items():
+            updated = ShoppingListItem.objects.filter(
+                meal_plan_id=meal_plan_id, ingredient_id=ingredient_id, unit=unit
+            ).update(quantity=F('quantity') + amount)
+            # A missing row for a negative change was already removed with its plan
+            if not updated and amount > 0:
+                to_create.append(ShoppingListItem(
+                    meal_plan_id=meal_plan_id, ingredient_id=ingredient_id, unit=unit, quantity=amount
+                ))
+        if to_create:
+            ShoppingListItem.objects.bulk_create(to_create)
+        # Below half a QUANTUM rather than <= 0: SQLite adds decimals as floats
+        ShoppingListItem.objects.filter(meal_plan_id__in=meal_plan_ids, quantity__lt=QUANTUM / 2).delete()
+
+
+def slot_changed(old: Optional[Tuple[int, Optional[int], int]], new: Optional[Tuple[int, Optional[int], int]]):
+    """Move a slot's contribution from its old (meal plan id, recipe id,
+    servings) to its new one. Either side is None for a created or deleted
+    slot."""
+    if old == new:
+        return
+    slots = [(state, sign) for state, sign in ((old, -1), (new, 1)) if state and state[1]]
+    recipes = {
+        recipe_id: (servings, [])
+        for recipe_id, servings in Recipe.objects.filter(
+            id__in={state[1] for state, _ in slots}
+        ).values_list('id', 'servings')
+    }
+    for recipe_id, ingredient_id, unit, quantity in RecipeIngredient.objects.filter(
+        recipe_id__in=recipes
+    ).values_list('recipe_id', 'ingredient_id', 'unit', 'quantity'):
+        recipes[recipe_id][1].append((ingredient_id, unit, quantity))
+
+    changes = defaultdict(Decimal)
+    for (meal_plan_id, recipe_id, slot_servings), sign in slots:
+        if recipe_id in recipes:
+            recipe_servings, lines = recipes[recipe_id]
+            _add_slot(changes, meal_plan_id, slot_servings, recipe_servings, lines, sign)
+    apply_changes(changes)
+
+
+def _update_recipe_slots(recipe_id: int, removed: List[Line], old_servings: Optional[int],
+                         added: List[Line], new_servings: Optional[int]):
+    changes = defaultdict(Decimal)
+    for meal_plan_id, slot_servings in MealSlot.objects.filter(recipe_id=recipe_id).values_list(
+        'meal_plan_id', 'servings'
+    ):
+        _add_slot(changes, meal_plan_id, slot_servings, old_servings, removed, -1)
+        _add_slot(changes, meal_plan_id, slot_servings, new_servings, added)
+    apply_changes(changes)
+
+
+def recipe_changed(recipe_id: int, removed: Iterable[Line] = (), added: Iterable[Line] = ()):
+    """Update every plan that uses a recipe after some of its lines change.
+
+    removed holds the changed lines as they were, added as they are now.
+    """
+    removed, added = list(removed), list(added)
+    if not removed and not added:
+        return
+    servings = Recipe.objects.filter(id=recipe_id).values_list('servings', flat=True).first()
+    _update_recipe_slots(recipe_id, removed, servings, added, servings)
+
+
+def recipe_servings_changed(recipe_id: int, old_servings: Optional[int], new_servings: Optional[int]):
+    """Rescale every plan that uses a recipe after its servings change"""
+    if old_servings == new_servings:
+        return
+    lines = recipe_lines(recipe_id)
+    if lines:
+        _update_recipe_slots(recipe_id, lines, old_servings, lines, new_servings)
+
+
+def recipe_removed(recipe_id: int):
+    """Take a recipe out of every plan whose slots use it.
+
+    Called before the recipe is deleted, while the slots still point at it;
+    deleting it sets their recipe to NULL without sending signals.
+    """
+    recipe_changed(recipe_id, removed=recipe_lines(recipe_id))
+
+
+def compute_shopping_lists(meal_plan_ids: Optional[Iterable[int]] = None) -> Totals:
+    """Totals recomputed from scratch, for all plans or just meal_plan_ids"""
+    # One filter() call, so the values below reuse its join to MealSlot
+    if meal_plan_ids is None:
+        rows = RecipeIngredient.objects.filter(recipe__mealslot__isnull=False)
+    else:
+        rows = RecipeIngredient.objects.filter(recipe__mealslot__meal_plan_id__in=meal_plan_ids)
+    totals = defaultdict(Decimal)
+    for meal_plan_id, slot_servings, recipe_servings, ingredient_id, unit, quantity in rows.values_list(
+        'recipe__mealslot__meal_plan_id', 'recipe__mealslot__servings', 'recipe__servings',
+        'ingredient_id', 'unit', 'quantity'
+    ).iterator():
+        _add_slot(totals, meal_plan_id, slot_servings, recipe_servings, [(ingredient_id, unit, quantity)])
+    return {key: amount for key, amount in totals.items() if amount > 0}
+
+
+def stored_shopping_lists(meal_plan_ids: Optional[Iterable[int]] = None) -> Totals:
+    rows = ShoppingListItem.objects.all()
+    if meal_plan_ids is not None:
+        rows = rows.filter(meal_plan_id__in=meal_plan_ids)
+    return {
+        (meal_plan_id, ingredient_id, unit): quantity
+        for meal_plan_id, ingredient_id, unit, quantity in rows.values_list(
+            'meal_plan_id', 'ingredient_id', 'unit', 'quantity'
+        ).iterator()
+    }
+
+
+def compare_shopping_lists(expected: Totals, stored: Totals) -> List[Tuple[Tuple[int, int, str], Decimal, Decimal]]:
+    """(key, expected, stored) for every total that differs, missing ones as 0"""
+    return [
+        (key, expected.get(key, Decimal('0')), stored.get(key, Decimal('0')))
+        for key in sorted(expected.keys() | stored.keys())
+        if expected.get(key) != stored.get(key)
+    ]
+
+
+def rebuild_shopping_lists(meal_plan_ids: Optional[Iterable[int]] = None):
+    """Replace the stored totals with freshly computed ones.
+
+    Returns the differences found between the two, see compare_shopping_lists.
+    """
+    if meal_plan_ids is not None:
+        meal_plan_ids = list(meal_plan_ids)
+    with transaction.atomic():
+        expected = compute_shopping_lists(meal_plan_ids)
+        stored = stored_shopping_lists(meal_plan_ids)
+        differences = compare_shopping_lists(expected, stored)
+        if differences:
+            rows = ShoppingListItem.objects.all()
+            if meal_plan_ids is not None:
+                rows = rows.filter(meal_plan_id__in=meal_plan_ids)
+            rows.delete()
+            ShoppingListItem.objects.bulk_create(
+                ShoppingListItem(meal_plan_id=meal_plan_id, ingredient_id=ingredient_id, unit=unit, quantity=amount)
+                for (meal_plan_id, ingredient_id, unit), amount in expected.items()
+            )
+    return differences
+
+
+def build_shopping_list(meal_plan_id: int) -> List[Dict]:
+    """Stored shopping list for a meal plan grouped by ingredient category,
+    in Ingredient.CATEGORY_CHOICES order."""
+    groups = {category: [] for category, _ in Ingredient.CATEGORY_CHOICES}
+    rows = (
+        ShoppingListItem.objects
+        .filter(meal_plan_id=meal_plan_id)
+        .values_list('ingredient_id', 'ingredient__name', 'ingredient__category', 'unit', 'quantity')
+        .order_by('ingredient__name', 'unit')
+    )
+    for ingredient_id, name, category, unit, quantity in rows:
+        groups.setdefault(category, []).append({
+            'ingredient': ingredient_id, 'name': name, 'quantity': quantity, 'unit': unit,
+        })
+
+    labels = dict(Ingredient.CATEGORY_CHOICES)
+    return [
+        {'category': category, 'label': labels.get(category, category), 'items': items}
+        for category, items in groups.items() if items
+    ]
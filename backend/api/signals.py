@@ -0,0 +1,217 @@
+from django.db.models.signals import post_save, post_delete, pre_delete, pre_save
+from django.dispatch import receiver
+from . import ingredient_search, recipe_cache, search, shopping_list
+from .conditional import touch_meal_plans, touch_recipes
+from .pantry import pantry_index
+from .models import Ingredient, MealPlan, MealSlot, Recipe, RecipeIngredient
+from .recipe_changes import lines_changed
+from .services import ingredient_id_cache
+
+
+@receiver([post_save, post_delete], sender=Ingredient)
+def invalidate_ingredient_id_cache(sender, instance, **kwargs):
+    """Drop a changed or deleted ingredient from the name lookup cache"""
+    ingredient_id_cache.invalidate(instance.pk)
+
+
+def _deleted_directly(origin, model):
+    """Whether a delete started from model itself rather than cascading from
+    a parent whose own delete takes care of the shopping lists."""
+    return isinstance(origin, model) or getattr(origin, 'model', None) is model
+
+
+def _slot_state(slot):
+    return (slot.meal_plan_id, slot.recipe_id, int(slot.servings))
+
+
+def _line(line):
+    return (line.ingredient_id, line.unit, line.quantity)
+
+
+# Rows as they were before a save or delete, read once by the pre_* hooks
+# below for every receiver that needs them
+
+@receiver(pre_save, sender=MealSlot)
+def remember_previous_slot(sender, instance, raw=False, **kwargs):
+    instance._previous_slot = None
+    if not raw and not instance._state.adding:
+        instance._previous_slot = MealSlot.objects.filter(pk=instance.pk).values_list(
+            'meal_plan_id', 'recipe_id', 'servings'
+        ).first()
+
+
+def _previous_slot(slot):
+    """(meal plan id, recipe id, servings) of a saved slot before the save"""
+    return getattr(slot, '_previous_slot', None)
+
+
+@receiver(pre_save, sender=RecipeIngredient)
+def remember_previous_line(sender, instance, raw=False, **kwargs):
+    instance._previous_line = None
+    if not raw and not instance._state.adding:
+        instance._previous_line = RecipeIngredient.objects.filter(pk=instance.pk).values_list(
+            'recipe_id', 'ingredient_id', 'unit', 'quantity'
+        ).first()
+
+
+def _previous_line(line):
+    """(recipe id, ingredient id, unit, quantity) of a saved line before the save"""
+    return getattr(line, '_previous_line', None)
+
+
+@receiver(pre_delete, sender=Ingredient)
+def remember_ingredient_recipes(sender, instance, **kwargs):
+    instance._line_recipe_ids = list(
+        RecipeIngredient.objects.filter(ingredient_id=instance.pk).values_list('recipe_id', flat=True)
+    )
+
+
+def _ingredient_recipe_ids(ingredient):
+    """Recipes using the ingredient; for a deleted one, those that used it"""
+    recipe_ids = getattr(ingredient, '_line_recipe_ids', None)
+    if recipe_ids is None:
+        recipe_ids = RecipeIngredient.objects.filter(ingredient_id=ingredient.pk).values_list('recipe_id', flat=True)
+    return recipe_ids
+
+
+@receiver(post_save, sender=MealSlot)
+def update_shopping_list_for_slot(sender, instance, raw=False, **kwargs):
+    """Move the slot's ingredients from its old plan/recipe/servings to the new ones"""
+    if raw:
+        return
+    shopping_list.slot_changed(_previous_slot(instance), _slot_state(instance))
+
+
+@receiver(post_delete, sender=MealSlot)
+def remove_slot_from_shopping_list(sender, instance, origin=None, **kwargs):
+    if _deleted_directly(origin, MealSlot):
+        shopping_list.slot_changed(_slot_state(instance), None)
+
+
+@receiver(post_save, sender=RecipeIngredient)
+def line_saved(sender, instance, raw=False, **kwargs):
+    """Swap the line's old amount for its new one, in the recipe it moved
+    from too, and refresh what else follows the recipe's lines"""
+    old = _previous_line(instance)
+    changed = old != (instance.recipe_id, *_line(instance))
+    lines_changed(
+        instance.recipe_id,
+        removed=[old[1:]] if old and changed else [],
+        added=[_line(instance)] if changed else [],
+        moved_from=old[0] if old and old[0] != instance.recipe_id else None,
+        raw=raw
+    )
+
+
+@receiver(post_delete, sender=RecipeIngredient)
+def line_deleted(sender, instance, origin=None, **kwargs):
+    if _deleted_directly(origin, Recipe):
+        # The recipe's own receivers take care of everything but the pantry
+        pantry_index.refresh_recipes([instance.recipe_id])
+        return
+    # Lines deleted with their ingredient leave the shopping lists with it
+    lines_changed(
+        instance.recipe_id, removed=[_line(instance)] if _deleted_directly(origin, RecipeIngredient) else []
+    )
+
+
+@receiver(pre_save, sender=Recipe)
+def remember_recipe_servings(sender, instance, raw=False, update_fields=None, **kwargs):
+    instance._shopping_list_servings = instance.servings
+    if not raw and not instance._state.adding and (update_fields is None or 'servings' in update_fields):
+        instance._shopping_list_servings = Recipe.objects.filter(pk=instance.pk).values_list(
+            'servings', flat=True
+        ).first()
+
+
+@receiver(post_save, sender=Recipe)
+def rescale_shopping_lists(sender, instance, raw=False, **kwargs):
+    if not raw:
+        shopping_list.recipe_servings_changed(
+            instance.pk, getattr(instance, '_shopping_list_servings', instance.servings), instance.servings
+        )
+
+
+@receiver(pre_delete, sender=Recipe)
+def remove_recipe_from_shopping_lists(sender, instance, **kwargs):
+    """Deleting a recipe sets its slots' recipe to NULL without signals, so
+    its ingredients are taken out of the plans beforehand."""
+    shopping_list.recipe_removed(instance.pk)
+
+
+@receiver(post_save, sender=Recipe)
+def index_recipe(sender, instance, **kwargs):
+    search.index_recipes([instance.pk])
+
+
+@receiver(post_delete, sender=Recipe)
+def unindex_recipe(sender, instance, **kwargs):
+    search.unindex_recipes([instance.pk])
+
+
+@receiver(post_save, sender=Ingredient)
+@receiver(post_delete, sender=Ingredient)
+def index_ingredient_recipes(sender, instance, created=False, **kwargs):
+    """Reindex the recipes using a renamed or deleted ingredient"""
+    if not created:
+        search.index_recipes(_ingredient_recipe_ids(instance))
+
+
+@receiver(post_save, sender=Ingredient)
+def index_ingredient_name(sender, instance, **kwargs):
+    ingredient_search.index_ingredients([instance.pk])
+
+
+@receiver(post_delete, sender=Ingredient)
+def unindex_ingredient_name(sender, instance, **kwargs):
+    ingredient_search.unindex_ingredients([instance.pk])
+
+
+@receiver(post_save, sender=Ingredient)
+def touch_ingredient_recipes(sender, instance, created=False, raw=False, **kwargs):
+    """Recipes show their ingredients' names, so a rename changes them"""
+    if not created and not raw:
+        touch_recipes(_ingredient_recipe_ids(instance))
+
+
+@receiver(post_save, sender=MealSlot)
+def touch_meal_plan_for_slot(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    old = _previous_slot(instance)
+    touch_meal_plans([instance.meal_plan_id] + ([old[0]] if old else []))
+
+
+@receiver(post_delete, sender=MealSlot)
+def touch_meal_plan_without_slot(sender, instance, origin=None, **kwargs):
+    if not _deleted_directly(origin, MealPlan):
+        touch_meal_plans([instance.meal_plan_id])
+
+
+@receiver(pre_delete, sender=Recipe)
+def touch_meal_plans_for_recipe(sender, instance, **kwargs):
+    """Deleting a recipe clears the recipe of its slots without signals"""
+    touch_meal_plans(MealSlot.objects.filter(recipe_id=instance.pk).values_list('meal_plan_id', flat=True))
+
+
+@receiver(post_save, sender=Recipe)
+def touch_meal_plans_for_recipe_change(sender, instance, created=False, raw=False, update_fields=None, **kwargs):
+    """Plans show the name and times of their slots' recipes"""
+    if created or raw:
+        return
+    if update_fields is not None and not {'name', 'prep_time', 'cook_time'} & set(update_fields):
+        return
+    touch_meal_plans(MealSlot.objects.filter(recipe_id=instance.pk).values_list('meal_plan_id', flat=True))
+
+
+@receiver([post_save, post_delete], sender=Recipe)
+def invalidate_cached_recipe(sender, instance, **kwargs):
+    recipe_cache.invalidate([instance.pk])
+
+
+@receiver(post_save, sender=Ingredient)
+@receiver(post_delete, sender=Ingredient)
+def invalidate_cached_ingredient_recipes(sender, instance, created=False, **kwargs):
+    """Recipes show their ingredients, so a renamed or deleted one changes them"""
+    if not created:
+        recipe_cache.invalidate(_ingredient_recipe_ids(instance))
@@ -0,0 +1,55 @@
+import csv
+from pathlib import Path
+from django.test import SimpleTestCase
+from api.categories import CategoryClassifier, category_classifier, classify
+from api.services import process_ingredient_line
+
+LABELLED_NAMES = Path(__file__).resolve().parent / 'ingredient_categories.csv'
+
+class CategoryClassifierTests(SimpleTestCase):
+    def test_labelled_fixture_accuracy(self):
+        """Test that the classifier agrees with the labelled ingredient names"""
+        with LABELLED_NAMES.open() as f:
+            rows = list(csv.DictReader(f))
+        predicted = classify([row['name'] for row in rows])
+        mistakes = [
+            (row['name'], row['category'], category)
+            for row, category in zip(rows, predicted) if category != row['category']
+        ]
+        self.assertGreaterEqual(1 - len(mistakes) / len(rows), 0.95, mistakes)
+
+    def test_whole_words_only(self):
+        """Test that keywords inside other words do not match"""
+        self.assertEqual(
+            classify(['eggplant', 'pepperoni', 'unsalted butter', 'coconut flakes', 'hamburger buns']),
+            ['produce', 'meat', 'dairy', 'other', 'other']
+        )
+
+    def test_rightmost_and_longest_keyword_wins(self):
+        """Test that the head noun and the longest phrase decide the category"""
+        self.assertEqual(
+            classify([
+                'chicken broth', 'salt and pepper', 'red bell pepper', 'garlic cloves, minced',
+                'garlic powder', 'peanut butter', 'cocoa powder', 'Half-and-Half'
+            ]),
+            ['pantry', 'spices', 'produce', 'produce', 'spices', 'pantry', 'pantry', 'dairy']
+        )
+
+    def test_batch_preserves_order(self):
+        """Test that batch results line up with the input, including blanks"""
+        names = ['', 'Tomatoes', 'mystery', 'Cheddar Cheese']
+        self.assertEqual(classify(names), ['other', 'produce', 'other', 'dairy'])
+        self.assertEqual(classify([]), [])
+        self.assertEqual(category_classifier.classify_one('Tomatoes'), 'produce')
+
+    def test_custom_table(self):
+        """Test building a classifier from another keyword table"""
+        classifier = CategoryClassifier({'produce': ['kiwi']}, default='pantry')
+        self.assertEqual(classifier.classify(['kiwis', 'flour']), ['produce', 'pantry'])
+        with self.assertRaises(ValueError):
+            CategoryClassifier({'snacks': ['chips']})
+
+    def test_process_ingredient_line_category(self):
+        """Test that parsed ingredient lines are classified"""
+        data = process_ingredient_line('2 medium eggplants, cubed')
+        self.assertEqual(data['ingredient'], {'name': 'eggplants, cubed', 'category': 'produce'})
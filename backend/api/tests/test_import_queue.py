@@ -0,0 +1,276 @@
+from datetime import timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+from django.test import TestCase, override_settings
+from django.contrib.auth.models import User
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+from api.import_queue import enqueue_import, claim_job, run_job, requeue_stale_jobs, fetch_recipes
+from api.models import RecipeImportJob, Ingredient, Recipe, ScrapeCacheEntry
+from api.services import build_http_session, scrape_recipe
+import json
+import requests
+import threading
+import time
+
+SCRAPED_RECIPE = {
+    'name': 'Pizza Dough',
+    'instructions': '1. Mix',
+    'ingredients': [
+        {'ingredient': {'name': 'flour', 'category': 'pantry'}, 'quantity': 3.0, 'unit': 'cup', 'notes': ''},
+        {'ingredient': {'name': 'salt', 'category': 'spices'}, 'quantity': 0.5, 'unit': 'tsp', 'notes': ''},
+    ]
+}
+
+@override_settings(RECIPE_IMPORT={'PER_HOST_LIMIT': 1, 'MAX_ATTEMPTS': 2, 'BACKOFF_SECONDS': 10})
+class RecipeImportQueueTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            password='testpass123'
+        )
+
+    @patch('api.import_queue.scrape_recipe')
+    def test_job_imports_recipe(self, mock_scrape):
+        """Test that a claimed job saves the recipe with its ingredients"""
+        mock_scrape.return_value = dict(SCRAPED_RECIPE)
+        enqueue_import(self.user, 'https://example.com/pizza')
+        job = run_job(claim_job())
+
+        self.assertEqual(job.status, 'succeeded')
+        self.assertEqual(job.attempts, 1)
+        self.assertEqual(job.recipe.user, self.user)
+        self.assertEqual(job.recipe.name, 'Pizza Dough')
+        self.assertEqual(
+            list(job.recipe.recipeingredient_set.values_list('ingredient__name', 'ingredient__category')),
+            [('flour', 'pantry'), ('salt', 'spices')]
+        )
+        self.assertEqual(mock_scrape.call_args.kwargs['timeout'], 10)
+
+    def test_enqueue_rejects_urls_without_http_host(self):
+        """Test that only http(s) URLs with a host are queued"""
+        for url in ('not a url', 'file:///etc/passwd', 'http:///recipe'):
+            with self.assertRaises(ValueError):
+                enqueue_import(self.user, url)
+        self.assertEqual(enqueue_import(self.user, 'http://Example.com:8080/r').host, 'example.com')
+        self.assertEqual(RecipeImportJob.objects.count(), 1)
+
+    def test_claim_respects_per_host_limit(self):
+        """Test that a host with a running job is skipped until it finishes"""
+        first = enqueue_import(self.user, 'https://slow.example.com/a')
+        enqueue_import(self.user, 'https://slow.example.com/b')
+        other = enqueue_import(self.user, 'https://fast.example.com/a')
+
+        self.assertEqual(claim_job().id, first.id)
+        self.assertEqual(claim_job().id, other.id)
+        self.assertIsNone(claim_job())
+
+    def test_claim_recounts_running_jobs_under_host_lock(self):
+        """Test that a job claimed for the same host by another worker after
+        the busy hosts were read, but before the host lock was taken, keeps
+        the host at its limit"""
+        slow = enqueue_import(self.user, 'https://slow.example.com/a')
+        other_worker_job = enqueue_import(self.user, 'https://slow.example.com/b')
+        other = enqueue_import(self.user, 'https://fast.example.com/a')
+
+        def other_worker_claims_first(host):
+            if host == 'slow.example.com':
+                RecipeImportJob.objects.filter(id=other_worker_job.id).update(status='running')
+            return True
+
+        with patch('api.import_queue._lock_host', side_effect=other_worker_claims_first) as lock_host:
+            self.assertEqual(claim_job().id, other.id)
+        self.assertEqual([call.args[0] for call in lock_host.call_args_list], ['slow.example.com', 'fast.example.com'])
+        self.assertEqual(RecipeImportJob.objects.get(id=slow.id).status, 'pending')
+
+    def test_claim_skips_host_locked_by_another_worker(self):
+        """Test that a host another worker is claiming for is skipped rather than waited on"""
+        slow = enqueue_import(self.user, 'https://slow.example.com/a')
+        other = enqueue_import(self.user, 'https://fast.example.com/a')
+
+        with patch('api.import_queue._lock_host', side_effect=lambda host: host != 'slow.example.com'):
+            self.assertEqual(claim_job().id, other.id)
+        self.assertEqual(claim_job().id, slow.id)
+
+    def test_claim_skips_jobs_not_yet_due(self):
+        """Test that jobs waiting out a backoff are not claimed early"""
+        job = enqueue_import(self.user, 'https://example.com/a')
+        RecipeImportJob.objects.filter(id=job.id).update(next_attempt_at=timezone.now() + timedelta(minutes=1))
+        self.assertIsNone(claim_job())
+
+    @patch('api.import_queue.scrape_recipe')
+    def test_network_errors_retry_with_backoff(self, mock_scrape):
+        """Test that fetch errors are retried with a growing delay and then fail"""
+        mock_scrape.side_effect = requests.Timeout('timed out')
+        enqueue_import(self.user, 'https://example.com/a')
+
+        before = timezone.now()
+        job = run_job(claim_job())
+        self.assertEqual(job.status, 'pending')
+        self.assertGreaterEqual(job.next_attempt_at, before + timedelta(seconds=10))
+        self.assertIn('timed out', job.error)
+
+        RecipeImportJob.objects.filter(id=job.id).update(next_attempt_at=timezone.now())
+        job = run_job(claim_job())
+        self.assertEqual(job.status, 'failed')
+        self.assertEqual(job.attempts, 2)
+
+    @patch('api.import_queue.scrape_recipe')
+    def test_invalid_recipe_fails_without_retry(self, mock_scrape):
+        """Test that a page that does not yield a valid recipe is not retried"""
+        mock_scrape.return_value = {'name': '', 'instructions': '', 'ingredients': []}
+        enqueue_import(self.user, 'https://example.com/a')
+        job = run_job(claim_job())
+        self.assertEqual(job.status, 'failed')
+        self.assertEqual(Ingredient.objects.count(), 0)
+
+    def test_stale_running_jobs_are_requeued(self):
+        """Test that jobs abandoned by a dead worker go back to the queue"""
+        job = enqueue_import(self.user, 'https://example.com/a')
+        claim_job()
+        RecipeImportJob.objects.filter(id=job.id).update(started_at=timezone.now() - timedelta(hours=1))
+        self.assertEqual(requeue_stale_jobs(), 1)
+        self.assertEqual(claim_job().id, job.id)
+
+RECIPE_PAGE = """
+<html>
+    <head><title>Stub Recipe {path} | Stub Kitchen</title></head>
+    <body>
+        <div class="recipe-ingredients">
+            <ul>
+                <li>2 cups flour</li>
+                <li>1 tsp salt</li>
+            </ul>
+        </div>
+        <div class="recipe-instructions">
+            <ol><li>Mix</li><li>Bake</li></ol>
+        </div>
+    </body>
+</html>
+"""
+
+class StubRecipeHandler(BaseHTTPRequestHandler):
+    """Serves a small recipe page after a fixed delay, over keep-alive"""
+    protocol_version = 'HTTP/1.1'
+    delay = 0.05
+
+    def do_GET(self):
+        self.server.client_ports.add(self.client_address[1])
+        time.sleep(self.delay)
+        if self.path.startswith('/missing'):
+            self.send_response(404)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        body = RECIPE_PAGE.format(path=self.path.strip('/')).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+class BatchImportTests(TestCase):
+    URL_COUNT = 24
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = ThreadingHTTPServer(('127.0.0.1', 0), StubRecipeHandler)
+        cls.server.daemon_threads = True
+        cls.server.client_ports = set()
+        cls.server_thread = threading.Thread(target=cls.server.serve_forever, daemon=True)
+        cls.server_thread.start()
+        cls.base_url = f'http://127.0.0.1:{cls.server.server_address[1]}'
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        super().tearDownClass()
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            password='testpass123'
+        )
+        self.server.client_ports.clear()
+        self.urls = [f'{self.base_url}/recipe-{i}' for i in range(self.URL_COUNT)]
+
+    def test_concurrent_fetch_outperforms_serial(self):
+        """Test that pooled concurrent fetching beats one fresh connection per URL in turn"""
+        start = time.perf_counter()
+        for url in self.urls:
+            scrape_recipe(url)
+        serial_time = time.perf_counter() - start
+        serial_connections = len(self.server.client_ports)
+
+        # Measure the network path, not the scrape cache the serial run filled
+        ScrapeCacheEntry.objects.all().delete()
+        self.server.client_ports.clear()
+        session = build_http_session(connections_per_host=8)
+        start = time.perf_counter()
+        results = list(fetch_recipes(self.urls, workers=8, session=session))
+        concurrent_time = time.perf_counter() - start
+
+        self.assertEqual(len(results), self.URL_COUNT)
+        self.assertTrue(all(error is None for _, _, error in results))
+        self.assertEqual(serial_connections, self.URL_COUNT)
+        self.assertGreater(len(self.server.client_ports), 0)
+        self.assertLessEqual(len(self.server.client_ports), 8)
+        self.assertLess(concurrent_time * 3, serial_time)
+
+    def test_connections_per_host_are_capped(self):
+        """Test that more workers than pooled connections do not open extra sockets"""
+        session = build_http_session(connections_per_host=2)
+        results = list(fetch_recipes(self.urls[:8], workers=8, session=session))
+        self.assertEqual(len(results), 8)
+        self.assertLessEqual(len(self.server.client_ports), 2)
+
+    def test_batch_endpoint_streams_results(self):
+        """Test that the batch endpoint saves every recipe and streams one line per URL"""
+        refresh = RefreshToken.for_user(self.user)
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {refresh.access_token}')
+        urls = self.urls[:5] + [f'{self.base_url}/missing']
+
+        response = client.post(reverse('recipe-import-batch'), {'urls': urls}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        results = [json.loads(line) for line in b''.join(response.streaming_content).splitlines()]
+
+        self.assertEqual({r['url'] for r in results}, set(urls))
+        created = [r for r in results if r['status'] == 'created']
+        self.assertEqual(len(created), 5)
+        self.assertEqual(Recipe.objects.filter(user=self.user).count(), 5)
+        failed = [r for r in results if r['status'] == 'failed']
+        self.assertEqual([r['url'] for r in failed], [f'{self.base_url}/missing'])
+        self.assertIn('404', failed[0]['error'])
+        recipe = Recipe.objects.get(id=created[0]['recipe'])
+        self.assertEqual(recipe.recipeingredient_set.count(), 2)
+
+    def test_repeat_batch_is_served_from_cache(self):
+        """Test that importing the same pages again makes no requests"""
+        session = build_http_session(connections_per_host=8)
+        list(fetch_recipes(self.urls[:4], workers=4, session=session))
+        self.server.client_ports.clear()
+        results = list(fetch_recipes(self.urls[:4], workers=4, session=session))
+        self.assertEqual(len(results), 4)
+        self.assertTrue(all(error is None for _, _, error in results))
+        self.assertEqual(self.server.client_ports, set())
+
+    def test_batch_endpoint_validates_urls(self):
+        """Test that the batch endpoint rejects missing or oversized URL lists"""
+        refresh = RefreshToken.for_user(self.user)
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {refresh.access_token}')
+        url = reverse('recipe-import-batch')
+        self.assertEqual(client.post(url, {}, format='json').status_code, 400)
+        self.assertEqual(client.post(url, {'urls': 'http://a.com'}, format='json').status_code, 400)
+        with self.settings(RECIPE_IMPORT={'MAX_BATCH_SIZE': 2}):
+            response = client.post(url, {'urls': self.urls[:3]}, format='json')
+        self.assertEqual(response.status_code, 400)
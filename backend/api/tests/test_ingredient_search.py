@@ -0,0 +1,55 @@
+from django.test import SimpleTestCase, TestCase
+from api.ingredient_search import find_duplicate, match_ingredients, similarity, trigrams, word_similarity
+from api.models import Ingredient
+from api.services import get_or_create_ingredient_ids
+
+class TrigramTests(SimpleTestCase):
+    def test_trigrams_match_pg_trgm(self):
+        """Test that words are padded and split like pg_trgm does"""
+        self.assertEqual(trigrams('Cat'), {'  c', ' ca', 'cat', 'at '})
+        self.assertEqual(trigrams('a-b'), {'  a', ' a ', '  b', ' b '})
+        self.assertEqual(trigrams('  '), set())
+
+    def test_similarities(self):
+        """Test the scores against values pg_trgm gives"""
+        self.assertAlmostEqual(similarity('onion', 'onions'), 5 / 8)
+        self.assertAlmostEqual(word_similarity('word', 'two words'), 0.8)
+        self.assertEqual(word_similarity('onion', 'yellow onion'), 1.0)
+        self.assertEqual(similarity('', 'onion'), 0.0)
+
+class IngredientMatchTests(TestCase):
+    def setUp(self):
+        for name in ('Onion', 'Yellow onion', 'Green onions', 'Olive oil', 'Garlic'):
+            Ingredient.objects.create(name=name, category='produce')
+
+    def names(self, query, limit=10):
+        return [ingredient.normalized_name for ingredient in match_ingredients(query, limit)]
+
+    def test_prefixes_and_words_match(self):
+        """Test that names containing the typed prefix come first, then the shortest"""
+        self.assertEqual(self.names('oni'), ['onion', 'green onions', 'yellow onion'])
+        self.assertEqual(self.names('oni', limit=1), ['onion'])
+        self.assertEqual(self.names('garlik'), ['garlic'])
+        self.assertEqual(self.names('zzz'), [])
+        self.assertEqual(self.names('  '), [])
+
+    def test_index_follows_changes(self):
+        """Test that created, renamed, bulk created and deleted ingredients are reindexed"""
+        garlic = Ingredient.objects.get(normalized_name='garlic')
+        garlic.name = 'Shallot'
+        garlic.save()
+        self.assertEqual(self.names('garlic'), [])
+        self.assertEqual(self.names('shallot'), ['shallot'])
+
+        get_or_create_ingredient_ids(['paprika'])
+        self.assertEqual(self.names('papr'), ['paprika'])
+
+        garlic.delete()
+        self.assertEqual(self.names('shallot'), [])
+
+    def test_find_duplicate(self):
+        """Test that only close spellings count as the same ingredient"""
+        self.assertEqual(find_duplicate('onions').normalized_name, 'onion')
+        self.assertEqual(find_duplicate('olive oils').normalized_name, 'olive oil')
+        self.assertIsNone(find_duplicate('red onion sauce'))
+        self.assertIsNone(find_duplicate('oil'))
@@ -1,9 +1,12 @@
-from django.test import TestCase
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import TestCase, TransactionTestCase
 from django.contrib.auth.models import User
 from django.utils import timezone
 from api.models import Event, Recipe, Ingredient, RecipeIngredient
 from decimal import Decimal
 from django.core.exceptions import ValidationError
+from django.db import IntegrityError
 
 class EventModelTests(TestCase):
     def setUp(self):
@@ -53,6 +56,18 @@ class IngredientModelTests(TestCase):
         """Test the string representation of an ingredient"""
         self.assertEqual(str(self.ingredient), 'Test Ingredient')
 
+    def test_ingredient_normalized_name(self):
+        """Test that saving an ingredient stores its normalized name"""
+        self.assertEqual(self.ingredient.normalized_name, 'test ingredient')
+        self.ingredient.name = '  Yellow   Onion '
+        self.ingredient.save()
+        self.assertEqual(self.ingredient.normalized_name, 'yellow onion')
+
+    def test_ingredient_normalized_name_unique(self):
+        """Test that names differing only in case or spacing are rejected"""
+        with self.assertRaises(IntegrityError):
+            Ingredient.objects.create(name='test  INGREDIENT', category='other')
+
     def test_ingredient_category_choices(self):
         """Test that invalid category choices are rejected"""
         with self.assertRaises(ValidationError):
@@ -62,6 +77,46 @@ class IngredientModelTests(TestCase):
             )
             ingredient.clean()
 
+class IngredientNormalizationMigrationTests(TransactionTestCase):
+    before = [('api', '0007_cursor_pagination_indexes')]
+    after = [('api', '0010_ingredient_normalized_name_unique')]
+
+    def migrate(self, targets):
+        executor = MigrationExecutor(connection)
+        executor.migrate(targets)
+        return executor.loader.project_state(targets).apps
+
+    def tearDown(self):
+        self.migrate(MigrationExecutor(connection).loader.graph.leaf_nodes())
+
+    def test_duplicates_are_merged(self):
+        """Test that migrating folds ingredients whose names differ only in
+        case and spacing into the oldest, keeping their recipe lines"""
+        apps = self.migrate(self.before)
+        user = apps.get_model('auth', 'User').objects.create(username='testuser')
+        recipe = apps.get_model('api', 'Recipe').objects.create(name='Soup', instructions='Stir', user=user)
+        Ingredient = apps.get_model('api', 'Ingredient')
+        onion = Ingredient.objects.create(name='Onion', category='produce')
+        duplicates = [Ingredient.objects.create(name=name) for name in ('onion', '  ONION ')]
+        garlic = Ingredient.objects.create(name='Garlic')
+        for order, ingredient in enumerate([onion, *duplicates, garlic]):
+            apps.get_model('api', 'RecipeIngredient').objects.create(
+                recipe=recipe, ingredient=ingredient, quantity=1, unit='whole', order=order
+            )
+
+        apps = self.migrate(self.after)
+        Ingredient = apps.get_model('api', 'Ingredient')
+        self.assertEqual(
+            list(Ingredient.objects.order_by('id').values_list('id', 'normalized_name')),
+            [(onion.id, 'onion'), (garlic.id, 'garlic')]
+        )
+        self.assertEqual(
+            list(apps.get_model('api', 'RecipeIngredient').objects.order_by('order').values_list(
+                'ingredient_id', flat=True
+            )),
+            [onion.id, onion.id, onion.id, garlic.id]
+        )
+
 class RecipeModelTests(TestCase):
     def setUp(self):
         self.user = User.objects.create_user(
@@ -0,0 +1,99 @@
+import random
+import threading
+import time
+from io import StringIO
+from unittest.mock import patch
+from django.core.management import call_command
+from django.test import SimpleTestCase
+from api.pantry import MAX_AGE, PantryIndex
+
+def brute_force(recipes, pantry):
+    """(recipe id, missing, matched) for recipes using any pantry ingredient"""
+    results = []
+    for recipe_id, lines in recipes.items():
+        required = {ingredient_id for ingredient_id, optional in lines if not optional}
+        used = {ingredient_id for ingredient_id, _ in lines} & pantry
+        if used:
+            results.append((recipe_id, len(required - pantry), len(used)))
+    return results
+
+class PantryIndexTests(SimpleTestCase):
+    def setUp(self):
+        self.index = PantryIndex()
+        self.index.load([
+            (1, 10, False), (1, 11, False),
+            (2, 10, False), (2, 12, False), (2, 13, True),
+            (3, 11, False), (3, 12, False), (3, 14, False),
+            (4, 13, True),
+        ])
+
+    def test_ranks_by_missing(self):
+        """Test that recipes come fewest missing first and optional lines never count"""
+        self.assertEqual(self.index.query({10, 11}), [(1, 0, 2), (2, 1, 1), (3, 2, 1)])
+        self.assertEqual(self.index.query({10, 12}), [(2, 0, 2), (1, 1, 1), (3, 2, 1)])
+        self.assertEqual(self.index.query({13}), [(4, 0, 1), (2, 2, 1)])
+        self.assertEqual(self.index.query({99}), [])
+
+    def test_limit_and_max_missing(self):
+        """Test that limit and max_missing cut the ranking"""
+        self.assertEqual(self.index.query({10, 12}, limit=2), [(2, 0, 2), (1, 1, 1)])
+        self.assertEqual(self.index.query({10, 12}, max_missing=1), [(2, 0, 2), (1, 1, 1)])
+
+    def test_update(self):
+        """Test that replacing and removing recipes is reflected"""
+        self.index.update({1: [(10, False)], 3: [], 5: [(12, False), (14, True)]})
+        self.assertEqual(self.index.query({10, 12}), [(5, 0, 1), (1, 0, 1), (2, 0, 2)])
+        self.index.update({2: [(10, False), (15, False)]})
+        self.assertEqual(self.index.query({10}), [(1, 0, 1), (2, 1, 1)])
+
+    def test_stale_index_is_rebuilt_in_background(self):
+        """Test that queries keep using the old index while a stale one is
+        rebuilt, and that updates made during the rebuild are kept"""
+        started, release = threading.Event(), threading.Event()
+
+        def rows():
+            started.set()
+            release.wait(5)
+            yield from [(1, 10, False), (6, 10, False), (6, 16, False)]
+
+        self.index.loaded_at -= MAX_AGE + 1
+        with patch.object(self.index, '_rows', side_effect=rows):
+            self.assertEqual(self.index.query({10, 11}), [(1, 0, 2), (2, 1, 1), (3, 2, 1)])
+            self.assertTrue(started.wait(5))
+            self.index.update({7: [(10, False)]})
+            self.assertEqual(self.index.query({10}, limit=2), [(7, 0, 1), (2, 1, 1)])
+            release.set()
+            self.index._rebuild_thread.join(5)
+
+        self.assertLess(time.monotonic() - self.index.loaded_at, MAX_AGE)
+        self.assertEqual(self.index.query({10}), [(7, 0, 1), (1, 0, 1), (6, 1, 1)])
+
+    def test_matches_brute_force(self):
+        """Test the bit-sliced ranking against counting every recipe"""
+        rng = random.Random(7)
+        recipes = {
+            recipe_id: [
+                (min(int(rng.paretovariate(1.2)), 200), rng.random() < 0.15) for _ in range(rng.randint(1, 12))
+            ]
+            for recipe_id in range(1, 3001)
+        }
+        self.index.load(
+            (recipe_id, ingredient_id, optional)
+            for recipe_id, lines in recipes.items() for ingredient_id, optional in lines
+        )
+        changed = {recipe_id: [(rng.randint(1, 200), False)] for recipe_id in rng.sample(sorted(recipes), 300)}
+        self.index.update(changed)
+        recipes.update(changed)
+        for _ in range(20):
+            pantry = set(rng.sample(range(1, 60), rng.randint(1, 25)))
+            expected = brute_force(recipes, pantry)
+            found = self.index.query(pantry, limit=len(recipes))
+            self.assertEqual(sorted(found), sorted(expected))
+            self.assertEqual([missing for _, missing, _ in found], sorted(missing for _, missing, _ in expected))
+
+    def test_benchmark_command(self):
+        """Test that the benchmark runs; its time budget is for runs by hand
+        at full size, not for the test suite"""
+        out = StringIO()
+        call_command('benchmark_pantry', recipes=2000, queries=5, max_ms=0, stdout=out)
+        self.assertIn('median:', out.getvalue())
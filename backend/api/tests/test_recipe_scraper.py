@@ -1,9 +1,21 @@
 from django.test import TestCase
 from django.contrib.auth.models import User
-from api.services import scrape_recipe, parse_ingredient_line
-from api.models import Recipe, Ingredient, RecipeIngredient
+from django.utils import timezone
+from api import services
+from api.services import (
+    scrape_recipe, parse_ingredient_line, normalize_url, scrape_cache_key, is_scrape_fresh,
+    parse_recipe_html, extract_json_ld_recipe, extract_html_recipe, extract_html_recipe_fast,
+    ParsedIngredient, record_scrape, scrape_cache_size
+)
+from api.management.commands.benchmark_ingredient_parser import reference_parse_ingredient_line
+from django.core.management import call_command
+from io import StringIO
+from api.models import Recipe, Ingredient, RecipeIngredient, ScrapeCacheEntry
 from unittest.mock import patch, MagicMock
+from datetime import timedelta
 from decimal import Decimal
+import json
+from pathlib import Path
 
 class TestRecipeScraper(TestCase):
     def setUp(self):
@@ -166,3 +178,226 @@ class TestRecipeScraper(TestCase):
 
         # Check instructions
         self.assertIn('Mix flour and salt', recipe_data['instructions'])
+
+PAGES_DIR = Path(__file__).resolve().parent / 'pages'
+INGREDIENT_LINES = Path(__file__).resolve().parent / 'ingredient_lines.txt'
+
+class IngredientLineParserTests(TestCase):
+    def test_result_fields(self):
+        """Test that the parser returns a slotted result that unpacks like a tuple"""
+        parsed = parse_ingredient_line('2 1/4 cups bread flour (sifted)')
+        self.assertIsInstance(parsed, ParsedIngredient)
+        self.assertFalse(hasattr(parsed, '__dict__'))
+        self.assertEqual(
+            (parsed.name, parsed.quantity, parsed.unit, parsed.notes),
+            ('bread flour', 2.25, 'cup', 'sifted')
+        )
+
+    def test_unicode_fractions_and_decimals(self):
+        """Test amounts the word-loop parser did not understand"""
+        test_cases = [
+            ('½ cup milk', ('milk', 0.5, 'cup', '')),
+            ('1½ cups water', ('water', 1.5, 'cup', '')),
+            ('2 ¼ tsp yeast', ('yeast', 2.25, 'tsp', '')),
+            ('1.5-2 lb chicken thighs', ('chicken thighs', 1.5, 'lb', '')),
+            ('1-1½ cups broth', ('broth', 1.0, 'cup', '')),
+            ('0.25 tsp cayenne', ('cayenne', 0.25, 'tsp', '')),
+            ('About 2 cups rice', ('rice', 2.0, 'cup', '')),
+            ('Salt and pepper', ('salt and pepper', 1.0, 'whole', '')),
+        ]
+        for line, expected in test_cases:
+            self.assertEqual(parse_ingredient_line(line), expected, line)
+
+    def test_matches_previous_parser(self):
+        """Test that the compiled grammar agrees with the old parser on the corpus"""
+        lines = INGREDIENT_LINES.read_text().splitlines() + [
+            '1 package instant yeast (2 1/4 tsp)', '1/2 - 1 tbsp butter', '2-3 carrots, diced',
+            'juice of 1 lemon', '1 can (15 oz) beans', '  3   large   eggs  ', '', '1 1/2',
+        ]
+        for line in lines:
+            self.assertEqual(parse_ingredient_line(line), reference_parse_ingredient_line(line), line)
+
+    def test_benchmark_command(self):
+        """Test that the benchmark finds the parser's results identical. Its
+        speed gate is for runs by hand, not for the test suite."""
+        out = StringIO()
+        call_command('benchmark_ingredient_parser', lines=20000, min_speedup=0, stdout=out)
+        self.assertIn('Results identical', out.getvalue())
+
+
+class RecipeExtractionTests(TestCase):
+    def _page(self, name):
+        return (PAGES_DIR / name).read_text()
+
+    def test_json_ld_recipe(self):
+        """Test that a Recipe node inside a JSON-LD @graph is extracted"""
+        recipe_data = extract_json_ld_recipe(self._page('json_ld.html'))
+
+        self.assertEqual(recipe_data['name'], 'Lemon Pancakes')
+        self.assertEqual(recipe_data['description'], 'Fluffy pancakes with lemon zest.')
+        self.assertEqual(recipe_data['servings'], 4)
+        self.assertEqual(recipe_data['prep_time'], 10)
+        self.assertEqual(recipe_data['cook_time'], 15)
+        self.assertEqual(len(recipe_data['ingredients']), 6)
+        self.assertEqual(recipe_data['ingredients'][4]['quantity'], 1.5)
+        self.assertEqual(recipe_data['instructions'].splitlines(), [
+            '1. Whisk the dry ingredients.',
+            '2. Beat in the eggs, milk and zest.',
+            '3. Cook on a hot griddle until golden.'
+        ])
+
+    def test_json_ld_without_recipe_is_ignored(self):
+        """Test that JSON-LD without a usable Recipe falls through"""
+        html = (
+            '<script type="application/ld+json">{"@type": "WebSite"}</script>'
+            '<script type="application/ld+json">{not json</script>'
+        )
+        self.assertIsNone(extract_json_ld_recipe(html))
+        self.assertIsNone(extract_json_ld_recipe(self._page('class_markup.html')))
+
+    def test_fast_path_matches_generic(self):
+        """Test that the lxml extraction returns the same data as BeautifulSoup"""
+        for name in ('class_markup.html', 'json_ld.html'):
+            html = self._page(name)
+            self.assertEqual(extract_html_recipe_fast(html), extract_html_recipe(html))
+
+        recipe_data = parse_recipe_html(self._page('class_markup.html'))
+        self.assertEqual(recipe_data['name'], 'Weeknight Chili')
+        self.assertEqual(len(recipe_data['ingredients']), 6)
+
+    def test_generic_path_without_lxml(self):
+        """Test that extraction falls back to BeautifulSoup when lxml is missing"""
+        html = self._page('class_markup.html')
+        with patch.object(services, 'lxml_html', None):
+            self.assertIsNone(extract_html_recipe_fast(html))
+            self.assertEqual(parse_recipe_html(html), extract_html_recipe(html))
+
+    @patch('api.services.extract_html_recipe')
+    @patch('api.services.extract_html_recipe_fast')
+    def test_json_ld_skips_html_parsing(self, mock_fast, mock_generic):
+        """Test that a JSON-LD hit never builds a DOM"""
+        parse_recipe_html(self._page('json_ld.html'))
+        mock_fast.assert_not_called()
+        mock_generic.assert_not_called()
+
+class ScrapeCacheTests(TestCase):
+    html_content = """
+    <html>
+        <head><title>Cached Soup | Example</title></head>
+        <body>
+            <div class="recipe-ingredients"><ul><li>1 cup broth</li></ul></div>
+            <div class="recipe-instructions"><ol><li>Heat</li></ol></div>
+        </body>
+    </html>
+    """
+
+    def setUp(self):
+        scrape_cache_size.clear()
+
+    def _response(self, status_code=200, headers=None, text=None):
+        response = MagicMock()
+        response.status_code = status_code
+        response.headers = headers or {}
+        response.text = self.html_content if text is None else text
+        return response
+
+    def test_normalize_url(self):
+        """Test that equivalent URLs share a cache key"""
+        self.assertEqual(
+            normalize_url('HTTPS://Example.com:443/soup?b=2&utm_source=x&a=1#step-2'),
+            'https://example.com/soup?a=1&b=2'
+        )
+        self.assertEqual(normalize_url('http://example.com'), 'http://example.com/')
+        self.assertEqual(normalize_url('http://example.com:8080/a'), 'http://example.com:8080/a')
+
+    @patch('api.services.requests.get')
+    def test_fresh_hit_skips_request(self, mock_get):
+        """Test that a recently scraped URL is served from the cache"""
+        mock_get.return_value = self._response(headers={'ETag': '"v1"'})
+        first = scrape_recipe('https://example.com/soup?utm_source=feed')
+        second = scrape_recipe('https://EXAMPLE.com/soup')
+        self.assertEqual(mock_get.call_count, 1)
+        self.assertEqual(first, second)
+        self.assertEqual(second['name'], 'Cached Soup')
+
+    @patch('api.services.parse_recipe_html')
+    @patch('api.services.requests.get')
+    def test_stale_entry_revalidates(self, mock_get, mock_parse):
+        """Test that a stale entry is revalidated and a 304 skips parsing"""
+        ScrapeCacheEntry.objects.create(
+            url_hash=scrape_cache_key('https://example.com/soup'),
+            url='https://example.com/soup',
+            etag='"v1"',
+            last_modified='Wed, 01 Jan 2025 00:00:00 GMT',
+            recipe_data={'name': 'Cached Soup', 'instructions': '1. Heat', 'ingredients': []},
+            fetched_at=timezone.now() - timedelta(days=2)
+        )
+        mock_get.return_value = self._response(status_code=304)
+
+        recipe_data = scrape_recipe('https://example.com/soup')
+
+        self.assertEqual(recipe_data['name'], 'Cached Soup')
+        mock_parse.assert_not_called()
+        headers = mock_get.call_args.kwargs['headers']
+        self.assertEqual(headers['If-None-Match'], '"v1"')
+        self.assertEqual(headers['If-Modified-Since'], 'Wed, 01 Jan 2025 00:00:00 GMT')
+        entry = ScrapeCacheEntry.objects.get()
+        self.assertTrue(is_scrape_fresh(entry))
+
+    def test_revalidating_an_evicted_entry(self):
+        """Test that a 304 for an entry evicted meanwhile still returns its data"""
+        entry = ScrapeCacheEntry.objects.create(
+            url_hash=scrape_cache_key('https://example.com/soup'),
+            url='https://example.com/soup',
+            recipe_data={'name': 'Cached Soup', 'instructions': '', 'ingredients': []},
+        )
+        ScrapeCacheEntry.objects.all().delete()
+        recipe_data = record_scrape('https://example.com/soup', entry, None, '"v1"', '')
+        self.assertEqual(recipe_data['name'], 'Cached Soup')
+        self.assertFalse(ScrapeCacheEntry.objects.exists())
+
+    @patch('api.services.requests.get')
+    def test_writes_under_budget_skip_the_total(self, mock_get):
+        """Test that the total size is only summed when the cache may be over budget"""
+        mock_get.return_value = self._response()
+        size = len(json.dumps(scrape_recipe('https://example.com/0')))
+        with self.settings(SCRAPE_CACHE={'MAX_BYTES': size * 3}), \
+                patch('api.services.evict_scrape_cache', wraps=services.evict_scrape_cache) as evict:
+            scrape_recipe('https://example.com/1')
+            scrape_recipe('https://example.com/2')
+            self.assertEqual(evict.call_count, 0)
+            scrape_recipe('https://example.com/3')
+            self.assertEqual(evict.call_count, 1)
+        self.assertEqual(ScrapeCacheEntry.objects.count(), 3)
+
+    @patch('api.services.requests.get')
+    def test_changed_page_replaces_entry(self, mock_get):
+        """Test that a 200 on revalidation stores the new page and validators"""
+        ScrapeCacheEntry.objects.create(
+            url_hash=scrape_cache_key('https://example.com/soup'),
+            url='https://example.com/soup',
+            etag='"v1"',
+            recipe_data={'name': 'Old Soup', 'instructions': '', 'ingredients': []},
+            fetched_at=timezone.now() - timedelta(days=2)
+        )
+        mock_get.return_value = self._response(headers={'ETag': '"v2"'})
+
+        recipe_data = scrape_recipe('https://example.com/soup')
+
+        self.assertEqual(recipe_data['name'], 'Cached Soup')
+        entry = ScrapeCacheEntry.objects.get()
+        self.assertEqual(entry.etag, '"v2"')
+        self.assertEqual(entry.recipe_data['name'], 'Cached Soup')
+
+    @patch('api.services.requests.get')
+    def test_cache_evicts_oldest_entries(self, mock_get):
+        """Test that the least recently fetched pages are evicted past MAX_BYTES"""
+        mock_get.return_value = self._response()
+        size = len(json.dumps(scrape_recipe('https://example.com/0')))
+        with self.settings(SCRAPE_CACHE={'MAX_BYTES': size * 2}):
+            scrape_recipe('https://example.com/1')
+            scrape_recipe('https://example.com/2')
+        self.assertEqual(
+            sorted(ScrapeCacheEntry.objects.values_list('url', flat=True)),
+            ['https://example.com/1', 'https://example.com/2']
+        )
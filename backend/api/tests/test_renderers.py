@@ -0,0 +1,47 @@
+import datetime
+from decimal import Decimal
+from unittest import mock
+
+from django.test import SimpleTestCase
+from django.utils.translation import gettext_lazy
+from rest_framework.renderers import JSONRenderer
+
+from api import renderers
+from api.renderers import ORJSONRenderer
+
+DATA = {
+    'name': 'Crème brûlée   ',
+    'quantity': Decimal('1.50'),
+    'servings': 4,
+    'ratio': 0.25,
+    'date': datetime.date(2025, 3, 3),
+    'time': datetime.time(9, 30, 15, 123456),
+    'created_at': datetime.datetime(2025, 3, 3, 9, 30, 15, 123456, tzinfo=datetime.timezone.utc),
+    'naive': datetime.datetime(2025, 3, 3, 9, 30),
+    'offset': datetime.datetime(2025, 3, 3, 9, 30, tzinfo=datetime.timezone(datetime.timedelta(hours=-5))),
+    'label': gettext_lazy('Breakfast'),
+    'lines': [{'id': 1, 'unit': None, 'optional': False}],
+    7: 'non-string key',
+}
+
+
+class ORJSONRendererTests(SimpleTestCase):
+    def test_matches_json_renderer(self):
+        """Test that the output is byte for byte what JSONRenderer produces"""
+        self.assertEqual(ORJSONRenderer().render(DATA), JSONRenderer().render(DATA))
+
+    def test_empty(self):
+        """Test that None renders as an empty body"""
+        self.assertEqual(ORJSONRenderer().render(None), b'')
+
+    def test_indent_falls_back(self):
+        """Test that an indented response is rendered by JSONRenderer"""
+        media_type = 'application/json; indent=4'
+        self.assertEqual(
+            ORJSONRenderer().render(DATA, media_type), JSONRenderer().render(DATA, media_type)
+        )
+
+    def test_without_orjson(self):
+        """Test that rendering still works when orjson is not installed"""
+        with mock.patch.object(renderers, 'orjson', None):
+            self.assertEqual(ORJSONRenderer().render(DATA), JSONRenderer().render(DATA))
@@ -0,0 +1,27 @@
+from fractions import Fraction
+from django.test import SimpleTestCase
+from api.scaling import format_kitchen_amount, round_to_kitchen_fraction
+
+class KitchenFractionTests(SimpleTestCase):
+    def test_rounds_to_measuring_sizes(self):
+        """Test that amounts snap to the nearest measurable size of their unit"""
+        self.assertEqual(round_to_kitchen_fraction(Fraction(7, 20), 'cup'), Fraction(1, 3))
+        self.assertEqual(round_to_kitchen_fraction(Fraction(19, 10), 'cup'), Fraction(2))
+        self.assertEqual(round_to_kitchen_fraction(Fraction(3, 10), 'tsp'), Fraction(1, 4))
+        self.assertEqual(round_to_kitchen_fraction(Fraction(5, 4), 'tbsp'), Fraction(3, 2))
+        self.assertEqual(round_to_kitchen_fraction(Fraction(4, 3), 'whole'), Fraction(3, 2))
+        self.assertEqual(round_to_kitchen_fraction(Fraction(1001, 3), 'g'), Fraction('333.67'))
+
+    def test_never_rounds_to_nothing(self):
+        """Test that small positive amounts keep the smallest measurable size"""
+        self.assertEqual(round_to_kitchen_fraction(Fraction(1, 20), 'tsp'), Fraction(1, 8))
+        self.assertEqual(round_to_kitchen_fraction(Fraction(1, 10), 'pinch'), Fraction(1))
+        self.assertEqual(round_to_kitchen_fraction(Fraction(1, 1000), 'g'), Fraction(1, 100))
+        self.assertEqual(round_to_kitchen_fraction(Fraction(0), 'cup'), Fraction(0))
+
+    def test_format(self):
+        """Test that amounts are written as cooks write them"""
+        self.assertEqual(format_kitchen_amount(Fraction(2)), '2')
+        self.assertEqual(format_kitchen_amount(Fraction(3, 4)), '3/4')
+        self.assertEqual(format_kitchen_amount(Fraction(4, 3)), '1 1/3')
+        self.assertEqual(format_kitchen_amount(Fraction('333.67')), '333.67')
@@ -0,0 +1,108 @@
+from django.contrib.auth.models import User
+from django.test import TestCase
+from api.models import Ingredient, Recipe, RecipeIngredient
+from api.services import (
+    IngredientIdCache, ingredient_id_cache, get_or_create_ingredient, get_or_create_ingredient_ids,
+    sync_recipe_ingredients,
+)
+
+class IngredientIdCacheTests(TestCase):
+    def test_lru_eviction(self):
+        """Test that the least recently used name is evicted first"""
+        cache = IngredientIdCache(maxsize=2)
+        cache.set_many({'flour': 1, 'sugar': 2})
+        cache.get_many(['flour'])
+        cache.set_many({'salt': 3})
+        self.assertEqual(cache.get_many(['flour', 'sugar', 'salt']), {'flour': 1, 'salt': 3})
+        self.assertEqual(len(cache), 2)
+
+    def test_invalidate_by_id(self):
+        """Test that invalidating an id removes its name"""
+        cache = IngredientIdCache()
+        cache.set_many({'flour': 1, 'sugar': 2})
+        cache.invalidate(1)
+        self.assertEqual(cache.get_many(['flour', 'sugar']), {'sugar': 2})
+
+class IngredientLookupTests(TestCase):
+    def setUp(self):
+        ingredient_id_cache.clear()
+        self.addCleanup(ingredient_id_cache.clear)
+        self.flour = Ingredient.objects.create(name='Flour', category='pantry')
+
+    def test_get_or_create_ingredient_matches_normalized_name(self):
+        """Test that lookups ignore case and extra whitespace"""
+        self.assertEqual(get_or_create_ingredient('  FLOUR '), self.flour)
+        self.assertEqual(Ingredient.objects.count(), 1)
+
+    def test_get_or_create_ingredient_ids(self):
+        """Test that known names resolve and unknown ones are created once"""
+        with self.captureOnCommitCallbacks(execute=True):
+            ids = get_or_create_ingredient_ids(['flour', 'Sugar', 'sugar '])
+        self.assertEqual(set(ids), {'flour', 'sugar'})
+        self.assertEqual(ids['flour'], self.flour.id)
+        self.assertEqual(Ingredient.objects.get(normalized_name='sugar').id, ids['sugar'])
+
+    def test_new_ingredients_take_their_category(self):
+        """Test that created ingredients get the category given for their name
+        and existing ones keep theirs"""
+        get_or_create_ingredient_ids(
+            ['flour', 'Basil', 'salt'], categories={'flour': 'other', ' basil': 'produce'}
+        )
+        self.assertEqual(
+            dict(Ingredient.objects.values_list('normalized_name', 'category')),
+            {'flour': self.flour.category, 'basil': 'produce', 'salt': 'other'}
+        )
+
+    def test_seen_names_skip_the_database(self):
+        """Test that names resolved in a committed transaction are served from the cache"""
+        with self.captureOnCommitCallbacks(execute=True):
+            ids = get_or_create_ingredient_ids(['flour', 'butter'])
+        with self.assertNumQueries(0):
+            self.assertEqual(get_or_create_ingredient_ids(['Flour', 'butter']), ids)
+
+    def test_uncommitted_names_are_not_cached(self):
+        """Test that the cache is only filled once the transaction commits"""
+        get_or_create_ingredient_ids(['flour'])
+        self.assertEqual(len(ingredient_id_cache), 0)
+
+    def test_save_and_delete_invalidate_cache(self):
+        """Test that saving or deleting an ingredient evicts it from the cache"""
+        with self.captureOnCommitCallbacks(execute=True):
+            get_or_create_ingredient_ids(['flour'])
+        self.flour.name = 'Bread flour'
+        self.flour.save()
+        self.assertEqual(ingredient_id_cache.get_many(['flour']), {})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            get_or_create_ingredient_ids(['bread flour'])
+        self.flour.delete()
+        self.assertEqual(ingredient_id_cache.get_many(['bread flour']), {})
+
+    def test_match_similar_maps_near_duplicates(self):
+        """Test that near-duplicate names resolve to the existing ingredient only when asked"""
+        onion = Ingredient.objects.create(name='Onion', category='produce')
+        ids = get_or_create_ingredient_ids(['onions', 'Flour', 'garlic'], match_similar=True)
+        self.assertEqual(ids, {
+            'onions': onion.id, 'flour': self.flour.id, 'garlic': Ingredient.objects.get(normalized_name='garlic').id
+        })
+        self.assertFalse(Ingredient.objects.filter(normalized_name='onions').exists())
+
+        ids = get_or_create_ingredient_ids(['onions'])
+        self.assertNotEqual(ids['onions'], onion.id)
+
+    def test_sync_looks_up_ids_deleted_by_another_process(self):
+        """Test that a cached id whose ingredient is gone is evicted and the
+        name resolved from the database instead of inserted"""
+        ingredient_id_cache.set_many({'flour': self.flour.id + 1000, 'butter': self.flour.id + 1001})
+        user = User.objects.create_user(username='cook', password='testpass123')
+        recipe = Recipe.objects.create(name='Shortbread', instructions='Bake', user=user)
+        sync_recipe_ingredients(recipe, [
+            {'ingredient': {'name': 'Flour'}, 'quantity': 2, 'unit': 'cup'},
+            {'ingredient': {'name': 'Butter', 'category': 'dairy'}, 'quantity': 1, 'unit': 'cup'},
+        ])
+        butter = Ingredient.objects.get(normalized_name='butter', category='dairy')
+        self.assertEqual(
+            list(RecipeIngredient.objects.filter(recipe=recipe).values_list('ingredient_id', flat=True)),
+            [self.flour.id, butter.id]
+        )
+        self.assertEqual(ingredient_id_cache.get_many(['flour', 'butter']), {})
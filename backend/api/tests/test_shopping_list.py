@@ -0,0 +1,153 @@
+from decimal import Decimal
+from io import StringIO
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import transaction
+from django.test import TestCase
+from api.models import Ingredient, MealPlan, MealSlot, Recipe, RecipeIngredient, ShoppingListItem
+from api.services import sync_recipe_ingredients
+from api.shopping_list import compute_shopping_lists, stored_shopping_lists
+
+class ShoppingListMaintenanceTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='cook', password='testpass123')
+        self.flour = Ingredient.objects.create(name='Flour', category='pantry')
+        self.milk = Ingredient.objects.create(name='Milk', category='dairy')
+        self.bread = Recipe.objects.create(name='Bread', instructions='Bake', servings=3, user=self.user)
+        self.bread_flour = RecipeIngredient.objects.create(
+            recipe=self.bread, ingredient=self.flour, quantity=1, unit='kg'
+        )
+        self.soup = Recipe.objects.create(name='Soup', instructions='Boil', user=self.user)
+        RecipeIngredient.objects.create(recipe=self.soup, ingredient=self.milk, quantity=1, unit='cup')
+        self.plan = MealPlan.objects.create(user=self.user, start_date='2025-03-03')
+        self.other_plan = MealPlan.objects.create(user=self.user, start_date='2025-03-10')
+        self.slot = MealSlot.objects.create(
+            meal_plan=self.plan, recipe=self.bread, date='2025-03-03', meal_type='lunch', servings=2
+        )
+
+    def assertTotals(self, expected):
+        stored = stored_shopping_lists()
+        self.assertEqual(stored, compute_shopping_lists())
+        self.assertEqual(
+            {(plan, ingredient, unit): str(quantity) for (plan, ingredient, unit), quantity in stored.items()},
+            expected
+        )
+
+    def test_slot_changes(self):
+        """Test that creating, editing, moving and deleting slots keeps the totals exact"""
+        self.assertTotals({(self.plan.id, self.flour.id, 'g'): '666.666667'})
+
+        MealSlot.objects.create(meal_plan=self.plan, recipe=self.bread, date='2025-03-04', meal_type='lunch')
+        self.assertTotals({(self.plan.id, self.flour.id, 'g'): '1000.000000'})
+
+        self.slot.recipe = self.soup
+        self.slot.save()
+        self.assertTotals({
+            (self.plan.id, self.flour.id, 'g'): '333.333333',
+            (self.plan.id, self.milk.id, 'ml'): '236.588236',
+        })
+
+        self.slot.meal_plan = self.other_plan
+        self.slot.servings = 1
+        self.slot.save()
+        self.assertTotals({
+            (self.plan.id, self.flour.id, 'g'): '333.333333',
+            (self.other_plan.id, self.milk.id, 'ml'): '236.588236',
+        })
+
+        self.slot.delete()
+        MealSlot.objects.filter(meal_plan=self.plan).delete()
+        self.assertTotals({})
+
+    def test_units_share_a_base(self):
+        """Test that lines in different units of one dimension add up in its base unit"""
+        RecipeIngredient.objects.create(recipe=self.soup, ingredient=self.milk, quantity=3, unit='tsp')
+        RecipeIngredient.objects.create(recipe=self.soup, ingredient=self.milk, quantity=1, unit='tbsp')
+        MealSlot.objects.create(meal_plan=self.other_plan, recipe=self.soup, date='2025-03-10', meal_type='dinner')
+        self.assertTotals({
+            (self.plan.id, self.flour.id, 'g'): '666.666667',
+            (self.other_plan.id, self.milk.id, 'ml'): '266.161766',
+        })
+
+    def test_recipe_changes(self):
+        """Test that ingredient line and recipe servings changes reach every plan"""
+        MealSlot.objects.create(
+            meal_plan=self.other_plan, recipe=self.bread, date='2025-03-10', meal_type='lunch', servings=3
+        )
+        self.bread_flour.quantity = Decimal('1.5')
+        self.bread_flour.save()
+        RecipeIngredient.objects.create(recipe=self.bread, ingredient=self.milk, quantity=3, unit='tbsp')
+        self.assertTotals({
+            (self.plan.id, self.flour.id, 'g'): '1000.000000',
+            (self.plan.id, self.milk.id, 'ml'): '29.573530',
+            (self.other_plan.id, self.flour.id, 'g'): '1500.000000',
+            (self.other_plan.id, self.milk.id, 'ml'): '44.360294',
+        })
+
+        self.bread.servings = 6
+        self.bread.save()
+        self.bread_flour.delete()
+        self.assertTotals({
+            (self.plan.id, self.milk.id, 'ml'): '14.786765',
+            (self.other_plan.id, self.milk.id, 'ml'): '22.180147',
+        })
+
+        self.bread.delete()
+        self.assertTotals({})
+        self.slot.refresh_from_db()
+        self.assertIsNone(self.slot.recipe_id)
+
+    def test_sync_recipe_ingredients(self):
+        """Test that the bulk writes of sync_recipe_ingredients are applied"""
+        with transaction.atomic():
+            sync_recipe_ingredients(self.bread, [
+                {'ingredient': {'name': 'Flour'}, 'quantity': '600', 'unit': 'g'},
+                {'ingredient': {'name': 'Milk'}, 'quantity': '1', 'unit': 'cup'},
+            ])
+        self.assertTotals({
+            (self.plan.id, self.flour.id, 'g'): '400.000000',
+            (self.plan.id, self.milk.id, 'ml'): '157.725491',
+        })
+        with transaction.atomic():
+            sync_recipe_ingredients(self.bread, [{'ingredient': {'name': 'Milk'}, 'quantity': '1', 'unit': 'cup'}])
+        self.assertTotals({(self.plan.id, self.milk.id, 'ml'): '157.725491'})
+
+    def test_quantities_finer_than_the_column(self):
+        """Test that a quantity with more decimals than the column is added and
+        taken back as it is stored, leaving nothing for the rebuild to fix"""
+        with transaction.atomic():
+            sync_recipe_ingredients(self.bread, [{'ingredient': {'name': 'Milk'}, 'quantity': '0.333', 'unit': 'cup'}])
+        self.assertEqual(RecipeIngredient.objects.get(recipe=self.bread).quantity, Decimal('0.33'))
+        with transaction.atomic():
+            sync_recipe_ingredients(self.bread, [])
+        self.assertTotals({})
+
+        line = RecipeIngredient.objects.create(recipe=self.bread, ingredient=self.milk, quantity=0.125, unit='cup')
+        line.quantity = Decimal('0.335')
+        line.save()
+        line.delete()
+        self.assertTotals({})
+        out = StringIO()
+        call_command('rebuild_shopping_lists', '--check', stdout=out)
+        self.assertIn('up to date', out.getvalue())
+
+    def test_meal_plan_delete(self):
+        """Test that deleting a plan removes its shopping list"""
+        self.plan.delete()
+        self.assertFalse(ShoppingListItem.objects.exists())
+
+    def test_rebuild_command(self):
+        """Test that the rebuild command reports and repairs drifted totals"""
+        out = StringIO()
+        call_command('rebuild_shopping_lists', '--check', stdout=out)
+        self.assertIn('up to date', out.getvalue())
+
+        ShoppingListItem.objects.update(quantity=1)
+        with self.assertRaises(CommandError):
+            call_command('rebuild_shopping_lists', '--check', stdout=StringIO())
+
+        out = StringIO()
+        call_command('rebuild_shopping_lists', stdout=out)
+        self.assertIn(f'plan {self.plan.id} ingredient {self.flour.id} (g)', out.getvalue())
+        self.assertTotals({(self.plan.id, self.flour.id, 'g'): '666.666667'})
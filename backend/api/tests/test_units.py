@@ -0,0 +1,50 @@
+from decimal import Decimal
+from fractions import Fraction
+from django.test import SimpleTestCase
+from api.models import RecipeIngredient
+from api.units import CONVERSION_MATRIX, ConversionError, convert, convert_one, to_decimal
+
+class ConversionMatrixTests(SimpleTestCase):
+    def test_matrix_covers_unit_choices(self):
+        """Test that every unit converts to itself and within its dimension"""
+        for unit, _ in RecipeIngredient.UNIT_CHOICES:
+            self.assertEqual(CONVERSION_MATRIX[unit, unit], 1)
+        self.assertEqual(CONVERSION_MATRIX['tsp', 'cup'], Fraction(1, 48))
+        self.assertEqual(CONVERSION_MATRIX['lb', 'oz'], 16)
+        self.assertNotIn(('cup', 'g'), CONVERSION_MATRIX)
+        self.assertNotIn(('whole', 'piece'), CONVERSION_MATRIX)
+        self.assertEqual(convert_one(Decimal('2'), 'bunch', 'bunch'), Decimal('2'))
+
+    def test_same_dimension_is_exact(self):
+        """Test that conversions with an exact answer return it"""
+        self.assertEqual(
+            convert([Decimal('48'), Decimal('3')], 'tsp', 'cup'),
+            [Decimal('1'), Decimal('0.0625')]
+        )
+        self.assertEqual(convert_one(Decimal('3'), 'tsp', 'tbsp'), Decimal('1'))
+        self.assertEqual(convert_one(Decimal('1'), 'lb', 'g'), Decimal('453.59237'))
+        self.assertEqual(convert_one(Decimal('1.5'), 'kg', 'lb') * Decimal('453.59237'), Decimal('1500'))
+        self.assertEqual(convert_one('2', 'cup', 'ml'), Decimal('473.1764730'))
+
+    def test_floats_are_not_expanded(self):
+        """Test that float quantities are read from their shortest repr"""
+        self.assertEqual(to_decimal(0.1), Decimal('0.1'))
+        self.assertEqual(to_decimal(Fraction(1, 4)), Decimal('0.25'))
+        self.assertEqual(convert_one(0.1, 'kg', 'g'), Decimal('100.0'))
+
+    def test_density_conversions(self):
+        """Test volume <-> mass through the ingredient density table"""
+        self.assertEqual(
+            convert([Decimal('1'), Decimal('100')], ['cup', 'g'], 'g', ['Flour', 'Water']),
+            [Decimal('125.391765345'), Decimal('100')]
+        )
+        self.assertEqual(convert_one(Decimal('100'), 'g', 'ml', 'water'), Decimal('100'))
+        with self.assertRaises(ConversionError):
+            convert_one(Decimal('1'), 'cup', 'g', 'mystery')
+        with self.assertRaises(ConversionError):
+            convert_one(Decimal('1'), 'whole', 'g', 'water')
+
+    def test_batch_lengths_must_match(self):
+        """Test that mismatched batch inputs are rejected"""
+        with self.assertRaises(ValueError):
+            convert([Decimal('1'), Decimal('2')], ['cup'], 'ml')
@@ -0,0 +1,62 @@
+from datetime import time
+from django.contrib.auth.models import User
+from django.core.exceptions import ImproperlyConfigured
+from django.test import TestCase
+from rest_framework import serializers
+from rest_framework.renderers import JSONRenderer
+from api.models import Event, Ingredient, MealPlan, MealSlot, Recipe, RecipeIngredient
+from api.serializers import (
+    CalendarMealSlotSerializer, EventSerializer, MealPlanSerializer, RecipeSerializer, optimize_queryset
+)
+from api.values_serializers import ValuesSerializer, values_serializer
+
+class ValuesSerializerTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='cook', password='testpass123')
+        flour = Ingredient.objects.create(name='Flour', category='pantry', description='Milled')
+        salt = Ingredient.objects.create(name='Salt', category='spices')
+        self.bread = Recipe.objects.create(
+            name='Bread', description='Crusty', instructions='Bake', prep_time=20, servings=2,
+            difficulty='easy', user=self.user
+        )
+        RecipeIngredient.objects.create(recipe=self.bread, ingredient=salt, quantity='0.5', unit='tsp', order=1)
+        RecipeIngredient.objects.create(
+            recipe=self.bread, ingredient=flour, quantity=500, unit='g', notes='sifted', optional=True
+        )
+        Recipe.objects.create(name='Water', instructions='Pour', user=self.user)
+        plan = MealPlan.objects.create(user=self.user, start_date='2025-03-03', notes='Busy week')
+        MealSlot.objects.create(meal_plan=plan, recipe=self.bread, date='2025-03-04', meal_type='lunch', servings=3)
+        MealSlot.objects.create(meal_plan=plan, date='2025-03-03', meal_type='dinner')
+        MealPlan.objects.create(user=self.user, start_date='2025-03-10')
+        Event.objects.create(title='Market', date='2025-03-05', time=time(9, 30), user=self.user)
+
+    def assertSameJSON(self, serializer_class, queryset):
+        expected = JSONRenderer().render(serializer_class(optimize_queryset(queryset, serializer_class), many=True).data)
+        fast = values_serializer(serializer_class)
+        self.assertEqual(JSONRenderer().render(fast.serialize(fast.rows(queryset))), expected)
+
+    def test_same_output(self):
+        """Test that the values() serializers render byte for byte the same JSON"""
+        self.assertSameJSON(RecipeSerializer, Recipe.objects.all())
+        self.assertSameJSON(MealPlanSerializer, MealPlan.objects.all())
+        self.assertSameJSON(EventSerializer, Event.objects.all())
+        self.assertSameJSON(CalendarMealSlotSerializer, MealSlot.objects.all())
+        self.assertSameJSON(RecipeSerializer, Recipe.objects.none())
+
+    def test_query_count(self):
+        """Test that each level of nesting costs one query"""
+        fast = values_serializer(RecipeSerializer)
+        with self.assertNumQueries(2):
+            fast.serialize(fast.rows(Recipe.objects.all()))
+
+    def test_unsupported_fields(self):
+        """Test that fields without a column are refused up front"""
+        class GreetingSerializer(serializers.ModelSerializer):
+            greeting = serializers.SerializerMethodField()
+
+            class Meta:
+                model = Recipe
+                fields = ['id', 'greeting']
+
+        with self.assertRaises(ImproperlyConfigured):
+            ValuesSerializer(GreetingSerializer)
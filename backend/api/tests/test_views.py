@@ -1,11 +1,18 @@
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.db import connection
+from django.core.cache import cache
+from django.utils import timezone
 from django.contrib.auth.models import User
 from django.urls import reverse
 from rest_framework.test import APITestCase, APIClient
 from rest_framework import status
 from rest_framework_simplejwt.tokens import RefreshToken
-from api.models import Event, Recipe, Ingredient, RecipeIngredient
+from api.models import Event, Recipe, Ingredient, RecipeIngredient, MealPlan, MealSlot, RecipeImportJob
+from api.pantry import pantry_index
 from decimal import Decimal
+from unittest import mock
+import json
 
 class BaseAPITest(APITestCase):
     def setUp(self):
@@ -45,8 +52,8 @@ class EventViewSetTests(BaseAPITest):
         url = reverse('event-list')
         response = self.client.get(url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 1)
-        self.assertEqual(response.data[0]['title'], 'User1 Event')
+        self.assertEqual(len(response.data['results']), 1)
+        self.assertEqual(response.data['results'][0]['title'], 'User1 Event')
 
     def test_create_event(self):
         """Test event creation"""
@@ -104,7 +111,7 @@ class RecipeViewSetTests(BaseAPITest):
         url = reverse('recipe-list')
         response = self.client.get(url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 2)  # Should see both recipes
+        self.assertEqual(len(response.data['results']), 2)  # Should see both recipes
 
     def test_create_recipe(self):
         """Test recipe creation with ingredients"""
@@ -140,6 +147,86 @@ class RecipeViewSetTests(BaseAPITest):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(Recipe.objects.get(id=self.recipe1.id).name, 'Updated Recipe')
 
+    def _ingredient_lines(self, names):
+        return [
+            {
+                'ingredient': {'name': name},
+                'quantity': '1',
+                'unit': 'cup',
+                'order': index
+            }
+            for index, name in enumerate(names)
+        ]
+
+    def test_create_recipe_query_count_independent_of_ingredients(self):
+        """Test that creating a recipe costs the same queries for 5 or 25 ingredients"""
+        url = reverse('recipe-list')
+        counts = []
+        for size in (5, 25):
+            data = {
+                'name': f'Recipe with {size}',
+                'instructions': 'Test Instructions',
+                'ingredients': self._ingredient_lines(f'item {size}-{i}' for i in range(size))
+            }
+            with CaptureQueriesContext(connection) as ctx:
+                response = self.client.post(url, data, format='json')
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+            self.assertEqual(len(response.data['ingredients']), size)
+            counts.append(len(ctx.captured_queries))
+        self.assertEqual(counts[0], counts[1])
+
+    def test_create_recipe_reuses_existing_ingredients(self):
+        """Test that known ingredient names are linked rather than duplicated"""
+        data = {
+            'name': 'Reuse',
+            'instructions': 'Test Instructions',
+            'ingredients': self._ingredient_lines(['Test Ingredient', 'brand new'])
+        }
+        response = self.client.post(reverse('recipe-list'), data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Ingredient.objects.count(), 2)
+        self.assertEqual(response.data['ingredients'][0]['ingredient']['id'], self.ingredient.id)
+
+    def test_update_recipe_only_touches_changed_ingredients(self):
+        """Test that an update keeps unchanged lines and only writes the difference"""
+        url = reverse('recipe-detail', args=[self.recipe1.id])
+        self.client.put(url, {'ingredients': self._ingredient_lines(['flour', 'sugar', 'salt'])}, format='json')
+        before = {
+            ri.ingredient.name: ri.id
+            for ri in RecipeIngredient.objects.filter(recipe=self.recipe1).select_related('ingredient')
+        }
+
+        lines = self._ingredient_lines(['flour', 'sugar', 'eggs'])
+        lines[1]['quantity'] = '2'
+        response = self.client.put(url, {'ingredients': lines}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        after = {
+            ri.ingredient.name: ri
+            for ri in RecipeIngredient.objects.filter(recipe=self.recipe1).select_related('ingredient')
+        }
+        self.assertEqual(set(after), {'flour', 'sugar', 'eggs'})
+        self.assertEqual(after['flour'].id, before['flour'])
+        self.assertEqual(after['sugar'].id, before['sugar'])
+        self.assertEqual(after['sugar'].quantity, Decimal('2'))
+        self.assertEqual(
+            [ri['ingredient']['name'] for ri in response.data['ingredients']],
+            ['flour', 'sugar', 'eggs']
+        )
+
+    def test_partial_update_without_ingredients_keeps_them(self):
+        """Test that a PATCH without ingredients leaves the ingredient lines alone"""
+        RecipeIngredient.objects.create(
+            recipe=self.recipe1,
+            ingredient=self.ingredient,
+            quantity=1,
+            unit='cup'
+        )
+        url = reverse('recipe-detail', args=[self.recipe1.id])
+        response = self.client.patch(url, {'name': 'Renamed'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(RecipeIngredient.objects.filter(recipe=self.recipe1).count(), 1)
+
     def test_delete_recipe(self):
         """Test recipe deletion"""
         url = reverse('recipe-detail', args=[self.recipe1.id])
@@ -148,13 +235,841 @@ class RecipeViewSetTests(BaseAPITest):
         self.assertEqual(Recipe.objects.count(), 1)
 
     def test_import_recipe(self):
-        """Test recipe import from URL"""
+        """Test that a recipe import is queued rather than fetched inline"""
         url = reverse('recipe-import-from-url')
         data = {
             'url': 'https://example.com/recipe'
         }
         response = self.client.post(url, data)
-        # Note: This will fail unless we mock the scrape_recipe function
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(response.data['status'], 'pending')
+        job = RecipeImportJob.objects.get(id=response.data['id'])
+        self.assertEqual(job.user, self.user1)
+        self.assertEqual(job.host, 'example.com')
+        self.assertTrue(response['Location'].endswith(reverse('recipe-import-detail', args=[job.id])))
+
+    def test_import_recipe_requires_url(self):
+        """Test that importing without a URL is rejected"""
+        response = self.client.post(reverse('recipe-import-from-url'), {})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_import_recipe_rejects_invalid_urls(self):
+        """Test that only http(s) URLs with a host are queued"""
+        url = reverse('recipe-import-from-url')
+        for bad in ('not a url', 'ftp://example.com/recipe', 'https://', 'javascript:alert(1)', ['https://a.com']):
+            response = self.client.post(url, {'url': bad}, format='json')
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST, bad)
+        self.assertFalse(RecipeImportJob.objects.exists())
+
+    def test_import_job_status_is_private(self):
+        """Test that users can only poll their own import jobs"""
+        own = RecipeImportJob.objects.create(user=self.user1, url='https://a.com/r', host='a.com')
+        other = RecipeImportJob.objects.create(user=self.user2, url='https://b.com/r', host='b.com')
+        response = self.client.get(reverse('recipe-import-detail', args=[own.id]))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['status'], 'pending')
+        response = self.client.get(reverse('recipe-import-detail', args=[other.id]))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+class RecipeQueryCountTests(BaseAPITest):
+    def _create_recipes(self, count, ingredients_per_recipe=3):
+        for i in range(count):
+            recipe = Recipe.objects.create(
+                name=f'Recipe {Recipe.objects.count()}',
+                instructions='Test Instructions',
+                user=self.user1
+            )
+            for j in range(ingredients_per_recipe):
+                ingredient = Ingredient.objects.create(
+                    name=f'Ingredient {recipe.id}-{j}',
+                    category='other'
+                )
+                RecipeIngredient.objects.create(
+                    recipe=recipe,
+                    ingredient=ingredient,
+                    quantity=Decimal('1'),
+                    unit='cup',
+                    order=j
+                )
+
+    def _count_queries(self, url):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return len(ctx.captured_queries), response
+
+    def test_list_query_count_is_constant(self):
+        """Test that listing recipes does not issue a query per recipe or ingredient"""
+        url = reverse('recipe-list') + '?expand=ingredients'
+        self._create_recipes(2)
+        small_count, _ = self._count_queries(url)
+
+        self._create_recipes(20)
+        large_count, response = self._count_queries(url)
+
+        self.assertEqual(small_count, large_count)
+        self.assertEqual(len(response.data['results']), 22)
+        self.assertEqual(len(response.data['results'][0]['ingredients']), 3)
+
+    def test_list_query_count(self):
+        """Test the exact number of queries needed to list recipes"""
+        self._create_recipes(10)
+        # auth user lookup, recipes, prefetched ingredients
+        with self.assertNumQueries(3):
+            self.client.get(reverse('recipe-list') + '?expand=ingredients')
+
+    def test_retrieve_query_count(self):
+        """Test that retrieving a recipe loads its ingredients in one query"""
+        self._create_recipes(1, ingredients_per_recipe=10)
+        recipe = Recipe.objects.get()
+        # auth user lookup, recipe, prefetched ingredients
+        with self.assertNumQueries(3):
+            response = self.client.get(reverse('recipe-detail', args=[recipe.id]))
+        self.assertEqual(len(response.data['ingredients']), 10)
+
+    def test_update_returns_new_ingredients(self):
+        """Test that an update does not return the stale prefetched ingredients"""
+        self._create_recipes(1)
+        recipe = Recipe.objects.get()
+        url = reverse('recipe-detail', args=[recipe.id])
+        data = {
+            'ingredients': [
+                {
+                    'ingredient': {'name': 'Replacement'},
+                    'quantity': '1',
+                    'unit': 'cup'
+                }
+            ]
+        }
+        response = self.client.patch(url, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [ri['ingredient']['name'] for ri in response.data['ingredients']],
+            ['replacement']
+        )
+
+class RecipeRetrieveLargeTableTests(BaseAPITest):
+    RECIPE_COUNT = 100000
+
+    @classmethod
+    def setUpTestData(cls):
+        owner = User.objects.create_user(username='bulkowner', password='testpass123')
+        Recipe.objects.bulk_create(
+            (Recipe(name=f'Recipe {i}', instructions='Test', user=owner)
+             for i in range(cls.RECIPE_COUNT)),
+            batch_size=5000
+        )
+
+    def test_retrieve_does_not_count_table(self):
+        """Test that retrieving one recipe never counts the whole table"""
+        recipe = Recipe.objects.order_by('id').last()
+        url = reverse('recipe-detail', args=[recipe.id])
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        # auth user lookup, recipe, prefetched ingredients
+        self.assertEqual(len(ctx.captured_queries), 3)
+        for query in ctx.captured_queries:
+            self.assertNotIn('COUNT(', query['sql'].upper())
+
+class CursorPaginationTests(BaseAPITest):
+    def _walk(self, url):
+        """Follow next links and return the ids in page order"""
+        ids = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertNotIn('count', response.data)
+            ids.extend(item['id'] for item in response.data['results'])
+            url = response.data['next']
+        return ids
+
+    def test_recipes_paginate_by_created_at(self):
+        """Test that recipe pages follow -created_at and cover every recipe once"""
+        for i in range(7):
+            Recipe.objects.create(name=f'Recipe {i}', instructions='Test', user=self.user1)
+        ids = self._walk(reverse('recipe-list') + '?page_size=3')
+        expected = list(Recipe.objects.order_by('-created_at', '-id').values_list('id', flat=True))
+        self.assertEqual(ids, expected)
+
+    def test_page_query_count_is_constant(self):
+        """Test that a deep page costs the same number of queries as the first"""
+        for i in range(30):
+            Recipe.objects.create(name=f'Recipe {i}', instructions='Test', user=self.user1)
+        url = reverse('recipe-list') + '?page_size=5'
+        with CaptureQueriesContext(connection) as first:
+            response = self.client.get(url)
+        for _ in range(4):
+            response = self.client.get(response.data['next'])
+        with CaptureQueriesContext(connection) as deep:
+            self.client.get(response.data['next'])
+        self.assertEqual(len(first.captured_queries), len(deep.captured_queries))
+
+    def test_events_paginate_by_date(self):
+        """Test that event pages follow date and time"""
+        for day in (3, 1, 2):
+            Event.objects.create(title=f'Day {day}', date=f'2025-02-0{day}', time='09:00:00', user=self.user1)
+        ids = self._walk(reverse('event-list') + '?page_size=2')
+        titles = [Event.objects.get(id=i).title for i in ids]
+        self.assertEqual(titles, ['Day 1', 'Day 2', 'Day 3'])
+
+    def test_meal_plans_paginate_by_start_date(self):
+        """Test that meal plan pages follow -start_date and only show the user's plans"""
+        for day in (1, 15, 8):
+            MealPlan.objects.create(user=self.user1, start_date=f'2025-02-{day:02d}')
+        MealPlan.objects.create(user=self.user2, start_date='2025-02-22')
+        ids = self._walk(reverse('meal-plan-list') + '?page_size=2')
+        dates = [str(MealPlan.objects.get(id=i).start_date) for i in ids]
+        self.assertEqual(dates, ['2025-02-15', '2025-02-08', '2025-02-01'])
+
+class ConditionalGetTests(BaseAPITest):
+    def setUp(self):
+        super().setUp()
+        self.flour = Ingredient.objects.create(name='Flour', category='pantry')
+        self.recipe = Recipe.objects.create(name='Bread', instructions='Bake', user=self.user1)
+        RecipeIngredient.objects.create(recipe=self.recipe, ingredient=self.flour, quantity=1, unit='kg')
+        self.plan = MealPlan.objects.create(user=self.user1, start_date='2025-03-03')
+
+    def assertRevalidates(self, url, queries, detail=True):
+        """GET url, then check the ETag revalidates with a 304; returns the ETag.
+        Only single objects carry Last-Modified."""
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn('private', response['Cache-Control'])
+        self.assertEqual('Last-Modified' in response, detail)
+        with self.assertNumQueries(queries):
+            not_modified = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(not_modified.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(not_modified['ETag'], response['ETag'])
+        self.assertEqual(not_modified.content, b'')
+        return response['ETag']
+
+    def test_recipe_detail(self):
+        """Test that a recipe's ETag changes with its lines and ingredient names"""
+        url = reverse('recipe-detail', args=[self.recipe.id])
+        # auth user lookup, recipe
+        etag = self.assertRevalidates(url, 2)
+
+        RecipeIngredient.objects.create(recipe=self.recipe, ingredient=self.flour, quantity=1, unit='cup')
+        changed = self.assertRevalidates(url, 2)
+        self.assertNotEqual(changed, etag)
+
+        self.flour.name = 'Bread flour'
+        self.flour.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=changed)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['ingredients'][0]['ingredient']['name'], 'Bread flour')
+
+    def test_recipe_list(self):
+        """Test that the list revalidates and changes when a recipe is removed"""
+        url = reverse('recipe-list')
+        etag = self.assertRevalidates(url, 2, detail=False)
+        Recipe.objects.create(name='Soup', instructions='Boil', user=self.user1).delete()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, status.HTTP_304_NOT_MODIFIED)
+
+        self.recipe.delete()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, status.HTTP_200_OK)
+
+    def test_if_modified_since(self):
+        """Test that Last-Modified is honoured without an ETag"""
+        url = reverse('recipe-detail', args=[self.recipe.id])
+        last_modified = self.client.get(url)['Last-Modified']
+        response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_list_ignores_if_modified_since(self):
+        """Test that deleting a recipe other than the newest is not hidden by
+        If-Modified-Since, which cannot see it"""
+        url = reverse('recipe-list')
+        soup = Recipe.objects.create(name='Soup', instructions='Boil', user=self.user1)
+        # What the list used to send: the newest recipe's updated_at
+        since = self.client.get(reverse('recipe-detail', args=[soup.id]))['Last-Modified']
+        self.assertNotIn('Last-Modified', self.client.get(url))
+
+        self.recipe.delete()
+        response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=since)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([recipe['name'] for recipe in response.data['results']], ['Soup'])
+
+    def test_meal_plan_follows_slots(self):
+        """Test that adding a slot or deleting its recipe changes the plan's ETag"""
+        url = reverse('meal-plan-detail', args=[self.plan.id])
+        etag = self.assertRevalidates(url, 2)
+        list_etag = self.assertRevalidates(reverse('meal-plan-list'), 2, detail=False)
+
+        MealSlot.objects.create(meal_plan=self.plan, recipe=self.recipe, date='2025-03-03', meal_type='lunch')
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, status.HTTP_200_OK)
+        response = self.client.get(reverse('meal-plan-list'), HTTP_IF_NONE_MATCH=list_etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        etag = self.client.get(url)['ETag']
+        self.recipe.delete()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIsNone(response.data['meal_slots'][0]['recipe'])
+
+    def test_missing_object(self):
+        """Test that unknown and other users' objects are still 404"""
+        other_plan = MealPlan.objects.create(user=self.user2, start_date='2025-03-03')
+        response = self.client.get(reverse('meal-plan-detail', args=[other_plan.id]))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        response = self.client.get(reverse('recipe-detail', args=[0]))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+class RecipeCacheTests(BaseAPITest):
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.flour = Ingredient.objects.create(name='Flour', category='pantry')
+        self.recipes = [
+            Recipe.objects.create(name=f'Bread {i}', instructions='Bake', user=self.user1) for i in range(3)
+        ]
+        for recipe in self.recipes:
+            RecipeIngredient.objects.create(recipe=recipe, ingredient=self.flour, quantity=1, unit='kg')
+
+    def test_detail_is_cached(self):
+        """Test that a cached recipe is served without loading its ingredients"""
+        url = reverse('recipe-detail', args=[self.recipes[0].id])
+        first = self.client.get(url).data
+        # auth user lookup, recipe
+        with self.assertNumQueries(2):
+            self.assertEqual(self.client.get(url).data, first)
+
+    def test_list_reuses_fragments(self):
+        """Test that after one edit only that recipe is serialized again"""
+        url = reverse('recipe-list') + '?expand=ingredients'
+        self.client.get(url)
+        RecipeIngredient.objects.create(recipe=self.recipes[1], ingredient=self.flour, quantity=2, unit='cup')
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        # auth user lookup, page, ingredients of the edited recipe only
+        self.assertEqual(len(ctx.captured_queries), 3)
+        self.assertIn(f'IN ({self.recipes[1].id})', ctx.captured_queries[2]['sql'])
+        lines = {recipe['id']: len(recipe['ingredients']) for recipe in response.data['results']}
+        self.assertEqual(lines, {self.recipes[0].id: 1, self.recipes[1].id: 2, self.recipes[2].id: 1})
+
+    def test_ingredient_changes_invalidate(self):
+        """Test that renaming an ingredient refreshes every recipe using it"""
+        url = reverse('recipe-list') + '?expand=ingredients'
+        self.client.get(url)
+        self.flour.name = 'Rye flour'
+        self.flour.save()
+        names = {recipe['ingredients'][0]['ingredient']['name'] for recipe in self.client.get(url).data['results']}
+        self.assertEqual(names, {'Rye flour'})
+
+    def test_stale_entry_is_ignored(self):
+        """Test that an entry written for an older updated_at is not served"""
+        url = reverse('recipe-detail', args=[self.recipes[0].id])
+        self.client.get(url)
+        Recipe.objects.filter(pk=self.recipes[0].pk).update(name='Renamed', updated_at=timezone.now())
+        self.assertEqual(self.client.get(url).data['name'], 'Renamed')
+
+class StreamingListTests(BaseAPITest):
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.addCleanup(cache.clear)
+        flour = Ingredient.objects.create(name='Flour', category='pantry')
+        for i in range(7):
+            recipe = Recipe.objects.create(name=f'Bread {i}', instructions='Bake', user=self.user1)
+            RecipeIngredient.objects.create(recipe=recipe, ingredient=flour, quantity=i + 1, unit='kg')
+
+    def test_stream_matches_pages(self):
+        """Test that the streamed array holds every recipe exactly as the pages do"""
+        pages = self.client.get(reverse('recipe-list') + '?page_size=200').json()['results']
+        response = self.client.get(reverse('recipe-list') + '?stream=true')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'application/json')
+        self.assertEqual(json.loads(b''.join(response.streaming_content)), pages)
+
+    def test_stream_reads_in_chunks(self):
+        """Test that each chunk of rows adds one query for its ingredient lines"""
+        with mock.patch('api.conditional.STREAM_CHUNK_SIZE', 3):
+            response = self.client.get(reverse('recipe-list') + '?stream=true&expand=ingredients')
+            with CaptureQueriesContext(connection) as ctx:
+                content = b''.join(response.streaming_content)
+        # recipes, then ingredient lines for chunks of 3, 3 and 1
+        self.assertEqual(len(ctx.captured_queries), 4)
+        self.assertEqual(len(json.loads(content)), 7)
+
+    def test_stream_empty(self):
+        """Test that an empty list streams as an empty array"""
+        response = self.client.get(reverse('meal-plan-list') + '?stream=true')
+        self.assertEqual(b''.join(response.streaming_content), b'[]')
+
+class SparseFieldsetTests(BaseAPITest):
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.addCleanup(cache.clear)
+        flour = Ingredient.objects.create(name='Flour', category='pantry')
+        self.recipe = Recipe.objects.create(name='Bread', instructions='Knead and bake', prep_time=20, user=self.user1)
+        RecipeIngredient.objects.create(recipe=self.recipe, ingredient=flour, quantity=1, unit='kg')
+        self.plan = MealPlan.objects.create(user=self.user1, start_date='2025-03-03', name='Week')
+        MealSlot.objects.create(meal_plan=self.plan, recipe=self.recipe, date='2025-03-03', meal_type='dinner')
+
+    def test_list_defaults_to_summary(self):
+        """Test that the recipe list leaves out instructions and ingredients without querying them"""
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse('recipe-list'))
+        # auth user lookup, recipes
+        self.assertEqual(len(ctx.captured_queries), 2)
+        self.assertNotIn('instructions', ctx.captured_queries[1]['sql'])
+        item = response.data['results'][0]
+        self.assertEqual(item['name'], 'Bread')
+        self.assertNotIn('instructions', item)
+        self.assertNotIn('ingredients', item)
+
+    def test_detail_is_full(self):
+        """Test that a single recipe still has every field"""
+        response = self.client.get(reverse('recipe-detail', args=[self.recipe.id]))
+        self.assertEqual(response.data['instructions'], 'Knead and bake')
+        self.assertEqual(len(response.data['ingredients']), 1)
+
+    def test_fields(self):
+        """Test that ?fields= selects only those columns, always with the id"""
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse('recipe-list'), {'fields': 'name,prep_time'})
+        self.assertEqual(response.data['results'], [{'id': self.recipe.id, 'name': 'Bread', 'prep_time': 20}])
+        self.assertNotIn('description', ctx.captured_queries[1]['sql'])
+
+        response = self.client.get(reverse('recipe-detail', args=[self.recipe.id]), {'fields': 'instructions'})
+        self.assertEqual(response.data, {'id': self.recipe.id, 'instructions': 'Knead and bake'})
+
+    def test_expand(self):
+        """Test that ?expand= adds the nested lists to the summary or the chosen fields"""
+        response = self.client.get(reverse('recipe-list'), {'fields': 'name', 'expand': 'ingredients'})
+        item = response.data['results'][0]
+        self.assertEqual(set(item), {'id', 'name', 'ingredients'})
+        self.assertEqual(item['ingredients'][0]['ingredient']['name'], 'Flour')
+
+        plans = self.client.get(reverse('meal-plan-list')).data['results']
+        self.assertNotIn('meal_slots', plans[0])
+        plans = self.client.get(reverse('meal-plan-list'), {'expand': 'meal_slots'}).data['results']
+        self.assertEqual(plans[0]['meal_slots'][0]['meal_type'], 'dinner')
+
+    def test_unknown_names(self):
+        """Test that unknown fields and fields that cannot be expanded are rejected"""
+        response = self.client.get(reverse('recipe-list'), {'fields': 'name,secret'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('fields', response.data)
+        response = self.client.get(reverse('meal-plan-list'), {'expand': 'name'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('expand', response.data)
+
+    def test_writes_return_full_recipe(self):
+        """Test that updates still answer with the full representation"""
+        response = self.client.patch(
+            reverse('recipe-detail', args=[self.recipe.id]) + '?fields=name', {'name': 'Rye bread'}, format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['instructions'], 'Knead and bake')
+
+class MealPlanRepresentationTests(BaseAPITest):
+    def setUp(self):
+        super().setUp()
+        self.plan = MealPlan.objects.create(user=self.user1, start_date='2025-03-03')
+        self.soup = Recipe.objects.create(name='Soup', instructions='Boil', prep_time=10, cook_time=30, user=self.user1)
+        self.toast = Recipe.objects.create(name='Toast', instructions='Toast', prep_time=2, user=self.user1)
+        MealSlot.objects.create(meal_plan=self.plan, recipe=self.soup, date='2025-03-03', meal_type='dinner')
+        MealSlot.objects.create(meal_plan=self.plan, recipe=self.toast, date='2025-03-04', meal_type='breakfast')
+        MealSlot.objects.create(meal_plan=self.plan, date='2025-03-05', meal_type='lunch', notes='Eat out')
+        self.url = reverse('meal-plan-detail', args=[self.plan.id])
+
+    def test_slots_carry_recipe(self):
+        """Test that slots have their recipe's name and times inline"""
+        slots = self.client.get(self.url).data['meal_slots']
+        self.assertEqual(
+            [(slot['recipe'], slot['recipe_name'], slot['recipe_prep_time'], slot['recipe_cook_time']) for slot in slots],
+            [(self.soup.id, 'Soup', 10, 30), (self.toast.id, 'Toast', 2, None), (None, None, None, None)]
+        )
+
+    def test_query_count_is_constant(self):
+        """Test that a plan and a page of plans with slots take a fixed number of queries"""
+        # auth user lookup, plan, slots joined with their recipes
+        with self.assertNumQueries(3):
+            self.client.get(self.url)
+        for day in range(10, 20):
+            plan = MealPlan.objects.create(user=self.user1, start_date=f'2025-03-{day}')
+            MealSlot.objects.create(meal_plan=plan, recipe=self.soup, date=f'2025-03-{day}', meal_type='lunch')
+        with self.assertNumQueries(3):
+            response = self.client.get(reverse('meal-plan-list'), {'expand': 'meal_slots'})
+        self.assertEqual(len(response.data['results']), 11)
+
+    def test_update_query_count(self):
+        """Test that an update answers with the slots' recipes without a query per slot"""
+        # auth user lookup, plan, update, plan, slots joined with their recipes
+        with self.assertNumQueries(5):
+            response = self.client.patch(self.url, {'name': 'Spring week'}, format='json')
+        self.assertEqual(response.data['name'], 'Spring week')
+        self.assertEqual(response.data['meal_slots'][1]['recipe_name'], 'Toast')
+
+    def test_week_layout(self):
+        """Test that ?layout=week returns every day and meal type of the week"""
+        response = self.client.get(self.url, {'layout': 'week'})
+        self.assertNotIn('meal_slots', response.data)
+        days = response.data['days']
+        self.assertEqual(list(days), [f'2025-03-{day:02d}' for day in range(3, 10)])
+        self.assertEqual(list(days['2025-03-03']), ['breakfast', 'lunch', 'dinner', 'snack'])
+        self.assertEqual(days['2025-03-03']['dinner']['recipe_name'], 'Soup')
+        self.assertIsNone(days['2025-03-03']['lunch'])
+        self.assertEqual(days['2025-03-05']['lunch']['notes'], 'Eat out')
+
+        plans = self.client.get(reverse('meal-plan-list'), {'layout': 'week', 'fields': 'name'}).data['results']
+        self.assertEqual(set(plans[0]), {'id', 'name', 'start_date', 'days'})
+        self.assertEqual(self.client.get(self.url, {'layout': 'month'}).status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_recipe_rename_changes_plan(self):
+        """Test that renaming a slot's recipe changes the plan's ETag"""
+        etag = self.client.get(self.url)['ETag']
+        self.soup.servings = 4
+        self.soup.save(update_fields=['servings'])
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, status.HTTP_304_NOT_MODIFIED)
+        self.soup.name = 'Tomato soup'
+        self.soup.save()
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['meal_slots'][0]['recipe_name'], 'Tomato soup')
+
+class ShoppingListTests(BaseAPITest):
+    def setUp(self):
+        super().setUp()
+        self.flour = Ingredient.objects.create(name='Flour', category='pantry')
+        self.milk = Ingredient.objects.create(name='Milk', category='dairy')
+        self.eggs = Ingredient.objects.create(name='Eggs', category='dairy')
+        self.onion = Ingredient.objects.create(name='Onion', category='produce')
+        self.pancakes = Recipe.objects.create(name='Pancakes', instructions='Mix', servings=4, user=self.user1)
+        RecipeIngredient.objects.create(recipe=self.pancakes, ingredient=self.flour, quantity=2, unit='cup')
+        RecipeIngredient.objects.create(recipe=self.pancakes, ingredient=self.milk, quantity=500, unit='ml')
+        RecipeIngredient.objects.create(recipe=self.pancakes, ingredient=self.eggs, quantity=2, unit='whole')
+        self.soup = Recipe.objects.create(name='Soup', instructions='Boil', user=self.user1)
+        RecipeIngredient.objects.create(recipe=self.soup, ingredient=self.milk, quantity=1, unit='l')
+        RecipeIngredient.objects.create(recipe=self.soup, ingredient=self.onion, quantity=1, unit='lb')
+        self.plan = MealPlan.objects.create(user=self.user1, start_date='2025-03-03')
+        MealSlot.objects.create(
+            meal_plan=self.plan, recipe=self.pancakes, date='2025-03-03', meal_type='breakfast', servings=2
+        )
+        MealSlot.objects.create(
+            meal_plan=self.plan, recipe=self.pancakes, date='2025-03-04', meal_type='breakfast', servings=6
+        )
+        MealSlot.objects.create(
+            meal_plan=self.plan, recipe=self.soup, date='2025-03-04', meal_type='dinner', servings=3
+        )
+        MealSlot.objects.create(meal_plan=self.plan, date='2025-03-05', meal_type='lunch')
+        self.url = reverse('meal-plan-shopping-list', args=[self.plan.id])
+
+    def test_shopping_list_scales_and_normalizes(self):
+        """Test that quantities are scaled by servings, converted and grouped by category"""
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['meal_plan'], self.plan.id)
+        self.assertEqual([group['category'] for group in response.data['categories']], ['produce', 'dairy', 'pantry'])
+        items = {
+            item['name']: (item['quantity'], item['unit'])
+            for group in response.data['categories'] for item in group['items']
+        }
+        # Pancakes for 2 + 6 servings of a 4 serving recipe is two batches,
+        # soup has no servings and is used as written
+        self.assertEqual(items, {
+            'Flour': ('946.35', 'ml'),
+            'Milk': ('2000.00', 'ml'),
+            'Eggs': ('4.00', 'whole'),
+            'Onion': ('453.59', 'g'),
+        })
+
+    def test_shopping_list_is_one_select(self):
+        """Test that reading the list does not recompute it from the slots"""
+        for day in range(10, 30):
+            MealSlot.objects.create(
+                meal_plan=self.plan, recipe=self.pancakes, date=f'2025-03-{day}', meal_type='dinner'
+            )
+        # Authenticated user, meal plan, stored shopping list rows
+        with self.assertNumQueries(3):
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_shopping_list_is_private(self):
+        """Test that another user's meal plan is not found"""
+        other_plan = MealPlan.objects.create(user=self.user2, start_date='2025-03-03')
+        response = self.client.get(reverse('meal-plan-shopping-list', args=[other_plan.id]))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+class RecipeSearchTests(BaseAPITest):
+    def setUp(self):
+        super().setUp()
+        self.url = reverse('recipe-list')
+        basil = Ingredient.objects.create(name='Basil', category='produce')
+        self.pesto = Recipe.objects.create(
+            name='Pesto Pasta', description='Quick weeknight dinner', instructions='Blend and toss', user=self.user1
+        )
+        RecipeIngredient.objects.create(recipe=self.pesto, ingredient=basil, quantity=1, unit='cup')
+        self.soup = Recipe.objects.create(
+            name='Tomato Soup', description='Goes with pasta', instructions='Simmer tomatoes', user=self.user1
+        )
+        self.salad = Recipe.objects.create(
+            name='Caprese Salad', instructions='Slice and layer, garnish with basil leaves', user=self.user2
+        )
+
+    def search(self, query, **params):
+        response = self.client.get(self.url, {'q': query, **params})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response
+
+    def test_search_ranks_name_matches_first(self):
+        """Test that matches in the name outrank matches in other fields"""
+        results = self.search('pasta').data['results']
+        self.assertEqual([recipe['name'] for recipe in results], ['Pesto Pasta', 'Tomato Soup'])
+        results = self.search('basil').data['results']
+        self.assertEqual([recipe['name'] for recipe in results], ['Pesto Pasta', 'Caprese Salad'])
+
+    def test_search_stems_and_requires_every_word(self):
+        """Test that words are stemmed and all of them must match"""
+        self.assertEqual([r['name'] for r in self.search('tomato simmering').data['results']], ['Tomato Soup'])
+        self.assertEqual(self.search('tomato basil').data['results'], [])
+        self.assertEqual(self.search('"OR* (').data['results'], [])
+
+    def test_search_follows_edits(self):
+        """Test that the index follows recipe and ingredient changes"""
+        self.soup.name = 'Gazpacho'
+        self.soup.save()
+        self.assertEqual([r['name'] for r in self.search('gazpacho').data['results']], ['Gazpacho'])
+        Ingredient.objects.filter(name='Basil').get().delete()
+        self.assertEqual([r['name'] for r in self.search('basil').data['results']], ['Caprese Salad'])
+        self.pesto.delete()
+        self.assertEqual([r['name'] for r in self.search('pasta').data['results']], ['Gazpacho'])
+
+    def test_search_with_api_ingredients(self):
+        """Test that ingredients saved through the API are searchable"""
+        response = self.client.post(self.url, {
+            'name': 'Flatbread', 'instructions': 'Bake',
+            'ingredients': [{'ingredient': {'name': 'Za\'atar'}, 'quantity': '2', 'unit': 'tbsp'}],
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual([r['name'] for r in self.search('za atar').data['results']], ['Flatbread'])
+
+    def test_search_pagination(self):
+        """Test that ranked results are paged with next and previous links"""
+        first = self.search('pasta', page_size=1)
+        self.assertEqual([r['name'] for r in first.data['results']], ['Pesto Pasta'])
+        self.assertIsNone(first.data['previous'])
+        second = self.client.get(first.data['next'])
+        self.assertEqual([r['name'] for r in second.data['results']], ['Tomato Soup'])
+        self.assertIsNone(second.data['next'])
+        self.assertIsNotNone(second.data['previous'])
+
+    def test_search_query_count(self):
+        """Test that a search page costs the same queries as a plain list page"""
+        # Authenticated user, ranked recipes, prefetched ingredient lines
+        with self.assertNumQueries(3):
+            self.search('pasta', expand='ingredients')
+
+class CookableRecipeTests(BaseAPITest):
+    def setUp(self):
+        super().setUp()
+        pantry_index.clear()
+        self.addCleanup(pantry_index.clear)
+        self.url = reverse('recipe-cookable')
+        self.eggs, self.flour, self.milk, self.chives = (
+            Ingredient.objects.create(name=name, category='other') for name in ('Eggs', 'Flour', 'Milk', 'Chives')
+        )
+        self.omelette = Recipe.objects.create(name='Omelette', instructions='Whisk', user=self.user1)
+        RecipeIngredient.objects.create(recipe=self.omelette, ingredient=self.eggs, quantity=3, unit='whole')
+        RecipeIngredient.objects.create(
+            recipe=self.omelette, ingredient=self.chives, quantity=1, unit='tbsp', optional=True
+        )
+        self.pancakes = Recipe.objects.create(name='Pancakes', instructions='Mix', user=self.user1)
+        for ingredient in (self.eggs, self.flour, self.milk):
+            RecipeIngredient.objects.create(recipe=self.pancakes, ingredient=ingredient, quantity=1, unit='cup')
+
+    def cookable(self, *ingredients, **params):
+        response = self.client.get(self.url, {'ingredients': ','.join(str(i.id) for i in ingredients), **params})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [(result['name'], result['missing'], [i['name'] for i in result['missing_ingredients']])
+                for result in response.data]
+
+    def test_cookable_ranks_by_missing_ingredients(self):
+        """Test that recipes are ranked by missing ingredients, ignoring optional ones"""
+        self.assertEqual(self.cookable(self.eggs), [('Omelette', 0, []), ('Pancakes', 2, ['Flour', 'Milk'])])
+        self.assertEqual(self.cookable(self.eggs, self.flour, max_missing=0), [('Omelette', 0, [])])
+        self.assertEqual(self.cookable(self.chives), [('Omelette', 1, ['Eggs'])])
+
+    def test_cookable_follows_changes(self):
+        """Test that committed recipe changes reach the loaded index"""
+        self.cookable(self.eggs)
+        with self.captureOnCommitCallbacks(execute=True):
+            RecipeIngredient.objects.filter(recipe=self.pancakes, ingredient=self.milk).delete()
+            RecipeIngredient.objects.create(recipe=self.omelette, ingredient=self.milk, quantity=1, unit='cup')
+        self.assertEqual(
+            self.cookable(self.eggs, self.flour), [('Pancakes', 0, []), ('Omelette', 1, ['Milk'])]
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            self.omelette.delete()
+        self.assertEqual(self.cookable(self.eggs), [('Pancakes', 1, ['Flour'])])
+
+    def test_cookable_fills_the_page_past_stale_recipes(self):
+        """Test that recipes the index ranks on stale counts are dropped
+        without leaving the page short"""
+        butter = Ingredient.objects.create(name='Butter', category='dairy')
+        crepes = Recipe.objects.create(name='Crepes', instructions='Swirl', user=self.user1)
+        for ingredient in (self.eggs, self.flour, self.milk):
+            RecipeIngredient.objects.create(recipe=crepes, ingredient=ingredient, quantity=1, unit='cup')
+        self.cookable(self.eggs)
+        # Written without running the commit hooks, as by another process
+        for recipe in (crepes, self.pancakes):
+            RecipeIngredient.objects.create(recipe=recipe, ingredient=butter, quantity=1, unit='tbsp')
+        self.assertEqual(
+            self.cookable(self.eggs, self.flour, self.milk, max_missing=0, limit=1), [('Omelette', 0, [])]
+        )
+        self.assertEqual(
+            self.cookable(self.eggs, self.flour, self.milk, limit=2),
+            [('Omelette', 0, []), ('Crepes', 1, ['Butter'])]
+        )
+
+    def test_cookable_requires_ingredients(self):
+        """Test that the pantry must be a list of ids"""
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.get(self.url, {'ingredients': 'eggs'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+class IngredientAutocompleteTests(BaseAPITest):
+    def setUp(self):
+        super().setUp()
+        self.url = reverse('ingredient-autocomplete')
+        for name in ('Onion', 'Green onions', 'Olive oil'):
+            Ingredient.objects.create(name=name, category='produce')
+
+    def test_autocomplete(self):
+        """Test that matching ingredients are returned best first"""
+        response = self.client.get(self.url, {'q': 'Oni'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([match['name'] for match in response.data], ['Onion', 'Green onions'])
+        self.assertEqual(response.data[0]['score'], 0.75)
+
+        response = self.client.get(self.url, {'q': 'oil', 'limit': 1})
+        self.assertEqual([match['name'] for match in response.data], ['Olive oil'])
+
+    def test_autocomplete_requires_query(self):
+        """Test that q is required and limit is bounded"""
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.get(self.url, {'q': 'oil', 'limit': 500})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+class RecipeScalingTests(BaseAPITest):
+    def setUp(self):
+        super().setUp()
+        flour = Ingredient.objects.create(name='Flour', category='pantry')
+        eggs = Ingredient.objects.create(name='Eggs', category='dairy')
+        salt = Ingredient.objects.create(name='Salt', category='spices')
+        self.pancakes = Recipe.objects.create(name='Pancakes', instructions='Mix', servings=4, user=self.user1)
+        RecipeIngredient.objects.create(recipe=self.pancakes, ingredient=flour, quantity=Decimal('1.5'), unit='cup')
+        RecipeIngredient.objects.create(recipe=self.pancakes, ingredient=eggs, quantity=2, unit='whole', order=1)
+        RecipeIngredient.objects.create(recipe=self.pancakes, ingredient=salt, quantity=Decimal('0.25'), unit='tsp', order=2)
+        self.bread = Recipe.objects.create(name='Bread', instructions='Bake', user=self.user2)
+        RecipeIngredient.objects.create(recipe=self.bread, ingredient=flour, quantity=500, unit='g')
+
+    def test_scaled_recipe(self):
+        """Test scaling a recipe rounds to measurable kitchen amounts"""
+        url = reverse('recipe-scaled', args=[self.pancakes.id])
+        response = self.client.get(url, {'servings': 3})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['base_servings'], 4)
+        self.assertEqual(
+            [(line['ingredient']['name'], line['quantity'], line['display'], line['unit'])
+             for line in response.data['ingredients']],
+            [('Flour', '1.25', '1 1/4', 'cup'), ('Eggs', '1.50', '1 1/2', 'whole'), ('Salt', '0.25', '1/4', 'tsp')]
+        )
+
+    def test_scaled_requires_servings(self):
+        """Test that servings must be a positive number"""
+        url = reverse('recipe-scaled', args=[self.pancakes.id])
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.client.get(url, {'servings': 0}).status_code, status.HTTP_400_BAD_REQUEST)
+        missing = reverse('recipe-scaled', args=[self.bread.id + 100])
+        self.assertEqual(self.client.get(missing, {'servings': 2}).status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_scaled_batch(self):
+        """Test that a batch of recipes is scaled with a constant number of queries"""
+        url = reverse('recipe-scaled-batch')
+        items = [{'recipe': self.pancakes.id, 'servings': servings} for servings in range(1, 9)]
+        items.append({'recipe': self.bread.id, 'servings': 6})
+        # Authenticated user, recipes, ingredient lines
+        with self.assertNumQueries(3):
+            response = self.client.post(url, {'items': items}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([result['servings'] for result in response.data], list(range(1, 9)) + [6])
+        self.assertEqual(response.data[7]['ingredients'][0]['display'], '3')
+        # Recipes without servings are used as written
+        self.assertEqual(response.data[8]['ingredients'][0]['quantity'], '500.00')
+
+    def test_scaled_batch_unknown_recipe(self):
+        """Test that unknown recipe ids are rejected"""
+        url = reverse('recipe-scaled-batch')
+        response = self.client.post(url, {'items': [{'recipe': 999999, 'servings': 2}]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('999999', response.data['error'])
+        response = self.client.post(url, {'items': []}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+class CalendarTests(BaseAPITest):
+    def setUp(self):
+        super().setUp()
+        for day in ('2025-02-27', '2025-03-01', '2025-03-15', '2025-03-31', '2025-04-01'):
+            Event.objects.create(title=f'Event {day}', date=day, time='12:00:00', user=self.user1)
+        Event.objects.create(title='Other user', date='2025-03-15', time='12:00:00', user=self.user2)
+        recipe = Recipe.objects.create(name='Soup', instructions='Boil', user=self.user1)
+        plan = MealPlan.objects.create(user=self.user1, start_date='2025-03-01')
+        for day in ('2025-02-28', '2025-03-02', '2025-03-20'):
+            MealSlot.objects.create(meal_plan=plan, recipe=recipe, date=day, meal_type='dinner')
+        MealSlot.objects.create(meal_plan=plan, date='2025-03-21', meal_type='lunch')
+        other_plan = MealPlan.objects.create(user=self.user2, start_date='2025-03-01')
+        MealSlot.objects.create(meal_plan=other_plan, date='2025-03-02', meal_type='dinner')
+
+    def test_event_range_filter(self):
+        """Test that ?start=&end= limits events to the range, both ends included"""
+        response = self.client.get(reverse('event-list'), {'start': '2025-03-01', 'end': '2025-03-31'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [event['date'] for event in response.data['results']],
+            ['2025-03-01', '2025-03-15', '2025-03-31']
+        )
+        response = self.client.get(reverse('event-list'), {'start': '2025-03-31'})
+        self.assertEqual(len(response.data['results']), 2)
+
+    def test_meal_slot_range_filter(self):
+        """Test that ?start=&end= limits the user's meal slots to the range"""
+        response = self.client.get(reverse('meal-slot-list'), {'start': '2025-03-01', 'end': '2025-03-20'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([slot['date'] for slot in response.data['results']], ['2025-03-02', '2025-03-20'])
+
+    def test_invalid_range(self):
+        """Test that malformed or reversed ranges are rejected"""
+        url = reverse('event-list')
+        self.assertEqual(self.client.get(url, {'start': 'March'}).status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.client.get(url, {'start': '2025-02-30'}).status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.get(url, {'start': '2025-03-02', 'end': '2025-03-01'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_calendar(self):
+        """Test that the calendar returns the range's events and meal slots in one query each"""
+        # Authenticated user, events, meal slots with their recipes
+        with self.assertNumQueries(3):
+            response = self.client.get(reverse('calendar'), {'start': '2025-03-01', 'end': '2025-03-31'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([event['title'] for event in response.data['events']], [
+            'Event 2025-03-01', 'Event 2025-03-15', 'Event 2025-03-31'
+        ])
+        self.assertEqual(
+            [(slot['date'], slot['recipe_name']) for slot in response.data['meal_slots']],
+            [('2025-03-02', 'Soup'), ('2025-03-20', 'Soup'), ('2025-03-21', None)]
+        )
+
+    def test_calendar_requires_bounded_range(self):
+        """Test that the calendar needs both dates and a limited span"""
+        url = reverse('calendar')
+        self.assertEqual(self.client.get(url, {'start': '2025-03-01'}).status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.get(url, {'start': '2025-01-01', 'end': '2025-12-31'})
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
 
 class AuthenticationTests(APITestCase):
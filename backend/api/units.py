@@ -0,0 +1,158 @@
+from decimal import Decimal
+from fractions import Fraction
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+from .models import RecipeIngredient, normalize_ingredient_name
+
+# Canonical base for each mass and volume unit in RecipeIngredient.UNIT_CHOICES
+# and how many base units one of it is. Count-like units (piece, whole, pkg,
+# slice, pinch) have no common base and stay as they are. This is the only
+# table of unit sizes: CONVERSION_MATRIX is derived from it, and shopping
+# lists convert through convert().
+UNIT_BASES = {
+    'g': ('g', Decimal('1')),
+    'kg': ('g', Decimal('1000')),
+    'oz': ('g', Decimal('28.349523125')),
+    'lb': ('g', Decimal('453.59237')),
+    'ml': ('ml', Decimal('1')),
+    'l': ('ml', Decimal('1000')),
+    'tsp': ('ml', Decimal('4.92892159375')),
+    'tbsp': ('ml', Decimal('14.78676478125')),
+    'cup': ('ml', Decimal('236.5882365')),
+}
+
+# Grams per millilitre by normalized ingredient name, for volume <-> mass
+DENSITIES = {
+    'water': Decimal('1'),
+    'milk': Decimal('1.03'),
+    'buttermilk': Decimal('1.03'),
+    'heavy cream': Decimal('0.99'),
+    'yogurt': Decimal('1.03'),
+    'butter': Decimal('0.96'),
+    'oil': Decimal('0.92'),
+    'vegetable oil': Decimal('0.92'),
+    'olive oil': Decimal('0.91'),
+    'honey': Decimal('1.42'),
+    'maple syrup': Decimal('1.32'),
+    'molasses': Decimal('1.42'),
+    'flour': Decimal('0.53'),
+    'all-purpose flour': Decimal('0.53'),
+    'bread flour': Decimal('0.54'),
+    'whole wheat flour': Decimal('0.51'),
+    'sugar': Decimal('0.85'),
+    'granulated sugar': Decimal('0.85'),
+    'brown sugar': Decimal('0.93'),
+    'powdered sugar': Decimal('0.51'),
+    'cocoa powder': Decimal('0.36'),
+    'salt': Decimal('1.22'),
+    'kosher salt': Decimal('0.58'),
+    'baking soda': Decimal('0.93'),
+    'baking powder': Decimal('0.81'),
+    'rice': Decimal('0.85'),
+    'rolled oats': Decimal('0.38'),
+}
+
+
+class ConversionError(ValueError):
+    """Raised when a quantity cannot be expressed in the requested unit"""
+
+
+def canonical_unit(unit: str) -> Tuple[str, Decimal]:
+    """(base unit, factor) for unit; units without a base map to themselves"""
+    return UNIT_BASES.get(unit, (unit, Decimal('1')))
+
+
+def _build_matrix() -> Dict[Tuple[str, str], Fraction]:
+    """Exact factor for every pair of UNIT_CHOICES that share a base.
+
+    Factors are Fractions because tsp -> cup is 1/48, which no Decimal holds
+    exactly; a stored Decimal factor would turn 48 tsp into 0.99...9 cup.
+    """
+    units = [unit for unit, _ in RecipeIngredient.UNIT_CHOICES]
+    matrix = {}
+    for source in units:
+        source_base, source_factor = canonical_unit(source)
+        for target in units:
+            target_base, target_factor = canonical_unit(target)
+            if source_base == target_base:
+                matrix[source, target] = Fraction(source_factor) / Fraction(target_factor)
+    return matrix
+
+
+# Derived from UNIT_BASES at import, never edited by hand
+CONVERSION_MATRIX = _build_matrix()
+
+
+def to_decimal(value) -> Decimal:
+    """value as a Decimal without expanding a binary float.
+
+    Floats, as returned by parse_quantity, are read from their shortest repr
+    so 0.1 becomes Decimal('0.1').
+    """
+    if isinstance(value, Decimal):
+        return value
+    if isinstance(value, float):
+        return Decimal(repr(value))
+    if isinstance(value, Fraction):
+        return Decimal(value.numerator) / Decimal(value.denominator)
+    return Decimal(value)
+
+
+def conversion_factor(from_unit: str, to_unit: str, ingredient: Optional[str] = None) -> Fraction:
+    """Exact factor from from_unit to to_unit.
+
+    Volume <-> mass needs the ingredient's density from DENSITIES. Raises
+    ConversionError when there is no way to convert.
+    """
+    factor = CONVERSION_MATRIX.get((from_unit, to_unit))
+    if factor is not None:
+        return factor
+    if from_unit == to_unit:
+        # A unit no longer in UNIT_CHOICES, still found on old rows
+        return Fraction(1)
+    source_base, source_factor = canonical_unit(from_unit)
+    target_base, target_factor = canonical_unit(to_unit)
+    if {source_base, target_base} != {'g', 'ml'}:
+        raise ConversionError(f'Cannot convert {from_unit} to {to_unit}')
+    density = DENSITIES.get(normalize_ingredient_name(ingredient or ''))
+    if density is None:
+        raise ConversionError(f'No density known for {ingredient!r} to convert {from_unit} to {to_unit}')
+    if source_base == 'ml':
+        return Fraction(source_factor) * Fraction(density) / Fraction(target_factor)
+    return Fraction(source_factor) / Fraction(density) / Fraction(target_factor)
+
+
+def convert(quantities: Sequence, from_units: Union[str, Sequence[str]], to_unit: str,
+            ingredients: Union[None, str, Sequence[Optional[str]]] = None) -> List[Decimal]:
+    """Convert a batch of quantities to to_unit.
+
+    from_units and ingredients are either one value for every quantity or
+    sequences lined up with quantities; ingredient names are only used for
+    volume <-> mass. Factors are resolved once per distinct unit (and
+    ingredient, when a density is needed). Each result is the exact product
+    of the quantity and the factor's numerator with at most one Decimal
+    division, so a conversion with an exact answer returns it.
+    """
+    count = len(quantities)
+    if isinstance(from_units, str):
+        from_units = [from_units] * count
+    if ingredients is None or isinstance(ingredients, str):
+        ingredients = [ingredients] * count
+    if not len(from_units) == len(ingredients) == count:
+        raise ValueError('quantities, from_units and ingredients must be the same length')
+
+    factors = {}
+    results = []
+    for quantity, unit, ingredient in zip(quantities, from_units, ingredients):
+        key = unit if (unit, to_unit) in CONVERSION_MATRIX else (unit, ingredient)
+        factor = factors.get(key)
+        if factor is None:
+            fraction = conversion_factor(unit, to_unit, ingredient)
+            factor = factors[key] = (Decimal(fraction.numerator), Decimal(fraction.denominator))
+        numerator, denominator = factor
+        amount = to_decimal(quantity) * numerator
+        results.append(amount if denominator == 1 else amount / denominator)
+    return results
+
+
+def convert_one(quantity, from_unit: str, to_unit: str, ingredient: Optional[str] = None) -> Decimal:
+    return convert([quantity], from_unit, to_unit, ingredient)[0]
@@ -5,10 +5,13 @@ from . import views
 router = DefaultRouter()
 router.register(r'events', views.EventViewSet, basename='event')
 router.register(r'recipes', views.RecipeViewSet, basename='recipe')
+router.register(r'recipe-imports', views.RecipeImportJobViewSet, basename='recipe-import')
 router.register(r'meal-plans', views.MealPlanViewSet, basename='meal-plan')
 router.register(r'meal-slots', views.MealSlotViewSet, basename='meal-slot')
 
 urlpatterns = [
     path('', include(router.urls)),
     path('register/', views.UserAPIView.as_view(), name='register'),
+    path('calendar/', views.CalendarView.as_view(), name='calendar'),
+    path('ingredients/autocomplete/', views.IngredientAutocompleteView.as_view(), name='ingredient-autocomplete'),
 ]
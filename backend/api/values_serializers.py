@@ -0,0 +1,163 @@
+"""Read-only serialization straight from .values() rows.
+
+ValuesSerializer is built once from a ModelSerializer class and produces
+the same output as that serializer without instantiating serializers,
+fields or model instances per object. The serializer's fields become
+values() lookups. Nested serializers on forward relations are joined into
+the same query. Nested lists are loaded with one values() query per level
+for all parents at once, in the child model's default ordering like the
+prefetches of optimize_queryset.
+
+Only the representations that are not already JSON ready (dates, times,
+decimals) go through the DRF field's to_representation, and None is
+passed through as Serializer.to_representation does.
+
+Fields it cannot compute from columns (method fields, source='*',
+many-to-many primary keys) raise ImproperlyConfigured when the class is
+built, so a serializer change cannot silently produce different output.
+"""
+from decimal import Decimal
+from functools import lru_cache
+from operator import itemgetter
+from typing import Dict, Iterable, List, Sequence
+
+from django.core.exceptions import ImproperlyConfigured
+from rest_framework import serializers
+from rest_framework.settings import api_settings
+
+# Fields whose to_representation returns database values unchanged
+IDENTITY_FIELDS = (
+    serializers.CharField, serializers.ChoiceField, serializers.IntegerField,
+    serializers.BooleanField, serializers.PrimaryKeyRelatedField,
+)
+
+# Key under which serialize() attaches a nested list to its parent row
+LIST_KEY = '_list:'
+
+
+def _decimal_converter(field):
+    """DecimalField.to_representation, skipping the quantize for values the
+    database already returned with the field's decimal places"""
+    exponent = -field.decimal_places if field.decimal_places is not None else None
+    coerce_to_string = getattr(field, 'coerce_to_string', api_settings.COERCE_DECIMAL_TO_STRING)
+    plain = coerce_to_string and not field.localize and not field.normalize_output
+
+    def convert(value):
+        if plain and isinstance(value, Decimal) and value.as_tuple().exponent == exponent:
+            return format(value, 'f')
+        return field.to_representation(value)
+    return convert
+
+
+def _getter(field, lookup):
+    """Function from a values() row to the field's representation"""
+    if isinstance(field, serializers.RelatedField):
+        if not isinstance(field, serializers.PrimaryKeyRelatedField) or field.pk_field is not None:
+            raise ImproperlyConfigured(f'{field.field_name} is not a plain primary key field')
+    if isinstance(field, IDENTITY_FIELDS):
+        return itemgetter(lookup)
+    convert = _decimal_converter(field) if isinstance(field, serializers.DecimalField) else field.to_representation
+
+    def get(row):
+        value = row[lookup]
+        return None if value is None else convert(value)
+    return get
+
+
+class ValuesSerializer:
+    """Output of serializer_class computed from values() rows"""
+
+    def __init__(self, serializer_class, prefix=''):
+        self.serializer_class = serializer_class
+        self.model = serializer_class.Meta.model
+        self.columns = []   # values() lookups this level reads from its row
+        self.plan = []      # (kind, field name, details) in output order
+        self._build(serializer_class(), prefix)
+        # (field name, function of the row) in output order
+        self.getters = [(name, self._plan_getter(kind, name, details)) for kind, name, details in self.plan]
+
+    def _build(self, serializer, prefix):
+        for field in serializer.fields.values():
+            if field.write_only:
+                continue
+            name = field.field_name
+            if field.source == '*' or isinstance(field, (serializers.SerializerMethodField,
+                                                         serializers.ManyRelatedField)):
+                raise ImproperlyConfigured(f'{self.serializer_class.__name__}.{name} cannot be read from values()')
+            lookup = prefix + field.source.replace('.', '__')
+            if isinstance(field, serializers.ListSerializer):
+                self.plan.append(('many', name, self._child_list(field, lookup)))
+            elif isinstance(field, serializers.ModelSerializer):
+                nested = ValuesSerializer(type(field), prefix=lookup + '__')
+                if any(kind == 'many' for kind, _, _ in nested.plan):
+                    raise ImproperlyConfigured(f'{self.serializer_class.__name__}.{name} nests a list')
+                self.columns.extend(nested.columns)
+                self.plan.append(('nested', name, (nested, lookup + '__pk')))
+                self.columns.append(lookup + '__pk')
+            elif isinstance(field, serializers.Serializer):
+                raise ImproperlyConfigured(f'{self.serializer_class.__name__}.{name} is not a model serializer')
+            else:
+                self.columns.append(lookup)
+                self.plan.append(('value', name, _getter(field, lookup)))
+
+    def _child_list(self, field, accessor):
+        if '__' in accessor or not isinstance(field.child, serializers.ModelSerializer):
+            raise ImproperlyConfigured(f'{self.serializer_class.__name__}.{field.field_name} must be a direct list')
+        relations = [
+            relation for relation in self.model._meta.related_objects
+            if relation.get_accessor_name() == accessor and not relation.many_to_many
+        ]
+        if not relations:
+            raise ImproperlyConfigured(f'{self.model.__name__}.{accessor} is not a reverse foreign key')
+        return ValuesSerializer(type(field.child)), relations[0].field.attname
+
+    def rows(self, queryset, *extra: str):
+        """queryset as values() rows with the columns this serializer needs,
+        and any extra ones (for pagination or validators)"""
+        columns = dict.fromkeys(['pk', *self.columns, *extra])
+        return queryset.prefetch_related(None).select_related(None).values(*columns)
+
+    def _load_lists(self, rows: Sequence[Dict]) -> Dict[str, Dict]:
+        """For each nested list field, its child representations by parent pk"""
+        lists = {}
+        parent_ids = [row['pk'] for row in rows]
+        for kind, name, details in self.plan:
+            if kind != 'many':
+                continue
+            child, parent_column = details
+            by_parent = {pk: [] for pk in parent_ids}
+            if parent_ids:
+                child_rows = list(child.rows(
+                    child.model._default_manager.filter(**{f'{parent_column}__in': parent_ids}), parent_column
+                ))
+                for row, data in zip(child_rows, child.serialize(child_rows)):
+                    by_parent[row[parent_column]].append(data)
+            lists[name] = by_parent
+        return lists
+
+    @staticmethod
+    def _plan_getter(kind, name, details):
+        if kind == 'value':
+            return details
+        if kind == 'nested':
+            nested, pk_lookup = details
+            return lambda row: None if row[pk_lookup] is None else nested._represent(row)
+        # serialize() stores each row's loaded list under this key
+        return itemgetter(LIST_KEY + name)
+
+    def _represent(self, row: Dict) -> Dict:
+        return {name: get(row) for name, get in self.getters}
+
+    def serialize(self, rows: Iterable[Dict]) -> List[Dict]:
+        """Representations of rows from rows(), in order"""
+        rows = list(rows)
+        for name, by_parent in self._load_lists(rows).items():
+            for row in rows:
+                row[LIST_KEY + name] = by_parent[row['pk']]
+        return [self._represent(row) for row in rows]
+
+
+# Bounded, since api.fieldsets builds a serializer class per requested fieldset
+@lru_cache(maxsize=512)
+def values_serializer(serializer_class) -> ValuesSerializer:
+    return ValuesSerializer(serializer_class)
@@ -1,98 +1,180 @@
 from django.shortcuts import render
 from rest_framework import viewsets, status, generics
 from rest_framework.decorators import action
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.views import APIView
 from rest_framework.response import Response
+from rest_framework.reverse import reverse
 from rest_framework.permissions import IsAuthenticated
 from rest_framework_simplejwt.authentication import JWTAuthentication
 from django.contrib.auth.models import User
-from .models import Event, Recipe, Ingredient, RecipeIngredient, MealPlan, MealSlot
-from .serializers import EventSerializer, RecipeSerializer, UserSerializer, MealPlanSerializer, MealSlotSerializer
-from .services import scrape_recipe
-import requests
+from django.db import transaction
+from django.http import StreamingHttpResponse
+from django.utils.dateparse import parse_date
+from .models import Event, Recipe, Ingredient, RecipeIngredient, MealPlan, MealSlot, RecipeImportJob
+from .serializers import (
+    EventSerializer, RecipeSerializer, UserSerializer, MealPlanSerializer, MealSlotSerializer,
+    RecipeImportJobSerializer, CalendarMealSlotSerializer, CookableRecipeSerializer, CookableRequestSerializer,
+    IngredientAutocompleteRequestSerializer, IngredientMatchSerializer, ScaleBatchRequestSerializer,
+    ScaledRecipeSerializer, ScaleRequestSerializer, ShoppingListCategorySerializer, optimize_queryset,
+)
+from .services import sync_recipe_ingredients
+from .shopping_list import build_shopping_list
+from .scaling import scale_recipes
+from .search import search_recipes
+from .pantry import cookable_recipes
+from .ingredient_search import match_ingredients
+from .pagination import RankedPagePagination
+from .conditional import ConditionalGetMixin
+from .fieldsets import SparseFieldsetMixin, readable_fields
+from . import recipe_cache
+from .import_queue import enqueue_import, get_setting, import_batch, is_importable_url
+import datetime
+import json
 import logging
 
 logger = logging.getLogger(__name__)
 
-class EventViewSet(viewsets.ModelViewSet):
+# Longest range /calendar/ returns at once, enough for a month view padded to weeks
+MAX_CALENDAR_DAYS = 62
+
+# Days of a meal plan's ?layout=week grid, counted from its start_date
+MEAL_PLAN_DAYS = 7
+
+def parse_date_range(params, required=False):
+    """(start, end) dates from the ?start=&end= query parameters, both
+    inclusive and either one None when absent. Raises ValidationError for
+    malformed or reversed dates."""
+    bounds = {}
+    for name in ('start', 'end'):
+        value = params.get(name)
+        if not value:
+            if required:
+                raise ValidationError({name: 'This parameter is required.'})
+            bounds[name] = None
+            continue
+        try:
+            bounds[name] = parse_date(value)
+        except ValueError:
+            bounds[name] = None
+        if bounds[name] is None:
+            raise ValidationError({name: 'Enter a date as YYYY-MM-DD.'})
+    if bounds['start'] and bounds['end'] and bounds['end'] < bounds['start']:
+        raise ValidationError({'end': 'end must not be before start.'})
+    return bounds['start'], bounds['end']
+
+def filter_date_range(queryset, params, field='date'):
+    """Restrict queryset to ?start=&end= on field"""
+    start, end = parse_date_range(params)
+    if start:
+        queryset = queryset.filter(**{f'{field}__gte': start})
+    if end:
+        queryset = queryset.filter(**{f'{field}__lte': end})
+    return queryset
+
+def week_grid(start_date, slots):
+    """Serialized slots as {date: {meal_type: slot or None}}, every meal type
+    of the plan's week present and any slot outside the week added on its
+    own date, in date order"""
+    start = datetime.date.fromisoformat(start_date)
+    dates = {(start + datetime.timedelta(days=offset)).isoformat() for offset in range(MEAL_PLAN_DAYS)}
+    dates.update(slot['date'] for slot in slots)
+    grid = {date: {meal_type: None for meal_type, _ in MealSlot.MEAL_TYPE_CHOICES} for date in sorted(dates)}
+    for slot in slots:
+        grid[slot['date']][slot['meal_type']] = slot
+    return grid
+
+class EventViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     queryset = Event.objects.all()
     serializer_class = EventSerializer
     permission_classes = [IsAuthenticated]
     authentication_classes = [JWTAuthentication]
 
     def get_queryset(self):
-        return Event.objects.filter(user=self.request.user)
+        # Served by the (user, date, time, id) index
+        return filter_date_range(Event.objects.filter(user=self.request.user), self.request.query_params)
 
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
 
-class RecipeViewSet(viewsets.ModelViewSet):
+class RecipeViewSet(SparseFieldsetMixin, ConditionalGetMixin, viewsets.ModelViewSet):
     queryset = Recipe.objects.all()
     serializer_class = RecipeSerializer
     permission_classes = [IsAuthenticated]
     authentication_classes = [JWTAuthentication]
+    # The cards of the recipe list; instructions and ingredients come with ?expand= or the detail
+    summary_fields = [
+        'id', 'name', 'description', 'prep_time', 'cook_time', 'servings', 'difficulty',
+        'user', 'created_at', 'updated_at',
+    ]
 
     def get_queryset(self):
-        logger.debug(f"Getting recipes for user: {self.request.user}")
-        recipes = Recipe.objects.all()
-        logger.debug(f"Found {recipes.count()} recipes")
-        return recipes
+        logger.debug("Getting recipes for user: %s", self.request.user)
+        queryset = optimize_queryset(Recipe.objects.all(), self.get_serializer_class())
+        query = self.search_query
+        if query:
+            queryset = search_recipes(queryset, query).order_by('-search_rank', '-id')
+        return queryset
+
+    def serialize_rows(self, rows):
+        """Recipes with their ingredients are per-recipe fragments from the
+        recipe cache; only misses are serialized. Representations without
+        ingredients are cheap to serialize, and ?fields= selections are not
+        cached so the number of variants stays small."""
+        fields = self.get_serializer_class().Meta.fields
+        if 'ingredients' not in fields or 'fields' in self.request.query_params:
+            return super().serialize_rows(rows)
+        return recipe_cache.serialize_recipes(rows, super().serialize_rows, variant=','.join(fields))
+
+    @property
+    def search_query(self):
+        """?q= on the list, the full-text search terms"""
+        if self.action != 'list':
+            return ''
+        return self.request.query_params.get('q', '').strip()
+
+    @property
+    def paginator(self):
+        # Search results are ordered by rank, which the cursor cannot follow
+        if self.search_query and not hasattr(self, '_paginator'):
+            self._paginator = RankedPagePagination()
+        return super().paginator
 
     def create(self, request, *args, **kwargs):
-        logger.debug(f"Creating recipe with data: {request.data}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Creating recipe with data: %s", request.data)
         ingredients_data = request.data.pop('ingredients', [])
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
-        recipe = serializer.save(user=self.request.user)
-        
-        # Handle ingredients
-        self._handle_ingredients(recipe, ingredients_data)
-        
-        # Get updated recipe data
-        updated_serializer = self.get_serializer(recipe)
+        with transaction.atomic():
+            recipe = serializer.save(user=self.request.user)
+            sync_recipe_ingredients(recipe, ingredients_data)
+
+        # Reload through get_queryset so the response is served with prefetching
+        updated_serializer = self.get_serializer(self.get_queryset().get(pk=recipe.pk))
         return Response(updated_serializer.data, status=status.HTTP_201_CREATED)
 
     def update(self, request, *args, **kwargs):
-        logger.debug(f"Updating recipe with data: {request.data}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Updating recipe with data: %s", request.data)
         data = request.data.copy()  # Create a mutable copy
-        ingredients_data = data.pop('ingredients', [])
+        ingredients_data = data.pop('ingredients', None)
         instance = self.get_object()
         
         serializer = self.get_serializer(instance, data=data, partial=True)
         serializer.is_valid(raise_exception=True)
-        recipe = serializer.save()
-
-        # Clear existing ingredients and add new ones
-        RecipeIngredient.objects.filter(recipe=recipe).delete()
-        self._handle_ingredients(recipe, ingredients_data)
+        with transaction.atomic():
+            recipe = serializer.save()
+            # Leave the ingredient lines alone when the request omits them
+            if ingredients_data is not None:
+                sync_recipe_ingredients(recipe, ingredients_data)
 
-        # Get updated recipe data
-        updated_serializer = self.get_serializer(recipe)
+        # Reload so the response does not use the stale prefetched ingredients
+        updated_serializer = self.get_serializer(self.get_queryset().get(pk=recipe.pk))
         return Response(updated_serializer.data)
 
-    def _handle_ingredients(self, recipe, ingredients_data):
-        """Helper method to handle ingredient creation and linking"""
-        logger.debug(f"Handling ingredients for recipe {recipe.id}: {ingredients_data}")
-        
-        for ing_data in ingredients_data:
-            ingredient_info = ing_data.get('ingredient', {})
-            
-            # Get or create the ingredient
-            ingredient, _ = Ingredient.objects.get_or_create(
-                name=ingredient_info['name'].lower(),
-                defaults={'category': 'other'}
-            )
-            
-            # Create the recipe-ingredient relationship
-            RecipeIngredient.objects.create(
-                recipe=recipe,
-                ingredient=ingredient,
-                quantity=ing_data.get('quantity', 0),
-                unit=ing_data.get('unit', ''),
-                notes=ing_data.get('notes', '')
-            )
-        
     def list(self, request, *args, **kwargs):
-        logger.debug(f"Recipe list request from user: {request.user}")
+        logger.debug("Recipe list request from user: %s", request.user)
         return super().list(request, *args, **kwargs)
 
     def perform_create(self, serializer):
@@ -100,28 +182,133 @@ class RecipeViewSet(viewsets.ModelViewSet):
         
     @action(detail=False, methods=['post'])
     def import_from_url(self, request):
+        """Queue an import of the recipe at url; poll the returned job for the result"""
         url = request.data.get('url')
         if not url:
             return Response({'error': 'URL is required'}, status=status.HTTP_400_BAD_REQUEST)
-            
+        if not is_importable_url(url):
+            return Response({'error': 'URL must be an http or https address'}, status=status.HTTP_400_BAD_REQUEST)
+
+        job = enqueue_import(request.user, url)
+        location = reverse('recipe-import-detail', args=[job.id], request=request)
+        return Response(
+            RecipeImportJobSerializer(job).data,
+            status=status.HTTP_202_ACCEPTED,
+            headers={'Location': location}
+        )
+
+    @action(detail=False, methods=['post'])
+    def import_batch(self, request):
+        """Import many recipe URLs at once.
+
+        Pages are fetched concurrently over pooled keep-alive connections and
+        each URL's outcome is streamed back as one JSON line as soon as it is
+        saved, so clients can show progress on large batches.
+        """
+        urls = request.data.get('urls')
+        if not isinstance(urls, list) or not urls or not all(isinstance(url, str) and url for url in urls):
+            return Response({'error': 'urls must be a non-empty list of URLs'}, status=status.HTTP_400_BAD_REQUEST)
+        max_size = get_setting('MAX_BATCH_SIZE')
+        if len(urls) > max_size:
+            return Response(
+                {'error': f'At most {max_size} URLs can be imported at once'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        lines = (json.dumps(result) + '\n' for result in import_batch(list(dict.fromkeys(urls)), request.user))
+        return StreamingHttpResponse(lines, content_type='application/x-ndjson')
+
+    @action(detail=False, methods=['get'])
+    def cookable(self, request):
+        """Recipes that can be made from ?ingredients=1,2,3 (ingredient ids),
+        fewest missing ingredients first. Optional lines never count as
+        missing."""
+        params = CookableRequestSerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        results = cookable_recipes(
+            params.validated_data['ingredients'],
+            limit=params.validated_data['limit'],
+            max_missing=params.validated_data.get('max_missing')
+        )
+        return Response(CookableRecipeSerializer(results, many=True).data)
+
+    @action(detail=True, methods=['get'])
+    def scaled(self, request, pk=None):
+        """The recipe's ingredients scaled to ?servings=N"""
+        params = ScaleRequestSerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
         try:
-            recipe_data = scrape_recipe(url)
-            recipe_data['user'] = request.user.id
-            serializer = self.get_serializer(data=recipe_data)
-            serializer.is_valid(raise_exception=True)
-            serializer.save()
-            return Response(serializer.data, status=status.HTTP_201_CREATED)
-        except Exception as e:
+            scaled = scale_recipes([(int(pk), params.validated_data['servings'])])
+        except (ValueError, Recipe.DoesNotExist):
+            raise NotFound()
+        return Response(ScaledRecipeSerializer(scaled[0]).data)
+
+    @action(detail=False, methods=['post'], url_path='scaled')
+    def scaled_batch(self, request):
+        """Scale many recipes at once, e.g. one per meal slot.
+
+        Takes {"items": [{"recipe": id, "servings": n}, ...]} and answers with
+        the scaled recipes in the same order.
+        """
+        params = ScaleBatchRequestSerializer(data=request.data)
+        params.is_valid(raise_exception=True)
+        try:
+            scaled = scale_recipes([(item['recipe'], item['servings']) for item in params.validated_data['items']])
+        except Recipe.DoesNotExist as e:
             return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(ScaledRecipeSerializer(scaled, many=True).data)
 
-class MealPlanViewSet(viewsets.ModelViewSet):
+class RecipeImportJobViewSet(viewsets.ReadOnlyModelViewSet):
+    serializer_class = RecipeImportJobSerializer
+    permission_classes = [IsAuthenticated]
+    authentication_classes = [JWTAuthentication]
+
+    def get_queryset(self):
+        return RecipeImportJob.objects.filter(user=self.request.user)
+
+class MealPlanViewSet(SparseFieldsetMixin, ConditionalGetMixin, viewsets.ModelViewSet):
     serializer_class = MealPlanSerializer
     permission_classes = [IsAuthenticated]
     authentication_classes = [JWTAuthentication]
+    # Slots come with ?expand=meal_slots or the detail
+    summary_fields = ['id', 'user', 'start_date', 'name', 'notes', 'created_at', 'updated_at']
 
     def get_queryset(self):
         return MealPlan.objects.filter(user=self.request.user)
 
+    def update(self, request, *args, **kwargs):
+        partial = kwargs.pop('partial', False)
+        serializer = self.get_serializer(self.get_object(), data=request.data, partial=partial)
+        serializer.is_valid(raise_exception=True)
+        meal_plan = serializer.save()
+
+        # Reload so the slots are read with their recipes in one query
+        queryset = optimize_queryset(self.get_queryset(), self.get_serializer_class())
+        return Response(self.get_serializer(queryset.get(pk=meal_plan.pk)).data)
+
+    @property
+    def layout(self):
+        """?layout=week replaces meal_slots with a days grid, see week_grid"""
+        layout = self.request.query_params.get('layout', '')
+        if layout not in ('', 'week'):
+            raise ValidationError({'layout': 'Expected week.'})
+        return layout
+
+    def selected_fields(self, serializer_class):
+        fields = super().selected_fields(serializer_class)
+        if self.layout != 'week':
+            return fields
+        # The grid is built from these, even when a summary was asked for
+        needed = {*fields, 'start_date', 'meal_slots'}
+        return tuple(name for name in readable_fields(serializer_class)[0] if name in needed)
+
+    def serialize_rows(self, rows):
+        plans = super().serialize_rows(rows)
+        if self.layout == 'week':
+            for plan in plans:
+                plan['days'] = week_grid(plan['start_date'], plan.pop('meal_slots'))
+        return plans
+
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
 
@@ -142,13 +329,25 @@ class MealPlanViewSet(viewsets.ModelViewSet):
         
         return Response(MealSlotSerializer(created_slots, many=True).data, status=status.HTTP_201_CREATED)
 
+    @action(detail=True, methods=['get'], url_path='shopping-list')
+    def shopping_list(self, request, pk=None):
+        meal_plan = self.get_object()
+        categories = build_shopping_list(meal_plan.id)
+        return Response({
+            'meal_plan': meal_plan.id,
+            'categories': ShoppingListCategorySerializer(categories, many=True).data
+        })
+
 class MealSlotViewSet(viewsets.ModelViewSet):
     serializer_class = MealSlotSerializer
     permission_classes = [IsAuthenticated]
     authentication_classes = [JWTAuthentication]
 
     def get_queryset(self):
-        return MealSlot.objects.filter(meal_plan__user=self.request.user)
+        # Served by the (meal_plan, date, meal_type) unique index
+        return filter_date_range(
+            MealSlot.objects.filter(meal_plan__user=self.request.user), self.request.query_params
+        )
 
     def perform_create(self, serializer):
         meal_plan = serializer.validated_data['meal_plan']
@@ -156,6 +355,39 @@ class MealSlotViewSet(viewsets.ModelViewSet):
             raise PermissionError("You don't have permission to add slots to this meal plan")
         serializer.save()
 
+class CalendarView(APIView):
+    """Events and meal slots between ?start= and ?end= (inclusive), in one
+    indexed query each, for the visible range of the calendar."""
+    permission_classes = [IsAuthenticated]
+    authentication_classes = [JWTAuthentication]
+
+    def get(self, request):
+        start, end = parse_date_range(request.query_params, required=True)
+        if (end - start).days >= MAX_CALENDAR_DAYS:
+            raise ValidationError({'end': f'At most {MAX_CALENDAR_DAYS} days can be requested at once.'})
+        events = Event.objects.filter(user=request.user, date__gte=start, date__lte=end)
+        meal_slots = MealSlot.objects.filter(
+            meal_plan__user=request.user, date__gte=start, date__lte=end
+        ).select_related('recipe')
+        return Response({
+            'start': start,
+            'end': end,
+            'events': EventSerializer(events, many=True).data,
+            'meal_slots': CalendarMealSlotSerializer(meal_slots, many=True).data,
+        })
+
+class IngredientAutocompleteView(APIView):
+    """Ingredients whose names match ?q= as typed, best match first, so the
+    recipe editor can offer existing ingredients instead of new spellings."""
+    permission_classes = [IsAuthenticated]
+    authentication_classes = [JWTAuthentication]
+
+    def get(self, request):
+        params = IngredientAutocompleteRequestSerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        matches = match_ingredients(params.validated_data['q'], limit=params.validated_data['limit'])
+        return Response(IngredientMatchSerializer(matches, many=True).data)
+
 class UserAPIView(generics.CreateAPIView):
     queryset = User.objects.all()
     serializer_class = UserSerializer
@@ -141,6 +141,45 @@ REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
+    'DEFAULT_PAGINATION_CLASS': 'api.pagination.ModelOrderingCursorPagination',
+    'PAGE_SIZE': 50,
+    'DEFAULT_RENDERER_CLASSES': [
+        'api.renderers.ORJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+}
+
+# Recipe import queue, see api/import_queue.py for the defaults
+RECIPE_IMPORT = {
+    'WORKERS': 4,
+    'PER_HOST_LIMIT': 2,
+    'TIMEOUT': 10,
+    'MAX_ATTEMPTS': 3,
+    'BACKOFF_SECONDS': 30,
+    'CONNECTIONS_PER_HOST': 4,
+    'BATCH_WORKERS': 8,
+    'MAX_BATCH_SIZE': 500,
+}
+
+# Cache of scraped recipe pages, see api/services.py for the defaults
+SCRAPE_CACHE = {
+    'TTL': 24 * 60 * 60,
+    'MAX_BYTES': 50 * 1024 * 1024,
+}
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'homelife',
+    },
+}
+
+# Cache of serialized recipes, see api/recipe_cache.py for the defaults.
+# ALIAS names an entry in CACHES; point it at a shared backend (Redis,
+# Memcached) when running more than one process.
+RECIPE_CACHE = {
+    'ALIAS': 'default',
+    'TIMEOUT': 60 * 60,
 }
 
 SIMPLE_JWT = {
@@ -6,7 +6,7 @@ import { Card, Button } from 'react-bootstrap';
 
 import EventModal from './EventModal';
 import LoginModal from './LoginModal';
-import { eventApi } from '../services/api';
+import { calendarApi } from '../services/api';
 
 // Set up the localizer for the calendar using Moment.js
 const localizer = momentLocalizer(moment);
@@ -17,11 +17,20 @@ const MyCalendar = ({ isLoggedIn, onLogin }) => {
     const [showEventModal, setShowEventModal] = useState(false);
     const [showLoginModal, setShowLoginModal] = useState(false);
 
-    // Fetch events from the backend API
+    // The month view shows whole weeks around the current month
+    const [range, setRange] = useState(() => ({
+        start: moment().startOf('month').startOf('week').toDate(),
+        end: moment().endOf('month').endOf('week').toDate(),
+    }));
+
+    // Fetch the events and meal slots of the visible range from the backend API
     const fetchEvents = async () => {
         try {
-            const response = await eventApi.getAll();
-            const formattedEvents = response.data.map(event => ({
+            const response = await calendarApi.get(
+                moment(range.start).format('YYYY-MM-DD'),
+                moment(range.end).format('YYYY-MM-DD')
+            );
+            const formattedEvents = response.data.events.map(event => ({
                 id: event.id,
                 title: event.title,
                 start: new Date(`${event.date}T${event.time || '00:00:00'}`),
@@ -29,7 +38,15 @@ const MyCalendar = ({ isLoggedIn, onLogin }) => {
                 date: event.date,
                 time: event.time,
             }));
-            setEvents(formattedEvents);
+            const formattedSlots = response.data.meal_slots.map(slot => ({
+                id: `meal-slot-${slot.id}`,
+                title: `${slot.meal_type}: ${slot.recipe_name || 'No recipe'}`,
+                start: new Date(`${slot.date}T00:00:00`),
+                end: new Date(`${slot.date}T00:00:00`),
+                allDay: true,
+                mealSlot: true,
+            }));
+            setEvents(formattedEvents.concat(formattedSlots));
         } catch (error) {
             console.error('Error fetching events:', error);
             if (error.response?.status === 401) {
@@ -38,20 +55,32 @@ const MyCalendar = ({ isLoggedIn, onLogin }) => {
         }
     };
 
-    // Fetch events when logged in status changes
+    // Fetch events when logged in status or the visible range changes
     useEffect(() => {
         if (isLoggedIn) {
             fetchEvents();
         } else {
             setEvents([]);
         }
-    }, [isLoggedIn]);
+    }, [isLoggedIn, range]);
+
+    // Month views report {start, end}, week and day views the list of days shown
+    const handleRangeChange = (newRange) => {
+        if (Array.isArray(newRange)) {
+            setRange({ start: newRange[0], end: newRange[newRange.length - 1] });
+        } else {
+            setRange({ start: newRange.start, end: newRange.end });
+        }
+    };
 
     const handleEventClick = (event) => {
         if (!isLoggedIn) {
             setShowLoginModal(true);
             return;
         }
+        if (event.mealSlot) {
+            return;
+        }
         setSelectedEvent(event);
         setShowEventModal(true);
     };
@@ -105,6 +134,7 @@ const MyCalendar = ({ isLoggedIn, onLogin }) => {
                 endAccessor="end"
                 style={{ height: 500 }}
                 onSelectEvent={handleEventClick}
+                onRangeChange={handleRangeChange}
             />
             <EventModal
                 show={showEventModal}
@@ -1,6 +1,6 @@
 import React, { useState, useEffect } from 'react';
 import { Modal, Button, Form, Row, Col, ListGroup } from 'react-bootstrap';
-import { recipeApi } from '../services/api';
+import { recipeApi, ingredientApi } from '../services/api';
 
 const IngredientList = ({ ingredients, onRemove, onMoveUp, onMoveDown }) => {
     return (
@@ -68,6 +68,26 @@ const RecipeEditModal = ({ show, handleClose, recipe, onSave }) => {
         notes: ''
     });
 
+    const [ingredientSuggestions, setIngredientSuggestions] = useState([]);
+
+    // Suggest existing ingredients so the same one is not saved under a new spelling
+    useEffect(() => {
+        const query = newIngredient.name.trim();
+        if (query.length < 2) {
+            setIngredientSuggestions([]);
+            return undefined;
+        }
+        const timer = setTimeout(async () => {
+            try {
+                const response = await ingredientApi.autocomplete(query);
+                setIngredientSuggestions(response.data);
+            } catch (err) {
+                setIngredientSuggestions([]);
+            }
+        }, 200);
+        return () => clearTimeout(timer);
+    }, [newIngredient.name]);
+
     // Transform backend ingredient data to form format
     const transformIngredientsFromBackend = (recipeData) => {
         if (!recipeData?.ingredients) return [];
@@ -318,9 +338,16 @@ const RecipeEditModal = ({ show, handleClose, recipe, onSave }) => {
                                     type="text"
                                     placeholder="Ingredient name"
                                     name="name"
+                                    list="ingredient-suggestions"
+                                    autoComplete="off"
                                     value={newIngredient.name}
                                     onChange={handleIngredientChange}
                                 />
+                                <datalist id="ingredient-suggestions">
+                                    {ingredientSuggestions.map(suggestion => (
+                                        <option key={suggestion.id} value={suggestion.name} />
+                                    ))}
+                                </datalist>
                             </Col>
                             <Col md={2}>
                                 <Form.Control
@@ -7,7 +7,6 @@ import '../styles/Recipe.css';
 
 const RecipeList = () => {
     const [recipes, setRecipes] = useState([]);
-    const [filteredRecipes, setFilteredRecipes] = useState([]);
     const [searchTerm, setSearchTerm] = useState('');
     const [loading, setLoading] = useState(true);
     const [error, setError] = useState(null);
@@ -15,27 +14,20 @@ const RecipeList = () => {
     const [showViewModal, setShowViewModal] = useState(false);
     const [showEditModal, setShowEditModal] = useState(false);
     const [editingRecipe, setEditingRecipe] = useState(null);
+    const [nextPage, setNextPage] = useState(null);
+    const [loadingMore, setLoadingMore] = useState(false);
 
+    // Search on the server, waiting for a pause in typing
     useEffect(() => {
-        fetchRecipes();
-    }, []);
+        const timer = setTimeout(() => fetchRecipes(searchTerm.trim()), searchTerm ? 300 : 0);
+        return () => clearTimeout(timer);
+    }, [searchTerm]);
 
-    useEffect(() => {
-        const filtered = recipes.filter(recipe =>
-            recipe.name.toLowerCase().includes(searchTerm.toLowerCase()) ||
-            recipe.ingredients?.some(ri => 
-                ri.ingredient.name.toLowerCase().includes(searchTerm.toLowerCase())
-            ) ||
-            recipe.instructions?.toLowerCase().includes(searchTerm.toLowerCase())
-        );
-        setFilteredRecipes(filtered);
-    }, [searchTerm, recipes]);
-
-    const fetchRecipes = async () => {
+    const fetchRecipes = async (query) => {
         try {
-            setLoading(true);
-            const response = await recipeApi.getAll();
-            setRecipes(response.data);
+            const response = await recipeApi.getAll(query ? { q: query } : undefined);
+            setRecipes(response.data.results);
+            setNextPage(response.data.next);
             setError(null);
         } catch (err) {
             setError('Failed to fetch recipes. Please try again later.');
@@ -45,9 +37,32 @@ const RecipeList = () => {
         }
     };
 
-    const handleViewRecipe = (recipe) => {
+    const fetchMoreRecipes = async () => {
+        if (!nextPage) {
+            return;
+        }
+        try {
+            setLoadingMore(true);
+            const response = await recipeApi.getPage(nextPage);
+            setRecipes(prev => prev.concat(response.data.results));
+            setNextPage(response.data.next);
+        } catch (err) {
+            console.error('Error fetching more recipes:', err);
+        } finally {
+            setLoadingMore(false);
+        }
+    };
+
+    const handleViewRecipe = async (recipe) => {
+        // The list only has the summary; show it while the full recipe loads
         setSelectedRecipe(recipe);
         setShowViewModal(true);
+        try {
+            const response = await recipeApi.get(recipe.id);
+            setSelectedRecipe(current => (current?.id === recipe.id ? response.data : current));
+        } catch (err) {
+            console.error('Error fetching recipe:', err);
+        }
     };
 
     const handleAddRecipe = () => {
@@ -61,14 +76,18 @@ const RecipeList = () => {
     };
 
     const handleSaveRecipe = async (savedRecipe) => {
-        await fetchRecipes(); // Refresh the recipe list
+        // Update the loaded pages in place instead of refetching them all
+        const recipe = savedRecipe.data;
+        setRecipes(prev => prev.some(r => r.id === recipe.id)
+            ? prev.map(r => (r.id === recipe.id ? recipe : r))
+            : [recipe, ...prev]);
     };
 
     const handleDeleteRecipe = async (recipeId) => {
         if (window.confirm('Are you sure you want to delete this recipe?')) {
             try {
                 await recipeApi.delete(recipeId);
-                await fetchRecipes(); // Refresh the recipe list
+                setRecipes(prev => prev.filter(r => r.id !== recipeId));
                 setShowViewModal(false); // Close the modal if open
             } catch (error) {
                 console.error('Error deleting recipe:', error);
@@ -101,7 +120,7 @@ const RecipeList = () => {
             </div>
 
             <Row xs={1} md={2} lg={3} className="g-4">
-                {filteredRecipes.map((recipe) => (
+                {recipes.map((recipe) => (
                     <Col key={recipe.id}>
                         <Card 
                             className="h-100 recipe-card" 
@@ -127,6 +146,14 @@ const RecipeList = () => {
                 ))}
             </Row>
 
+            {nextPage && (
+                <div className="text-center my-4">
+                    <Button variant="outline-primary" onClick={fetchMoreRecipes} disabled={loadingMore}>
+                        {loadingMore ? 'Loading...' : 'Load more recipes'}
+                    </Button>
+                </div>
+            )}
+
             <RecipeModal
                 show={showViewModal}
                 handleClose={() => setShowViewModal(false)}
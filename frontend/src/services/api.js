@@ -70,23 +70,43 @@ api.interceptors.response.use(
 
 // Recipe API endpoints
 export const recipeApi = {
-    getAll: () => api.get('/recipes/'),
+    // Summaries without instructions or ingredients unless params has
+    // fields (e.g. 'name,servings') or expand ('ingredients')
+    getAll: (params) => api.get('/recipes/', { params }),
+    getPage: (url) => api.get(url),
     get: (id) => api.get(`/recipes/${id}/`),
     create: (data) => api.post('/recipes/', data),
     update: (id, data) => api.put(`/recipes/${id}/`, data),
     delete: (id) => api.delete(`/recipes/${id}/`),
-    importFromUrl: (url) => api.post('/recipes/import-from-url/', { url })
+    getScaled: (id, servings) => api.get(`/recipes/${id}/scaled/`, { params: { servings } }),
+    // items: [{ recipe, servings }, ...], e.g. one per meal slot
+    getScaledBatch: (items) => api.post('/recipes/scaled/', { items }),
+    importFromUrl: (url) => api.post('/recipes/import-from-url/', { url }),
+    getImportJob: (id) => api.get(`/recipe-imports/${id}/`),
+    // Responds with one JSON object per line, one line per URL
+    importBatch: (urls) => api.post('/recipes/import_batch/', { urls }, { responseType: 'text' })
 };
 
 // Event API endpoints
 export const eventApi = {
-    getAll: () => api.get('/events/'),
+    getAll: (params) => api.get('/events/', { params }),
+    getPage: (url) => api.get(url),
     get: (id) => api.get(`/events/${id}/`),
     create: (data) => api.post('/events/', data),
     update: (id, data) => api.put(`/events/${id}/`, data),
     delete: (id) => api.delete(`/events/${id}/`)
 };
 
+// Events and meal slots between two YYYY-MM-DD dates, both included
+export const calendarApi = {
+    get: (start, end) => api.get('/calendar/', { params: { start, end } })
+};
+
+// Existing ingredients matching what has been typed, best first
+export const ingredientApi = {
+    autocomplete: (q, limit = 10) => api.get('/ingredients/autocomplete/', { params: { q, limit } })
+};
+
 // Auth API endpoints
 export const authApi = {
     login: (username, password) => 